@@ -0,0 +1,156 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules only the media/push code paths need; none of them may be imported
+# while a worker boots (settings, app registry, URLconf). cloudinary.uploader
+# is not listed: the storage backend and the cloudinary app import it.
+HEAVY_MODULES = (
+    'moviepy',
+    'numpy',
+    'imageio',
+    'imageio_ffmpeg',
+    'PIL.Image',
+    'google.oauth2',
+    'google.auth.transport.requests',
+)
+
+BOOT = """
+import json
+import sys
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+
+def project_apps():
+    """Installed apps that live in this repository."""
+    base = str(settings.BASE_DIR)
+    return [a for a in apps.get_app_configs() if os.path.abspath(a.path).startswith(base)]
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (self_us, cumulative_us, depth, module) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(module) - len(module.lstrip(' ')) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, module.strip()))
+    return rows
+
+
+def attribute_to_apps(rows, app_names):
+    """Charge each project module's cumulative import time to its app.
+
+    A module imported from inside another project module is already included
+    in that module's cumulative time, so only outermost project modules are
+    counted: whoever imports a dependency first pays for it.
+    Returns {app_name: (total_us, [(cumulative_us, module), ...])}.
+    """
+    def app_of(module):
+        for name in app_names:
+            if module == name or module.startswith(name + '.'):
+                return name
+        return None
+
+    totals = {name: [0, []] for name in app_names}
+    # importtime prints children before their parent; reversed, parents come first.
+    ancestors = []
+    for _, cumulative_us, depth, module in reversed(rows):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        app = app_of(module)
+        if app and not any(owner for _, owner in ancestors):
+            totals[app][0] += cumulative_us
+            totals[app][1].append((cumulative_us, module))
+        ancestors.append((depth, app))
+    return {name: (total, mods) for name, (total, mods) in totals.items()}
+
+
+def boot_profile():
+    """Boot Django and load the URLconf in a fresh interpreter under -X importtime.
+
+    Returns (rows, heavy) where heavy lists `HEAVY_MODULES` that got imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT.format(heavy=HEAVY_MODULES)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False,
+        cwd=str(settings.BASE_DIR), env=os.environ.copy(),
+    )
+    if proc.returncode != 0:
+        raise CommandError(f"Django failed to boot: {proc.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(proc.stderr), json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-app import cost at worker boot (django.setup() plus the "
+        "URLconf) with `python -X importtime` and check that heavy media "
+        "dependencies stay lazily imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('apps', nargs='*', help='App labels to measure (default: all project apps).')
+        parser.add_argument('--repeat', type=int, default=3, help='Boots to measure; medians are reported.')
+        parser.add_argument('--top', type=int, default=5, help='Slowest modules to list per app.')
+        parser.add_argument('--budget-ms', type=float, help='Fail if any app exceeds this many milliseconds.')
+        parser.add_argument('--json', action='store_true', help='Emit machine-readable results.')
+
+    def handle(self, *args, **options):
+        configs = project_apps()
+        if options['apps']:
+            configs = [c for c in configs if c.label in options['apps']]
+            if not configs:
+                raise CommandError(f"No project app matches {options['apps']}")
+
+        names = [c.name for c in project_apps()]
+        runs = []
+        heavy = []
+        for _ in range(max(options['repeat'], 1)):
+            rows, heavy = boot_profile()
+            runs.append((sum(r[0] for r in rows), attribute_to_apps(rows, names)))
+        boot_us = statistics.median(total for total, _ in runs)
+
+        results = {}
+        for config in configs:
+            per_run = [by_app[config.name] for _, by_app in runs]
+            totals = [total for total, _ in per_run]
+            _, modules = per_run[totals.index(sorted(totals)[len(totals) // 2])]
+            results[config.label] = {
+                'median_ms': statistics.median(totals) / 1000,
+                'slowest': [
+                    {'module': module, 'cumulative_ms': us / 1000}
+                    for us, module in sorted(modules, reverse=True)[:options['top']]
+                ],
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'boot_ms': boot_us / 1000, 'apps': results, 'heavy_modules_at_boot': heavy}, indent=2
+            ))
+        else:
+            self.stdout.write(f"Total import time at boot: {boot_us / 1000:.1f} ms")
+            for label, result in sorted(results.items(), key=lambda item: -item[1]['median_ms']):
+                self.stdout.write(f"{label:<16} {result['median_ms']:8.1f} ms")
+                for row in result['slowest']:
+                    self.stdout.write(f"    {row['cumulative_ms']:7.1f} ms  {row['module']}")
+            self.stdout.write(f"Heavy modules loaded at boot: {', '.join(heavy) or 'none'}")
+
+        over = [label for label, r in results.items() if options['budget_ms'] and r['median_ms'] > options['budget_ms']]
+        if heavy or over:
+            raise CommandError(
+                f"Startup regression: heavy modules {heavy or '[]'}, apps over budget {over or '[]'}"
+            )
@@ -1,3 +1,58 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from feeds import archive
+from feeds.models import Feed, FeedReaction
+from users.models import User
+from analytics.management.commands.startup_imports import attribute_to_apps, boot_profile, parse_importtime
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |       rest_framework.views
+import time:        50 |        150 |     users.serializers
+import time:        20 |        170 |   users.views
+import time:        30 |         30 |     users.serializers.extra
+import time:        10 |         40 |   feeds.views
+import time:         5 |        215 | sikio_la_chama_backend.urls
+"""
+
+
+class StartupImportsTests(SimpleTestCase):
+	def test_cost_charged_to_first_importing_app(self):
+		rows = parse_importtime(IMPORTTIME)
+		self.assertEqual(rows[0], (100, 100, 3, 'rest_framework.views'))
+		by_app = attribute_to_apps(rows, ['users', 'feeds'])
+		# users.serializers is nested under users.views and not counted twice
+		self.assertEqual(by_app['users'], (170, [(170, 'users.views')]))
+		# feeds.views pulled in a users module; feeds pays for it
+		self.assertEqual(by_app['feeds'], (40, [(40, 'feeds.views')]))
+
+	def test_boot_does_not_import_heavy_media_dependencies(self):
+		rows, heavy = boot_profile()
+		self.assertTrue(rows)
+		self.assertEqual(heavy, [])
+
+
+class FeedReactionAnalyticsTests(TestCase):
+	def test_archived_views_still_count(self):
+		cache.clear()
+		admin = User.objects.create_user(username='admin', password='pw', user_type='admin', is_staff=True)
+		feed = Feed.objects.create(posted_by=admin, description='Old')
+		users = User.objects.bulk_create([User(username=f'user{i}') for i in range(3)])
+		FeedReaction.objects.bulk_create([FeedReaction(feed=feed, user=user, reaction_type='viewed') for user in users])
+		FeedReaction.objects.create(feed=feed, user=admin, reaction_type='like')
+		self.assertEqual(archive.archive_old_views(now=timezone.now() + datetime.timedelta(days=365)), 3)
+
+		client = APIClient()
+		client.force_authenticate(admin)
+		response = client.get('/api/analytics/admin-stats/?per_feed=true')
+
+		self.assertEqual(response.status_code, 200)
+		reactions = response.data['feed_reactions']
+		self.assertEqual(reactions['total'], 4)
+		self.assertEqual(reactions['by_type'], {'viewed': 3, 'like': 1})
+		self.assertEqual(reactions['per_feed'][0]['by_type'], {'viewed': 3, 'like': 1})
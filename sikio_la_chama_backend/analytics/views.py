@@ -3,15 +3,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from django.db.models import Count
+from django.db.models.functions import TruncDate
 from django.utils.dateparse import parse_datetime, parse_date
 from django.utils import timezone
 from django.core.cache import cache
-from problem_types.models import ProblemType
 from user_messages.models import Message
 from polls.models import Poll, PollOption, PollVote
-from feeds.models import Feed, FeedReaction
-from institutions.models import Institution, Department
+from feeds.models import Feed, FeedReaction, FeedReactionArchive
+from catalog import refdata
 import datetime
+from collections import Counter
 
 
 def _parse_range(start_str, end_str):
@@ -57,16 +58,17 @@ class AdminAnalyticsView(APIView):
 
 		# Base filters
 		msg_qs = Message.objects.all()
-		fr_qs = FeedReaction.objects.all()
+		# Archived `viewed` rows (feeds/archive.py) still count
+		fr_querysets = [FeedReaction.objects.all(), FeedReactionArchive.objects.all()]
 		pv_qs = PollVote.objects.all()
 
 		if start:
 			msg_qs = msg_qs.filter(timestamp__gte=start)
-			fr_qs = fr_qs.filter(created_at__gte=start)
+			fr_querysets = [qs.filter(created_at__gte=start) for qs in fr_querysets]
 			pv_qs = pv_qs.filter(created_at__gte=start)
 		if end:
 			msg_qs = msg_qs.filter(timestamp__lte=end)
-			fr_qs = fr_qs.filter(created_at__lte=end)
+			fr_querysets = [qs.filter(created_at__lte=end) for qs in fr_querysets]
 			pv_qs = pv_qs.filter(created_at__lte=end)
 		if institution_id:
 			msg_qs = msg_qs.filter(institution_id=institution_id)
@@ -78,7 +80,7 @@ class AdminAnalyticsView(APIView):
 			.annotate(count=Count('id'))
 			.order_by('-count')
 		)
-		problem_type_map = {pt.id: pt.name for pt in ProblemType.objects.all()}
+		problem_type_map = refdata.names('problem_types')
 		problem_type_stats = [
 			{
 				'problem_type_id': p['problem_type'],
@@ -90,45 +92,55 @@ class AdminAnalyticsView(APIView):
 
 		# 2) Poll stats (accurate per date range)
 		poll_stats = []
-		polls = Poll.objects.all()
+		polls = Poll.objects.prefetch_related('options')
+		# votes in range, per poll and per selected option
+		voters_by_poll = dict(pv_qs.order_by().values_list('poll_id').annotate(count=Count('id')))
+		votes_by_option = dict(
+			pv_qs.order_by().filter(selected_options__isnull=False)
+			.values_list('selected_options').annotate(count=Count('id'))
+		)
 		for poll in polls:
-			# filter votes by poll and date range
-			votes = pv_qs.filter(poll_id=poll.id)
-			total_voters = votes.count()
-			options = []
-			for opt in poll.options.all():
-				opt_count = votes.filter(selected_options=opt).count()
-				options.append({'option_id': opt.id, 'text': opt.text, 'votes_count': opt_count})
+			options = [
+				{'option_id': opt.id, 'text': opt.text, 'votes_count': votes_by_option.get(opt.id, 0)}
+				for opt in poll.options.all()
+			]
 			poll_stats.append({
 				'poll_id': poll.id,
 				'question': poll.question,
-				'total_voters': total_voters,
+				'total_voters': voters_by_poll.get(poll.id, 0),
 				'options': options,
 			})
 
 		# 3) Feed reactions
-		total_reactions = fr_qs.count()
-		reaction_breakdown = fr_qs.values('reaction_type').annotate(count=Count('id'))
-		reaction_map = {r['reaction_type']: r['count'] for r in reaction_breakdown}
+		reaction_map = Counter()
+		for fr_qs in fr_querysets:
+			for r in fr_qs.order_by().values('reaction_type').annotate(count=Count('id')):
+				reaction_map[r['reaction_type']] += r['count']
+		total_reactions = sum(reaction_map.values())
 		per_feed_list = []
 		if per_feed:
 			feeds = Feed.objects.all()
 			if institution_id:
 				feeds = feeds.filter(institution_id=institution_id)
-			for f in feeds:
-				fq = fr_qs.filter(feed_id=f.id)
+			by_feed = {}
+			for fr_qs in fr_querysets:
+				for r in fr_qs.filter(feed__in=feeds).order_by().values('feed_id', 'reaction_type').annotate(count=Count('id')):
+					by_type = by_feed.setdefault(r['feed_id'], {})
+					by_type[r['reaction_type']] = by_type.get(r['reaction_type'], 0) + r['count']
+			for f in feeds.only('id', 'created_at'):
+				by_type = by_feed.get(f.id, {})
 				per_feed_list.append({
 					'feed_id': f.id,
 					'created_at': f.created_at,
-					'total_reactions': fq.count(),
-					'by_type': {r['reaction_type']: r['count'] for r in fq.values('reaction_type').annotate(count=Count('id'))}
+					'total_reactions': sum(by_type.values()),
+					'by_type': by_type,
 				})
 
 		# 4) Messages by institution and department (with names)
 		messages_by_institution_qs = (
 			msg_qs.values('institution').annotate(count=Count('id')).order_by('-count')
 		)
-		inst_map = {i.id: i.name for i in Institution.objects.all()}
+		inst_map = refdata.names('institutions')
 		messages_by_institution = [
 			{'institution_id': i['institution'], 'institution_name': inst_map.get(i['institution'], ''), 'count': i['count']}
 			for i in messages_by_institution_qs
@@ -137,7 +149,7 @@ class AdminAnalyticsView(APIView):
 		messages_by_department_qs = (
 			msg_qs.values('department').annotate(count=Count('id')).order_by('-count')
 		)
-		dept_map = {d.id: f"{d.name} ({d.institution.name})" for d in Department.objects.select_related('institution').all()}
+		dept_map = {pk: str(d) for pk, d in refdata.objects('departments').items()}
 		messages_by_department = [
 			{'department_id': d['department'], 'department_name': dept_map.get(d['department'], ''), 'count': d['count']}
 			for d in messages_by_department_qs
@@ -148,15 +160,22 @@ class AdminAnalyticsView(APIView):
 		if daily and start and end:
 			# build date buckets
 			delta = (end.date() - start.date()).days if hasattr(end, 'date') and hasattr(start, 'date') else 0
-			daily_data = {}
-			for single_day in (start.date() + datetime.timedelta(n) for n in range(delta + 1)):
-				day_start = timezone.make_aware(datetime.datetime.combine(single_day, datetime.time.min))
-				day_end = timezone.make_aware(datetime.datetime.combine(single_day, datetime.time.max))
-				day_qs = Message.objects.filter(timestamp__range=(day_start, day_end))
-				if institution_id:
-					day_qs = day_qs.filter(institution_id=institution_id)
-				counts = list(day_qs.values('institution').annotate(count=Count('id')))
-				daily_data[str(single_day)] = counts
+			first_day = start.date()
+			last_day = first_day + datetime.timedelta(delta)
+			daily_data = {str(first_day + datetime.timedelta(n)): [] for n in range(delta + 1)}
+			# one grouped query instead of one per day; days are in the current time zone
+			day_qs = Message.objects.filter(
+				timestamp__gte=timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min)),
+				timestamp__lte=timezone.make_aware(datetime.datetime.combine(last_day, datetime.time.max)),
+			)
+			if institution_id:
+				day_qs = day_qs.filter(institution_id=institution_id)
+			rows = (
+				day_qs.annotate(day=TruncDate('timestamp')).order_by('day', 'institution')
+				.values('day', 'institution').annotate(count=Count('id'))
+			)
+			for row in rows:
+				daily_data[str(row['day'])].append({'institution': row['institution'], 'count': row['count']})
 			messages_daily = daily_data
 
 		result = {
@@ -164,7 +183,7 @@ class AdminAnalyticsView(APIView):
 			'poll_stats': poll_stats,
 			'feed_reactions': {
 				'total': total_reactions,
-				'by_type': reaction_map,
+				'by_type': dict(reaction_map),
 				'per_feed': per_feed_list,
 			},
 			'messages_by_institution': messages_by_institution,
@@ -4,6 +4,8 @@ class Announcement(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # `?since=` delta sync reads this (see catalog/sync.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
\ No newline at end of file
@@ -8,8 +8,8 @@ class AnnouncementSerializer(serializers.ModelSerializer):
     PREVIEW_LENGTH = 240
     class Meta:
         model = Announcement
-        fields = ['id', 'title', 'description', 'preview', 'is_truncated', 'created_at']
-        read_only_fields = ['id', 'created_at', 'preview', 'is_truncated']
+        fields = ['id', 'title', 'description', 'preview', 'is_truncated', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'preview', 'is_truncated']
 
     def get_preview(self, obj):
         text = (obj.description or '')
@@ -19,4 +19,11 @@ class AnnouncementSerializer(serializers.ModelSerializer):
 
     def get_is_truncated(self, obj):
         text = (obj.description or '')
-        return len(text) > self.PREVIEW_LENGTH
\ No newline at end of file
+        return len(text) > self.PREVIEW_LENGTH
+
+
+class AnnouncementListSerializer(AnnouncementSerializer):
+    """Compact row for paginated/delta listings; the detail has the full text."""
+
+    class Meta(AnnouncementSerializer.Meta):
+        fields = ['id', 'title', 'preview', 'is_truncated', 'created_at', 'updated_at']
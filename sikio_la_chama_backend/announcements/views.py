@@ -1,11 +1,16 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAdminUser, AllowAny
 from .models import Announcement
-from .serializers import AnnouncementSerializer
+from .serializers import AnnouncementSerializer, AnnouncementListSerializer
+from catalog.conditional import ConditionalGetMixin
+from catalog.sync import DeltaSyncMixin
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(ConditionalGetMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Announcement.objects.all().order_by('-created_at')
     serializer_class = AnnouncementSerializer
+    list_serializer_class = AnnouncementListSerializer
+    sync_resource = 'announcements'
+    conditional_resources = ('announcements',)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -0,0 +1,77 @@
+"""Conditional GET for catalog endpoints.
+
+`ConditionalGetMixin` computes validators from the resource's version
+counter before the handler runs: a matching ``If-None-Match`` (or an
+``If-Modified-Since`` not older than the last change) is answered with
+304 before any queryset is evaluated or serialized. Fresh responses carry
+``ETag``, ``Last-Modified`` and ``Cache-Control`` so edge caches can serve
+them too.
+"""
+import calendar
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from . import versions
+
+
+class NotModified(APIException):
+    status_code = 304
+
+
+class ConditionalGetMixin:
+    """Add ETag/304 handling to an APIView or ViewSet.
+
+    Set `conditional_resources` to the `catalog.versions.RESOURCES` names the
+    response depends on.
+    """
+    conditional_resources = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method not in ('GET', 'HEAD') or not self.conditional_resources:
+            return
+        states = [versions.current(name) for name in self.conditional_resources]
+        tag = '.'.join(str(version) for version, _ in states)
+        # Filters/pagination change the body, so they are part of the tag.
+        variant = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()[:8]
+        etag = f'W/"{tag}-{variant}"'
+        changed = [updated for _, updated in states if updated is not None]
+        last_modified = calendar.timegm(max(changed).utctimetuple()) if changed else None
+        self._validators = (etag, last_modified)
+        if _not_modified(request, etag, last_modified):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=304)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            max_age = getattr(settings, 'CATALOG_CACHE_MAX_AGE', 60)
+            scope = 'private' if request.user.is_authenticated else 'public'
+            response['Cache-Control'] = f'{scope}, max-age={max_age}'
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison (RFC 9110 13.1.2): ignore the W/ prefixes.
+        wanted = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        return '*' in wanted or etag.removeprefix('W/') in wanted
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return bool(last_modified is not None and if_modified_since and last_modified <= if_modified_since)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog import sync
+
+
+class Command(BaseCommand):
+    help = "Delete delta-sync tombstones older than SYNC_TOMBSTONE_TTL."
+
+    def handle(self, *args, **options):
+        count = sync.purge_tombstones()
+        self.stdout.write(f"Purged {count} tombstones")
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class ResourceVersion(models.Model):
+    """Change counter for a public reference-data resource.
+
+    Bumped whenever a row of the resource is saved or deleted (see
+    `catalog.versions`); list endpoints derive their ETag from it, so a
+    revalidation costs one indexed lookup instead of a query plus
+    serialization.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class Tombstone(models.Model):
+    """Marks a deleted row so `?since=` delta sync can tell clients to drop it."""
+    resource = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['resource', 'deleted_at'], name='catalog_tombstone_since')]
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} deleted"
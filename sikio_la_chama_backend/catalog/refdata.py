@@ -0,0 +1,123 @@
+"""Process-local cache of reference data.
+
+Institutions, departments and problem types are small, change rarely and
+are looked up on nearly every request. Each process keeps a copy of them
+keyed by primary key, tagged with the resource's `catalog.versions`
+counter. The counters are re-read at most every ``REFDATA_CHECK_INTERVAL``
+seconds (one query for all three), so steady-state lookups cost no
+queries; writes made by this process drop the copy immediately, writes
+from other processes are picked up on the next check.
+
+Cached instances are shared between threads: treat them as read-only.
+`get()` hands out copies for code that keeps or assigns the instance.
+"""
+import copy
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from . import versions
+from .models import ResourceVersion
+
+CACHED = ('institutions', 'departments', 'problem_types')
+DEFAULT_CHECK_INTERVAL = 5
+
+_lock = threading.Lock()
+_entries = {}  # name -> (version, {pk: instance})
+_checked_at = None
+
+
+def _check_versions():
+    """Drop entries whose version counter has moved since they were loaded."""
+    global _checked_at
+    now = time.monotonic()
+    interval = getattr(settings, 'REFDATA_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+    if _checked_at is not None and now - _checked_at < interval:
+        return
+    _checked_at = now
+    if not _entries:
+        return
+    current = dict(ResourceVersion.objects.filter(name__in=CACHED).values_list('name', 'version'))
+    for name, (version, _) in list(_entries.items()):
+        if current.get(name, 0) != version:
+            _entries.pop(name, None)
+
+
+def _load(name):
+    # Read the version first: a write landing in between leaves the copy
+    # newer than its tag, and the next check simply reloads it.
+    version, _ = versions.current(name)
+    queryset = apps.get_model(versions.RESOURCES[name][0])._default_manager.all()
+    return version, {obj.pk: obj for obj in queryset}
+
+
+def objects(name):
+    """Return the cached ``{pk: instance}`` mapping for `name`."""
+    _check_versions()
+    entry = _entries.get(name)
+    if entry is None:
+        with _lock:
+            entry = _entries.get(name)
+            if entry is None:
+                entry = _entries[name] = _load(name)
+    return entry[1]
+
+
+def get(name, pk):
+    """Return a copy of the `name` instance with `pk`, or None.
+
+    A pk missing from the cache (created by another process since the last
+    check) falls back to the database.
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    obj = objects(name).get(pk)
+    if obj is not None:
+        return copy.copy(obj)
+    return apps.get_model(versions.RESOURCES[name][0])._default_manager.filter(pk=pk).first()
+
+
+def name(resource, pk):
+    """Return the display name of `resource` `pk` ('' if unknown, None if pk is None)."""
+    if pk is None:
+        return None
+    obj = objects(resource).get(pk)
+    if obj is None:
+        obj = get(resource, pk)
+    return obj.name if obj is not None else ''
+
+
+def names(resource):
+    return {pk: obj.name for pk, obj in objects(resource).items()}
+
+
+def detail(resource, pk):
+    """The ``{"id", "name"}`` summary serializers embed for a related pk."""
+    if pk is None:
+        return None
+    return {"id": pk, "name": name(resource, pk)}
+
+
+def invalidate(resource=None):
+    global _checked_at
+    if resource is None:
+        _entries.clear()
+        _checked_at = None
+    else:
+        _entries.pop(resource, None)
+
+
+def invalidate_on_change(resource):
+    """Drop `resource` now and again once the surrounding transaction commits.
+
+    The second pass covers a concurrent reload that read the pre-commit rows.
+    """
+    if resource not in CACHED:
+        return
+    invalidate(resource)
+    transaction.on_commit(lambda: invalidate(resource))
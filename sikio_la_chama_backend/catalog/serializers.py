@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from . import refdata
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """`PrimaryKeyRelatedField` validated against `catalog.refdata`.
+
+    `resource` is one of `refdata.CACHED`; `queryset` is still required by
+    DRF for writable fields and is only used to render browsable-API forms.
+    """
+
+    def __init__(self, resource, **kwargs):
+        self.resource = resource
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = refdata.get(self.resource, pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
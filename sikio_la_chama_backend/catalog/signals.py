@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+
+from . import sync, versions
+
+
+def on_tracked_change(sender, raw=False, **kwargs):
+    if raw:
+        return
+    versions.bump_for_model(sender)
+
+
+def on_tracked_delete(sender, instance, **kwargs):
+    for name in versions.resources_for_model(sender):
+        if name in sync.TOMBSTONE_RESOURCES:
+            sync.record_deletion(name, instance.pk)
+    versions.bump_for_model(sender)
+
+
+for _model in versions.tracked_models():
+    post_save.connect(on_tracked_change, sender=_model, dispatch_uid=f"catalog_save_{_model._meta.label}")
+    post_delete.connect(on_tracked_delete, sender=_model, dispatch_uid=f"catalog_delete_{_model._meta.label}")
@@ -0,0 +1,182 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from announcements.models import Announcement
+from institutions.models import Institution, Department
+from problem_types.models import ProblemType
+from catalog import refdata, sync, versions
+from catalog.models import ResourceVersion, Tombstone
+from user_messages.serializers import MessageSerializer
+
+
+class ConditionalGetTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.institution = Institution.objects.create(name='Water')
+		Department.objects.create(name='Billing', institution=self.institution)
+		ProblemType.objects.create(name='Leak')
+		Announcement.objects.create(title='Notice', description='Body')
+
+	def test_etag_and_cache_headers(self):
+		resp = self.client.get('/api/problem-types/')
+		self.assertEqual(resp.status_code, 200)
+		self.assertTrue(resp['ETag'].startswith('W/"'))
+		self.assertIn('Last-Modified', resp)
+		self.assertEqual(resp['Cache-Control'], 'public, max-age=60')
+		self.assertIn('Authorization', resp['Vary'])
+
+	def test_matching_etag_returns_304_without_querying_the_resource(self):
+		etag = self.client.get('/api/announcements/')['ETag']
+		# Only the version lookup runs; the queryset is never evaluated.
+		with self.assertNumQueries(1):
+			resp = self.client.get('/api/announcements/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(resp.status_code, 304)
+		self.assertEqual(resp.content, b'')
+		self.assertEqual(resp['ETag'], etag)
+
+	def test_write_changes_etag(self):
+		etag = self.client.get('/api/institutions/')['ETag']
+		Institution.objects.create(name='Power')
+		resp = self.client.get('/api/institutions/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(resp.status_code, 200)
+		self.assertNotEqual(resp['ETag'], etag)
+		self.assertEqual(len(resp.data), 2)
+
+	def test_etag_depends_on_query_string(self):
+		first = self.client.get('/api/institutions/')['ETag']
+		resp = self.client.get('/api/institutions/?page=2', HTTP_IF_NONE_MATCH=first)
+		self.assertNotEqual(resp.status_code, 304)
+
+	def test_nested_departments_and_message_institution_list(self):
+		url = f'/api/institutions/{self.institution.id}/departments/'
+		etag = self.client.get(url)['ETag']
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+		Department.objects.create(name='Meters', institution=self.institution)
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+		etag = self.client.get('/api/messages/institutions/')['ETag']
+		self.assertEqual(self.client.get('/api/messages/institutions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+	def test_if_modified_since(self):
+		_, updated_at = versions.current('problem_types')
+		since = http_date(updated_at.timestamp() + 1)
+		self.assertEqual(self.client.get('/api/problem-types/', HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+		since = http_date(updated_at.timestamp() - 3600)
+		self.assertEqual(self.client.get('/api/problem-types/', HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+	def test_delete_bumps_version(self):
+		version, _ = versions.current('announcements')
+		Announcement.objects.all().delete()
+		self.assertEqual(versions.current('announcements')[0], version + 1)
+
+
+@override_settings(REFDATA_CHECK_INTERVAL=60)
+class ReferenceDataCacheTests(TestCase):
+	def setUp(self):
+		refdata.invalidate()
+		self.addCleanup(refdata.invalidate)
+		self.institution = Institution.objects.create(name='Water')
+		self.department = Department.objects.create(name='Billing', institution=self.institution)
+		self.problem_type = ProblemType.objects.create(name='Leak')
+
+	def _payload(self):
+		return {
+			'institution': self.institution.id, 'department': self.department.id,
+			'problem_type': self.problem_type.id, 'content': 'Hello', 'ward': 'Ward',
+			'street': 'Street', 'phone_number': '0700000000',
+		}
+
+	def test_steady_state_lookups_cost_no_queries(self):
+		for name in refdata.CACHED:
+			refdata.objects(name)
+		with self.assertNumQueries(0):
+			serializer = MessageSerializer(data=self._payload())
+			self.assertTrue(serializer.is_valid(), serializer.errors)
+			self.assertEqual(str(self.department), 'Billing (Water)')
+			self.assertEqual(refdata.detail('institutions', self.institution.id), {'id': self.institution.id, 'name': 'Water'})
+		self.assertEqual(serializer.validated_data['department'], self.department)
+		# callers get copies, never the shared cached instance
+		self.assertIsNot(serializer.validated_data['department'], refdata.objects('departments')[self.department.id])
+
+	def test_unknown_id_is_rejected(self):
+		payload = self._payload() | {'department': self.department.id + 100}
+		serializer = MessageSerializer(data=payload)
+		self.assertFalse(serializer.is_valid())
+		self.assertIn('department', serializer.errors)
+
+	def test_local_write_invalidates_immediately(self):
+		refdata.objects('institutions')
+		self.institution.name = 'Water Board'
+		self.institution.save()
+		self.assertEqual(refdata.name('institutions', self.institution.id), 'Water Board')
+
+	def test_other_process_write_seen_after_version_check(self):
+		refdata.objects('problem_types')
+		# as another process would: the row and its version change, no signal here
+		ProblemType.objects.filter(pk=self.problem_type.pk).update(name='Burst pipe')
+		ResourceVersion.objects.filter(name='problem_types').update(version=F('version') + 1)
+		self.assertEqual(refdata.name('problem_types', self.problem_type.id), 'Leak')
+		with override_settings(REFDATA_CHECK_INTERVAL=0):
+			self.assertEqual(refdata.name('problem_types', self.problem_type.id), 'Burst pipe')
+
+	def test_missing_id_falls_back_to_database(self):
+		other = Institution.objects.create(name='Power')
+		# as if created by another process since the last version check
+		refdata.objects('institutions').pop(other.id)
+		self.assertEqual(refdata.get('institutions', other.id), other)
+
+
+class DeltaSyncTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.announcements = [
+			Announcement.objects.create(title=f'Notice {i}', description='Body ' * 100) for i in range(5)
+		]
+
+	def test_plain_list_without_pagination_params(self):
+		resp = self.client.get('/api/announcements/')
+		self.assertIsInstance(resp.data, list)
+		self.assertIn('description', resp.data[0])
+
+	def test_cursor_pages_are_compact(self):
+		resp = self.client.get('/api/announcements/?page_size=3')
+		self.assertEqual(len(resp.data['results']), 3)
+		self.assertNotIn('description', resp.data['results'][0])
+		self.assertIn('preview', resp.data['results'][0])
+		seen = [row['id'] for row in resp.data['results']]
+		resp = self.client.get(resp.data['next'])
+		seen += [row['id'] for row in resp.data['results']]
+		self.assertIsNone(resp.data['next'])
+		self.assertEqual(seen, [a.id for a in reversed(self.announcements)])
+
+	def test_since_returns_changes_and_tombstones(self):
+		since = timezone.now()
+		changed, deleted = self.announcements[1], self.announcements[3]
+		changed.title = 'Updated'
+		changed.save()
+		deleted_id = deleted.id
+		deleted.delete()
+
+		resp = self.client.get('/api/announcements/', {'since': since.isoformat()})
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual([row['id'] for row in resp.data['results']], [changed.id])
+		self.assertEqual(resp.data['deleted'], [deleted_id])
+		self.assertTrue(resp.data['sync_token'])
+
+		resp = self.client.get('/api/announcements/', {'since': resp.data['sync_token']})
+		# the overlap window re-sends recent changes rather than risk missing one
+		self.assertIn(changed.id, [row['id'] for row in resp.data['results']])
+
+	def test_since_validation(self):
+		self.assertEqual(self.client.get('/api/announcements/?since=yesterday').status_code, 400)
+		old = (timezone.now() - timedelta(days=365)).isoformat()
+		self.assertEqual(self.client.get('/api/announcements/', {'since': old}).status_code, 410)
+
+	def test_purge_tombstones(self):
+		self.announcements[0].delete()
+		Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=365))
+		self.assertEqual(sync.purge_tombstones(), 1)
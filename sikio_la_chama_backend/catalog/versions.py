@@ -0,0 +1,60 @@
+"""Version counters for rarely-changing public resources.
+
+`RESOURCES` maps a resource name to the models whose writes change it.
+Saves and deletes go through signals (`catalog.signals`); code that writes
+with `QuerySet.update()`/`bulk_create()` must call `bump_for_model()`
+itself, which also drops this process's `catalog.refdata` copy.
+"""
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ResourceVersion
+
+RESOURCES = {
+    'announcements': ('announcements.Announcement',),
+    'ilani': ('ilani.Ilani',),
+    'leaders': ('leaders.Leader',),
+    'problem_types': ('problem_types.ProblemType',),
+    'institutions': ('institutions.Institution',),
+    'departments': ('institutions.Department',),
+}
+
+
+def resources_for_model(model):
+    label = model._meta.label
+    return [name for name, labels in RESOURCES.items() if label in labels]
+
+
+def tracked_models():
+    return {apps.get_model(label) for labels in RESOURCES.values() for label in labels}
+
+
+def current(name):
+    """Return (version, updated_at) for `name`; (0, None) if never changed."""
+    row = ResourceVersion.objects.filter(name=name).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def bump(name):
+    updated = ResourceVersion.objects.filter(name=name).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ResourceVersion.objects.create(name=name, version=1)
+        except IntegrityError:
+            # Created concurrently; count this write on the existing row.
+            ResourceVersion.objects.filter(name=name).update(
+                version=F('version') + 1, updated_at=timezone.now()
+            )
+
+
+def bump_for_model(model):
+    from . import refdata
+
+    for name in resources_for_model(model):
+        bump(name)
+        refdata.invalidate_on_change(name)
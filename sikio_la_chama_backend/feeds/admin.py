@@ -1,11 +1,11 @@
 # feeds/admin.py
 from django.contrib import admin
-from .models import Feed, FeedReaction
+from .models import Feed, FeedReaction, FeedMediaJob
 
 @admin.register(Feed)
 class FeedAdmin(admin.ModelAdmin):
-    list_display = ['description', 'posted_by', 'impressions', 'created_at']
-    list_filter = ['created_at', 'posted_by']
+    list_display = ['description', 'posted_by', 'status', 'impressions', 'created_at']
+    list_filter = ['status', 'created_at', 'posted_by']
     search_fields = ['description', 'posted_by__username']
     readonly_fields = ['impressions', 'created_at']
 
@@ -24,4 +24,9 @@ class FeedReactionAdmin(admin.ModelAdmin):
     get_device_id.admin_order_field = 'device_id'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('feed', 'user')
\ No newline at end of file
+        return super().get_queryset(request).select_related('feed', 'user')
+
+@admin.register(FeedMediaJob)
+class FeedMediaJobAdmin(admin.ModelAdmin):
+    list_display = ['feed', 'original_name', 'uploaded_bytes', 'attempts', 'claimed_at', 'created_at']
+    readonly_fields = ['upload_id', 'uploaded_bytes', 'public_id', 'last_error']
@@ -0,0 +1,31 @@
+"""Move `viewed` reactions of old feeds to `FeedReactionArchive`.
+
+Every feed listing records a `viewed` row per user and feed, so they are
+most of `FeedReaction`. Once a feed is older than FEED_VIEW_ARCHIVE_AFTER
+its view rows are only history. They still count: the feed list skips
+users with an archived view when recording impressions, and reaction
+totals (feed list, admin analytics) add the archived rows back in.
+Real reactions are never archived.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from sikio_la_chama_backend import archival
+
+from .models import FeedReaction, FeedReactionArchive
+
+DEFAULT_VIEW_ARCHIVE_AFTER = 30 * 24 * 60 * 60
+
+
+def archive_cutoff(now=None):
+    """`viewed` rows of feeds created before this are archived."""
+    return (now or timezone.now()) - timedelta(
+        seconds=getattr(settings, 'FEED_VIEW_ARCHIVE_AFTER', DEFAULT_VIEW_ARCHIVE_AFTER)
+    )
+
+
+def archive_old_views(now=None, batch_size=None):
+    old = FeedReaction.objects.filter(reaction_type='viewed', feed__created_at__lt=archive_cutoff(now))
+    return archival.move_rows(old, FeedReactionArchive, batch_size)
@@ -0,0 +1,67 @@
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+
+from feeds import media, video_probe
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare header-only duration probing with the previous upload path "
+        "(copy the upload to a temp file, then run ffprobe) on sample videos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Video files to probe.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per file and method.')
+        parser.add_argument('--ffprobe', default='ffprobe', help='ffprobe executable for the legacy path.')
+
+    def handle(self, *args, **options):
+        if shutil.which(options['ffprobe']) is None:
+            self.stderr.write(f"{options['ffprobe']} not found; only the header parser will be timed.")
+            legacy = None
+        else:
+            legacy = lambda upload: self._legacy_probe(upload, options['ffprobe'])
+
+        for path in options['files']:
+            if not os.path.isfile(path):
+                raise CommandError(f"{path} is not a file")
+            with open(path, 'rb') as f:
+                upload = SimpleUploadedFile(os.path.basename(path), f.read())
+
+            rows = [('header (upload buffer)', video_probe.upload_duration, upload)]
+            rows.append(('header (mmap)', video_probe.file_duration, path))
+            if legacy:
+                rows.append(('temp copy + ffprobe', legacy, upload))
+
+            self.stdout.write(f"{path} ({os.path.getsize(path)} bytes)")
+            for label, func, arg in rows:
+                duration, timings = self._time(func, arg, options['repeat'])
+                shown = f"{duration:.3f}s" if duration is not None else 'unknown'
+                self.stdout.write(
+                    f"  {label:<24} duration={shown:<10} "
+                    f"median={statistics.median(timings) * 1000:.3f}ms "
+                    f"max={max(timings) * 1000:.3f}ms"
+                )
+
+    def _time(self, func, arg, repeat):
+        timings = []
+        result = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            result = func(arg)
+            timings.append(time.perf_counter() - start)
+        return result, timings
+
+    def _legacy_probe(self, upload, ffprobe):
+        upload.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(upload.name)[1]) as tmp:
+            for chunk in upload.chunks():
+                tmp.write(chunk)
+            tmp.flush()
+            return media.ffprobe_duration(tmp.name, executable=ffprobe)
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from feeds import media
+
+
+class Command(BaseCommand):
+    help = "Process staged feed videos (probe, thumbnail, chunked upload) and publish the feeds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when no job is waiting instead of polling.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls when idle.')
+
+    def handle(self, *args, **options):
+        while True:
+            job = media.claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f"Processing video for feed {job.feed_id}")
+            media.process_job(job)
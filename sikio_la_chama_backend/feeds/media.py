@@ -0,0 +1,256 @@
+"""Off-request processing of feed videos.
+
+`FeedCreateView` only stages the upload on local disk and records a
+`FeedMediaJob`; the `process_feed_media` management command claims jobs and
+runs `process_job`, which probes the duration, optionally transcodes,
+extracts a thumbnail, uploads the video in resumable chunks and finally
+flips the feed to ``ready`` (or ``failed``).
+"""
+import logging
+import os
+import shutil
+import subprocess
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import video_probe
+from .models import Feed, FeedMediaJob
+
+logger = logging.getLogger(__name__)
+
+MAX_VIDEO_SECONDS = 180
+MAX_ATTEMPTS = 5
+# A claimed job whose worker died is picked up again after this long.
+CLAIM_TIMEOUT = timedelta(minutes=30)
+
+
+class MediaProcessingError(Exception):
+    """The video can never be processed (e.g. it is too long); don't retry."""
+
+
+def staging_dir():
+    path = getattr(settings, 'FEED_MEDIA_STAGING_DIR')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def stage_upload(uploaded_file):
+    """Move/copy an uploaded file into the staging directory and return its path."""
+    suffix = os.path.splitext(getattr(uploaded_file, 'name', '') or '')[1] or '.mp4'
+    path = os.path.join(staging_dir(), f"{uuid.uuid4().hex}{suffix}")
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        # Already on disk: a rename avoids copying up to 50 MB again.
+        shutil.move(uploaded_file.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as out:
+            for chunk in uploaded_file.chunks():
+                out.write(chunk)
+    return path
+
+
+def enqueue_video(feed, uploaded_file):
+    path = stage_upload(uploaded_file)
+    return FeedMediaJob.objects.create(
+        feed=feed, staged_path=path, original_name=getattr(uploaded_file, 'name', '') or ''
+    )
+
+
+def claim_next_job():
+    """Atomically claim the oldest unclaimed (or abandoned) job, if any."""
+    stale = timezone.now() - CLAIM_TIMEOUT
+    candidates = FeedMediaJob.objects.filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale),
+        feed__status='processing',
+    ).values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        claimed = FeedMediaJob.objects.filter(
+            Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale), id=job_id
+        ).update(claimed_at=timezone.now())
+        if claimed:
+            return FeedMediaJob.objects.select_related('feed').get(id=job_id)
+    return None
+
+
+def process_job(job):
+    feed = job.feed
+    try:
+        duration = probe_duration(job.staged_path)
+        if duration is None:
+            logger.warning("Could not determine duration of staged video for feed %s; accepting it", feed.id)
+        elif duration > MAX_VIDEO_SECONDS:
+            raise MediaProcessingError(
+                f"Video duration must be <= 3 minutes (180 seconds). Uploaded video duration: {duration:.1f} seconds"
+            )
+        path = transcode(job.staged_path) if getattr(settings, 'FEED_VIDEO_TRANSCODE', False) else job.staged_path
+        thumbnail = extract_thumbnail(path)
+        video_name = upload_video(job, path)
+    except MediaProcessingError as e:
+        logger.info("Feed %s video rejected: %s", feed.id, e)
+        _fail(job, str(e))
+        return
+    except Exception as e:
+        logger.exception("Processing video for feed %s failed", feed.id)
+        job.attempts += 1
+        job.last_error = str(e)
+        job.claimed_at = None
+        job.save(update_fields=['attempts', 'last_error', 'claimed_at'])
+        if job.attempts >= MAX_ATTEMPTS:
+            _fail(job, str(e))
+        return
+
+    if thumbnail:
+        feed.thumbnail.save(f"feed_{feed.id}.jpg", ContentFile(thumbnail), save=False)
+    with transaction.atomic():
+        feed.video = video_name
+        feed.video_duration = duration
+        feed.status = 'ready'
+        feed.save(update_fields=['video', 'video_duration', 'thumbnail', 'status'])
+        job.delete()
+    _remove_staged(job)
+    logger.info("Feed %s video processed and published", feed.id)
+
+
+def probe_duration(path):
+    """Return the video duration in seconds, or None if unknown.
+
+    MP4/MOV/WebM durations come from the container header; ffprobe is only
+    spawned for containers `video_probe` doesn't understand.
+    """
+    duration = video_probe.file_duration(path)
+    if duration is not None:
+        return duration
+    return ffprobe_duration(path)
+
+
+def ffprobe_duration(path, executable='ffprobe'):
+    cmd = [
+        executable, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=duration', '-of', 'default=noprint_wrappers=1:nokey=1', path,
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False, timeout=60)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    try:
+        return float(proc.stdout.strip().split('\n')[0])
+    except ValueError:
+        return None
+
+
+def transcode(path):
+    """Re-encode to H.264/AAC MP4 with faststart; returns the source path if ffmpeg is unavailable."""
+    out = f"{path}.transcoded.mp4"
+    if os.path.exists(out):
+        return out
+    tmp = f"{out}.part"
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error', '-i', path,
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28',
+        '-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart', '-f', 'mp4', tmp,
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except FileNotFoundError:
+        logger.warning("ffmpeg not available; uploading video without transcoding")
+        return path
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg transcode failed: {proc.stderr[-500:]!r}")
+    os.replace(tmp, out)
+    return out
+
+
+def extract_thumbnail(path):
+    """Return JPEG bytes for a frame one second in, or None without ffmpeg."""
+    cmd = [
+        'ffmpeg', '-v', 'error', '-ss', '1', '-i', path,
+        '-frames:v', '1', '-vf', 'scale=640:-2', '-f', 'image2pipe', '-vcodec', 'mjpeg', '-',
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False, timeout=60)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    return proc.stdout or None
+
+
+def upload_video(job, path):
+    """Upload the processed video and return the value to store in `Feed.video`."""
+    field = Feed._meta.get_field('video')
+    storage = field.storage
+    if type(storage).__module__.startswith('cloudinary_storage'):
+        return _upload_to_cloudinary(job, path)
+    name = field.generate_filename(job.feed, job.original_name or os.path.basename(path))
+    with open(path, 'rb') as f:
+        return storage.save(name, File(f), max_length=field.max_length)
+
+
+def _upload_to_cloudinary(job, path):
+    """Chunked upload that resumes from `job.uploaded_bytes` after a failure.
+
+    Mirrors `cloudinary.uploader.upload_large`, but persists the upload id
+    and acknowledged offset after every chunk.
+    """
+    import cloudinary.uploader
+
+    chunk_size = getattr(settings, 'FEED_VIDEO_CHUNK_SIZE', 6 * 1024 * 1024)
+    total = os.path.getsize(path)
+    if not job.upload_id:
+        job.upload_id = uuid.uuid4().hex
+        job.uploaded_bytes = 0
+        job.save(update_fields=['upload_id', 'uploaded_bytes'])
+
+    options = {
+        'resource_type': 'video',
+        'folder': getattr(settings, 'CLOUDINARY_VIDEO_FOLDER', 'feeds/videos/'),
+    }
+    result = None
+    with open(path, 'rb') as f:
+        f.seek(job.uploaded_bytes)
+        while job.uploaded_bytes < total:
+            chunk = f.read(chunk_size)
+            start = job.uploaded_bytes
+            headers = {
+                'Content-Range': f"bytes {start}-{start + len(chunk) - 1}/{total}",
+                'X-Unique-Upload-Id': job.upload_id,
+            }
+            if job.public_id:
+                options['public_id'] = job.public_id
+            result = cloudinary.uploader.upload_large_part(
+                (os.path.basename(path), chunk), http_headers=headers, **options
+            )
+            job.uploaded_bytes = start + len(chunk)
+            job.public_id = result.get('public_id') or job.public_id
+            job.save(update_fields=['uploaded_bytes', 'public_id'])
+
+    if result is None:
+        # Every chunk was acknowledged before a previous run died.
+        import cloudinary.utils
+
+        return cloudinary.utils.cloudinary_url(job.public_id, resource_type='video', secure=True)[0]
+    url = result.get('secure_url') or result.get('url')
+    if not url:
+        raise RuntimeError(f"Cloudinary response missing upload URL: {result!r}")
+    return url
+
+
+def _fail(job, error):
+    feed = job.feed
+    feed.status = 'failed'
+    feed.save(update_fields=['status'])
+    job.last_error = error
+    job.claimed_at = None
+    job.save(update_fields=['last_error', 'claimed_at'])
+    _remove_staged(job)
+
+
+def _remove_staged(job):
+    for path in (job.staged_path, f"{job.staged_path}.transcoded.mp4"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
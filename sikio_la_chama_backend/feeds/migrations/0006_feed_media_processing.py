@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0005_feed_link_feed_video_feedshare'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='feeds/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='video_duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='FeedMediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staged_path', models.CharField(max_length=500)),
+                ('original_name', models.CharField(blank=True, max_length=255)),
+                ('upload_id', models.CharField(blank=True, max_length=64)),
+                ('uploaded_bytes', models.BigIntegerField(default=0)),
+                ('public_id', models.CharField(blank=True, max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('feed', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='media_job', to='feeds.feed')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0006_feed_media_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedreaction',
+            index=models.Index(fields=['feed', 'reaction_type'], name='feedreaction_feed_type_idx'),
+        ),
+    ]
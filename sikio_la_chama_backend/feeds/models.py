@@ -3,6 +3,12 @@ from users.models import User
 from institutions.models import Institution
 
 class Feed(models.Model):
+    STATUS_CHOICES = (
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    )
+
     posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feeds')
     institution = models.ForeignKey(
         Institution,
@@ -12,10 +18,16 @@ class Feed(models.Model):
     )
     description = models.TextField()
     image = models.ImageField(upload_to='feeds/images/', null=True, blank=True)
+    # Resized WebP/JPEG copies of `image`, filled in by the imaging worker
+    image_variants = models.JSONField(default=dict, blank=True)
     # New: allow admin to attach a video to a feed
     video = models.FileField(upload_to='feeds/videos/', null=True, blank=True)
     # New: optional link that admin can include in the description
     link = models.URLField(null=True, blank=True)
+    # Filled in by the media worker once an uploaded video has been processed
+    video_duration = models.FloatField(null=True, blank=True)
+    thumbnail = models.ImageField(upload_to='feeds/thumbnails/', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ready')
     created_at = models.DateTimeField(auto_now_add=True)
     impressions = models.PositiveIntegerField(default=0)
 
@@ -26,6 +38,31 @@ class Feed(models.Model):
         return f"Feed by {self.posted_by.username} at {self.created_at}"
 
 
+class FeedMediaJob(models.Model):
+    """Pending video processing for a feed, worked off by `process_feed_media`.
+
+    The upload is staged on local disk during the request; the worker probes,
+    thumbnails and uploads it in chunks. `upload_id`/`uploaded_bytes` let an
+    interrupted upload resume from the last acknowledged chunk.
+    """
+    feed = models.OneToOneField(Feed, on_delete=models.CASCADE, related_name='media_job')
+    staged_path = models.CharField(max_length=500)
+    original_name = models.CharField(max_length=255, blank=True)
+    upload_id = models.CharField(max_length=64, blank=True)
+    uploaded_bytes = models.BigIntegerField(default=0)
+    public_id = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Media job for Feed {self.feed_id} ({self.feed.status})"
+
+
 class FeedShare(models.Model):
     """Represents a user sharing a feed (can be by authenticated user or anonymous via device_id).
 
@@ -58,6 +95,18 @@ class FeedReaction(models.Model):
     class Meta:
         unique_together = ('feed', 'user')
         ordering = ['created_at']
+        # Reaction counts per feed and type (feed list, analytics)
+        indexes = [models.Index(fields=['feed', 'reaction_type'], name='feedreaction_feed_type_idx')]
 
     def __str__(self):
-        return f"{self.user.username} {self.reaction_type} on Feed {self.feed.id}"
\ No newline at end of file
+        return f"{self.user.username} {self.reaction_type} on Feed {self.feed.id}"
+
+
+class FeedReactionArchive(models.Model):
+    """`viewed` rows of feeds older than FEED_VIEW_ARCHIVE_AFTER (see feeds/archive.py)."""
+    id = models.BigIntegerField(primary_key=True)
+    feed = models.ForeignKey(Feed, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    reaction_type = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
@@ -1,13 +1,17 @@
 from rest_framework import serializers
-from .models import Feed, FeedReaction
+from .models import Feed, FeedReaction, FeedReactionArchive
 from users.serializers import UserSerializer
 from institutions.models import Institution
 from .models import FeedShare
-import tempfile
-import subprocess
-import os
-from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+from . import video_probe
+from imaging.serializers import SrcsetField
+from catalog import refdata
+from catalog.serializers import CachedPrimaryKeyRelatedField
+from .media import MAX_VIDEO_SECONDS
 import logging
+from collections import Counter
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +24,8 @@ class FeedReactionSerializer(serializers.ModelSerializer):
 
 class FeedSerializer(serializers.ModelSerializer):
     posted_by = UserSerializer(read_only=True)
-    institution = serializers.PrimaryKeyRelatedField(
+    institution = CachedPrimaryKeyRelatedField(
+        'institutions',
         queryset=Institution.objects.all(),
         allow_null=True,
         required=False
@@ -32,6 +37,7 @@ class FeedSerializer(serializers.ModelSerializer):
     # New fields
     shares = serializers.SerializerMethodField()
     share_count = serializers.SerializerMethodField()
+    image_srcset = SrcsetField('image')
 
     class Meta:
         model = Feed
@@ -42,8 +48,12 @@ class FeedSerializer(serializers.ModelSerializer):
             'institution_detail',
             'description',
             'image',
+            'image_srcset',
             'video',
             'link',
+            'thumbnail',
+            'video_duration',
+            'status',
             'created_at',
             'impressions',
             'reactions',
@@ -52,137 +62,62 @@ class FeedSerializer(serializers.ModelSerializer):
             'shares',
             'share_count',
         ]
+        read_only_fields = ['thumbnail', 'video_duration', 'status']
 
     def validate_video(self, value):
-        """Validate uploaded video file size and duration.
+        """Validate the uploaded video's size (max 50 MB) and duration (max 180 seconds).
 
-    - Max size: 50 MB
-        - Max duration: 180 seconds (3 minutes)
-
-        This will try to use ffprobe (part of ffmpeg) if available. If ffprobe
-        isn't available, it will try to use moviepy as a fallback if installed.
-        If neither is available, validation will fail with a message instructing
-        how to add ffmpeg for proper duration validation.
+        The duration is read from the MP4/MOV/WebM header in the upload
+        buffer; containers the header parser doesn't know are checked by the
+        media worker, which probes the staged file off-request.
         """
-        # Increased limit per request: 50 MB
         MAX_BYTES = 50 * 1024 * 1024
-        MAX_SECONDS = 180
-
-        # Check size
-        try:
-            size = value.size
-        except Exception:
-            size = None
 
+        size = getattr(value, 'size', None)
         if size is not None and size > MAX_BYTES:
             raise serializers.ValidationError(f"Video file size must be <= 50 MB. Uploaded file size: {size / (1024*1024):.2f} MB")
 
-        # Save uploaded file to a temporary file for duration inspection
-        tmp_path = None
-        try:
-            # If it's a TemporaryUploadedFile we can get the path directly
-            if isinstance(value, TemporaryUploadedFile) and hasattr(value, 'temporary_file_path'):
-                tmp_path = value.temporary_file_path()
-            else:
-                # Write contents to a NamedTemporaryFile
-                tmp = tempfile.NamedTemporaryFile(delete=False)
-                for chunk in value.chunks():
-                    tmp.write(chunk)
-                tmp.flush()
-                tmp_path = tmp.name
-                tmp.close()
-
-            # Try ffprobe first
-            try:
-                cmd = [
-                    'ffprobe',
-                    '-v', 'error',
-                    '-select_streams', 'v:0',
-                    '-show_entries', 'stream=duration',
-                    '-of', 'default=noprint_wrappers=1:nokey=1',
-                    tmp_path,
-                ]
-                proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False)
-                out = proc.stdout.strip()
-                duration = None
-                if out:
-                    try:
-                        duration = float(out.split('\n')[0])
-                    except Exception:
-                        duration = None
-
-            except FileNotFoundError:
-                duration = None
-
-            # Fallback to moviepy if ffprobe wasn't available or failed
-            if duration is None:
-                try:
-                    import importlib
-                    moviepy_editor = importlib.import_module('moviepy.editor')
-                    VideoFileClip = getattr(moviepy_editor, 'VideoFileClip')
-                    clip = VideoFileClip(tmp_path)
-                    duration = getattr(clip, 'duration', None)
-                    try:
-                        clip.reader.close()
-                    except Exception:
-                        pass
-                    if hasattr(clip, 'audio') and clip.audio:
-                        try:
-                            clip.audio.reader.close_proc()
-                        except Exception:
-                            pass
-                except Exception:
-                    duration = None
-
-            if duration is None:
-                # Do not block upload if ffprobe/moviepy isn't available — log and accept.
-                logger.warning(
-                    "Could not determine video duration for uploaded file; ffprobe/moviepy may not be available or the file may be unreadable. "
-                    "Skipping duration validation. To enable strict validation install ffmpeg (ffprobe) or moviepy."
-                )
-            else:
-                if duration > MAX_SECONDS:
-                    raise serializers.ValidationError(f"Video duration must be <= 3 minutes (180 seconds). Uploaded video duration: {duration:.1f} seconds")
-
-        finally:
-            # Clean up temporary file if we created one
-            try:
-                if tmp_path and os.path.exists(tmp_path) and not (isinstance(value, TemporaryUploadedFile) and hasattr(value, 'temporary_file_path')):
-                    os.remove(tmp_path)
-            except Exception:
-                pass
-
+        duration = video_probe.upload_duration(value)
+        if duration is not None and duration > MAX_VIDEO_SECONDS:
+            raise serializers.ValidationError(f"Video duration must be <= 3 minutes (180 seconds). Uploaded video duration: {duration:.1f} seconds")
         return value
 
     def get_institution_detail(self, obj):
-        if obj.institution:
-            return {
-                "id": obj.institution.id,
-                "name": obj.institution.name
-            }
-        return None
+        return refdata.detail('institutions', obj.institution_id)
+
+    # The reaction and share fields read `obj.reactions.all()` and
+    # `obj.shares.all()`, so querysets built with `with_related()` serialize
+    # in a fixed number of queries.
 
     def get_reactions(self, obj):
-        reactions = FeedReaction.objects.filter(feed=obj)
-        return FeedReactionSerializer(reactions, many=True).data
+        return FeedReactionSerializer(obj.reactions.all(), many=True).data
 
     def get_reaction_counts(self, obj):
-        return {
-            'like': obj.reactions.filter(reaction_type='like').count(),
-            'love': obj.reactions.filter(reaction_type='love').count(),
-            'cry': obj.reactions.filter(reaction_type='cry').count(),
-            'smile': obj.reactions.filter(reaction_type='smile').count(),
-        }
+        counts = Counter(reaction.reaction_type for reaction in obj.reactions.all())
+        return {reaction_type: counts[reaction_type] for reaction_type in ('like', 'love', 'cry', 'smile')}
 
     def get_total_reactions(self, obj):
-        return obj.reactions.count()
+        archived = getattr(obj, 'archived_reactions', None)
+        if archived is None:
+            archived = FeedReactionArchive.objects.filter(feed=obj).count()
+        return len(obj.reactions.all()) + archived
 
     def get_shares(self, obj):
-        shares = FeedShare.objects.filter(feed=obj)
-        return FeedShareSerializer(shares, many=True).data
+        return FeedShareSerializer(obj.shares.all(), many=True).data
 
     def get_share_count(self, obj):
-        return obj.shares.count()
+        return len(obj.shares.all())
+
+    @staticmethod
+    def with_related(queryset):
+        archived = (
+            FeedReactionArchive.objects.filter(feed=OuterRef('pk')).order_by()
+            .values('feed').annotate(count=Count('id')).values('count')
+        )
+        return queryset.select_related('posted_by__auth_token').prefetch_related(
+            Prefetch('reactions', queryset=FeedReaction.objects.select_related('user__auth_token')),
+            Prefetch('shares', queryset=FeedShare.objects.select_related('user__auth_token')),
+        ).annotate(archived_reactions=Coalesce(Subquery(archived, output_field=IntegerField()), Value(0)))
 
 
 class FeedShareSerializer(serializers.ModelSerializer):
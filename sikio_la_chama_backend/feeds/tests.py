@@ -1,3 +1,199 @@
-from django.test import TestCase
+import datetime
+import os
+import shutil
+import struct
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import User
+from feeds import media, video_probe
+from feeds.models import Feed, FeedMediaJob, FeedReaction, FeedReactionArchive
+
+
+class FeedMediaPipelineTests(TestCase):
+	def setUp(self):
+		self.staging = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.staging)
+		override = override_settings(FEED_MEDIA_STAGING_DIR=self.staging)
+		override.enable()
+		self.addCleanup(override.disable)
+		self.admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		self.client = APIClient()
+		self.client.force_authenticate(self.admin)
+
+	def _create_video_feed(self):
+		video = SimpleUploadedFile('clip.mp4', b'\x00' * 1024, content_type='video/mp4')
+		return self.client.post('/api/feeds/create/', {'description': 'Clip', 'video': video}, format='multipart')
+
+	def test_video_upload_is_staged_and_returns_processing(self):
+		resp = self._create_video_feed()
+		self.assertEqual(resp.status_code, 202)
+		self.assertEqual(resp.data['status'], 'processing')
+		job = FeedMediaJob.objects.get(feed_id=resp.data['id'])
+		self.assertTrue(os.path.exists(job.staged_path))
+		public = APIClient().get('/api/feeds/list/')
+		self.assertEqual(public.data, [])
+
+	def test_worker_publishes_feed(self):
+		feed_id = self._create_video_feed().data['id']
+		job = media.claim_next_job()
+		self.assertIsNone(media.claim_next_job())
+		with mock.patch.object(media, 'probe_duration', return_value=42.0), \
+				mock.patch.object(media, 'extract_thumbnail', return_value=None), \
+				mock.patch.object(media, 'upload_video', return_value='https://cdn.example/clip.mp4'):
+			media.process_job(job)
+		feed = Feed.objects.get(id=feed_id)
+		self.assertEqual(feed.status, 'ready')
+		self.assertEqual(feed.video.name, 'https://cdn.example/clip.mp4')
+		self.assertEqual(feed.video_duration, 42.0)
+		self.assertFalse(FeedMediaJob.objects.filter(feed_id=feed_id).exists())
+		self.assertFalse(os.path.exists(job.staged_path))
+
+	def test_worker_rejects_long_video(self):
+		feed_id = self._create_video_feed().data['id']
+		job = media.claim_next_job()
+		with mock.patch.object(media, 'probe_duration', return_value=600.0):
+			media.process_job(job)
+		self.assertEqual(Feed.objects.get(id=feed_id).status, 'failed')
+		self.assertIn('180 seconds', FeedMediaJob.objects.get(feed_id=feed_id).last_error)
+
+	def test_upload_failure_is_retried(self):
+		self._create_video_feed()
+		job = media.claim_next_job()
+		with mock.patch.object(media, 'probe_duration', return_value=10.0), \
+				mock.patch.object(media, 'extract_thumbnail', return_value=None), \
+				mock.patch.object(media, 'upload_video', side_effect=RuntimeError('network down')):
+			media.process_job(job)
+		job.refresh_from_db()
+		self.assertEqual(job.attempts, 1)
+		self.assertEqual(job.feed.status, 'processing')
+		self.assertEqual(media.claim_next_job().id, job.id)
+
+
+def _box(box_type, payload):
+	return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+
+def _mp4(seconds, timescale=1000, version=0):
+	if version == 1:
+		mvhd = bytes([1, 0, 0, 0]) + struct.pack('>QQIQ', 0, 0, timescale, int(seconds * timescale))
+	else:
+		mvhd = bytes(4) + struct.pack('>IIII', 0, 0, timescale, int(seconds * timescale))
+	moov = _box(b'moov', _box(b'mvhd', mvhd + bytes(80)))
+	# mdat before moov, as in files written without faststart
+	return _box(b'ftyp', b'isom\x00\x00\x02\x00') + _box(b'mdat', bytes(64)) + moov
+
+
+def _ebml(element_id, payload):
+	return element_id + bytes([0x80 | len(payload)]) + payload
+
+
+def _webm(seconds):
+	info = _ebml(b'\x2a\xd7\xb1', struct.pack('>I', 1000000)) + _ebml(b'\x44\x89', struct.pack('>d', seconds * 1000))
+	segment = _ebml(b'\x15\x49\xa9\x66', info)
+	# Segment with an "unknown" size, as live-muxed WebM files have
+	return _ebml(b'\x1a\x45\xdf\xa3', b'\x42\x82\x84webm') + b'\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff' + segment
+
+
+class VideoProbeTests(TestCase):
+	def test_mp4_duration_from_mvhd(self):
+		self.assertAlmostEqual(video_probe.duration_from_buffer(_mp4(12.5)), 12.5)
+		self.assertAlmostEqual(video_probe.duration_from_buffer(_mp4(200, timescale=90000, version=1)), 200)
+
+	def test_fragmented_mp4_uses_mehd(self):
+		mvhd = _box(b'mvhd', bytes(4) + struct.pack('>IIII', 0, 0, 1000, 0) + bytes(80))
+		mehd = _box(b'mehd', bytes(4) + struct.pack('>I', 30000))
+		data = _box(b'ftyp', b'iso6') + _box(b'moov', mvhd + _box(b'mvex', mehd))
+		self.assertAlmostEqual(video_probe.duration_from_buffer(data), 30.0)
+
+	def test_webm_duration_from_segment_info(self):
+		self.assertAlmostEqual(video_probe.duration_from_buffer(_webm(61.25)), 61.25)
+
+	def test_unknown_or_truncated_container(self):
+		self.assertIsNone(video_probe.duration_from_buffer(b'RIFF\x00\x00\x00\x00AVI LIST'))
+		self.assertIsNone(video_probe.duration_from_buffer(_mp4(10)[:-95]))
+		self.assertIsNone(video_probe.duration_from_buffer(b''))
+
+	def test_probe_duration_falls_back_to_ffprobe_only_for_unknown_containers(self):
+		with tempfile.NamedTemporaryFile(suffix='.mp4') as f:
+			f.write(_mp4(42))
+			f.flush()
+			with mock.patch.object(media, 'ffprobe_duration') as ffprobe:
+				self.assertAlmostEqual(media.probe_duration(f.name), 42)
+			ffprobe.assert_not_called()
+		with tempfile.NamedTemporaryFile(suffix='.avi') as f:
+			f.write(b'RIFF' + bytes(64))
+			f.flush()
+			with mock.patch.object(media, 'ffprobe_duration', return_value=7.0) as ffprobe:
+				self.assertEqual(media.probe_duration(f.name), 7.0)
+			ffprobe.assert_called_once_with(f.name)
+
+	def test_long_video_rejected_at_upload(self):
+		admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		client = APIClient()
+		client.force_authenticate(admin)
+		video = SimpleUploadedFile('long.mp4', _mp4(600), content_type='video/mp4')
+		resp = client.post('/api/feeds/create/', {'description': 'Long', 'video': video}, format='multipart')
+		self.assertEqual(resp.status_code, 400)
+		self.assertIn('180 seconds', str(resp.data['errors']['video']))
+		self.assertFalse(Feed.objects.exists())
+
+
+@override_settings(FEED_VIEW_ARCHIVE_AFTER=30 * 24 * 60 * 60)
+class FeedViewArchiveTests(TestCase):
+	def setUp(self):
+		admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		self.viewer = User.objects.create_user(username='viewer', password='pass', device_id='dev-1')
+		self.old_feed = Feed.objects.create(posted_by=admin, description='Old')
+		Feed.objects.filter(pk=self.old_feed.pk).update(created_at=timezone.now() - datetime.timedelta(days=31))
+		self.new_feed = Feed.objects.create(posted_by=admin, description='New')
+
+	def _list(self):
+		return APIClient().get('/api/feeds/list/', HTTP_DEVICE_ID='dev-1')
+
+	def test_moves_views_of_old_feeds_in_batches(self):
+		others = User.objects.bulk_create([User(username=f'user{i}') for i in range(5)])
+		FeedReaction.objects.bulk_create(
+			[FeedReaction(feed=feed, user=user, reaction_type='viewed') for feed in (self.old_feed, self.new_feed) for user in others]
+		)
+		like = FeedReaction.objects.create(feed=self.old_feed, user=self.viewer, reaction_type='like')
+
+		out = StringIO()
+		call_command('archive_feed_views', batch_size=2, stdout=out)
+
+		self.assertIn('Archived 5 feed views', out.getvalue())
+		self.assertEqual(FeedReactionArchive.objects.filter(feed=self.old_feed, reaction_type='viewed').count(), 5)
+		self.assertFalse(FeedReaction.objects.filter(feed=self.old_feed, reaction_type='viewed').exists())
+		self.assertEqual(FeedReaction.objects.filter(feed=self.new_feed).count(), 5)
+		self.assertTrue(FeedReaction.objects.filter(pk=like.pk).exists())
+
+	def test_reaction_replaces_archived_view(self):
+		self._list()
+		call_command('archive_feed_views', stdout=StringIO())
+
+		resp = APIClient().post(f'/api/feeds/{self.old_feed.pk}/react/', {'reaction_type': 'like'}, HTTP_DEVICE_ID='dev-1')
+		self.assertEqual(resp.status_code, 201, resp.data)
+
+		self.assertFalse(FeedReactionArchive.objects.exists())
+		totals = {feed['id']: feed['total_reactions'] for feed in self._list().data}
+		self.assertEqual(totals[self.old_feed.pk], 1)
+
+	def test_archived_views_still_count(self):
+		self.assertEqual(self._list().status_code, 200)
+		call_command('archive_feed_views', stdout=StringIO())
+		self.assertEqual(FeedReactionArchive.objects.get().feed, self.old_feed)
+
+		response = self._list()
+
+		self.old_feed.refresh_from_db()
+		self.new_feed.refresh_from_db()
+		self.assertEqual((self.old_feed.impressions, self.new_feed.impressions), (1, 1))
+		self.assertFalse(FeedReaction.objects.filter(feed=self.old_feed).exists())
+		totals = {feed['id']: feed['total_reactions'] for feed in response.data}
+		self.assertEqual(totals, {self.old_feed.pk: 1, self.new_feed.pk: 1})
@@ -0,0 +1,194 @@
+"""Header-only video duration probing for MP4/MOV and WebM/Matroska.
+
+Durations are read straight from the container metadata (``moov/mvhd``,
+``moov/mvex/mehd`` or the EBML ``Segment/Info`` element) through a
+``memoryview`` over the upload buffer or an mmap of the file, so no temp
+copy or subprocess is needed. `None` means the container is unknown or
+carries no duration; callers fall back to ffprobe in that case.
+"""
+import mmap
+import struct
+
+EBML_MAGIC = b'\x1a\x45\xdf\xa3'
+# Top-level ISO BMFF / QuickTime box types we accept as a container signature.
+MP4_TOP_LEVEL = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot', b'uuid'}
+
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_CLUSTER = 0x1F43B675
+
+
+def upload_duration(uploaded_file):
+    """Duration in seconds of a Django uploaded file, or None if unknown."""
+    f = getattr(uploaded_file, 'file', uploaded_file)
+    if hasattr(f, 'getbuffer'):
+        # InMemoryUploadedFile wraps a BytesIO: view its buffer without copying.
+        view = f.getbuffer()
+        try:
+            return duration_from_buffer(view)
+        finally:
+            view.release()
+    path = getattr(uploaded_file, 'temporary_file_path', None)
+    if path:
+        return file_duration(path())
+    pos = f.tell()
+    try:
+        f.seek(0)
+        return duration_from_buffer(f.read())
+    finally:
+        f.seek(pos)
+
+
+def file_duration(path):
+    """Duration in seconds of the file at `path`, reading only the pages touched."""
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+        with mapped:
+            view = memoryview(mapped)
+            try:
+                return duration_from_buffer(view)
+            finally:
+                view.release()
+
+
+def duration_from_buffer(buf):
+    view = memoryview(buf)
+    try:
+        if bytes(view[:4]) == EBML_MAGIC:
+            return _ebml_duration(view)
+        if len(view) >= 8 and bytes(view[4:8]) in MP4_TOP_LEVEL:
+            return _mp4_duration(view)
+        return None
+    except (struct.error, IndexError, ValueError):
+        return None
+    finally:
+        view.release()
+
+
+# --- ISO BMFF (MP4/MOV) ---
+
+def _boxes(view, start, end):
+    """Yield (type, payload_start, box_end) for the boxes in view[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        size, = struct.unpack_from('>I', view, pos)
+        box_type = bytes(view[pos + 4:pos + 8])
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', view, pos + 8)
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield box_type, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _mp4_duration(view):
+    for box_type, start, end in _boxes(view, 0, len(view)):
+        if box_type != b'moov':
+            continue
+        duration = None
+        for child, c_start, c_end in _boxes(view, start, end):
+            if child == b'mvhd':
+                duration = _mvhd_duration(view, c_start)
+            elif child == b'mvex' and not duration:
+                # Fragmented MP4: mvhd is often 0, the real length lives in mehd.
+                timescale = _mvhd_timescale(view, start, end)
+                for grandchild, g_start, _ in _boxes(view, c_start, c_end):
+                    if grandchild == b'mehd' and timescale:
+                        version = view[g_start]
+                        fmt = '>Q' if version == 1 else '>I'
+                        fragment, = struct.unpack_from(fmt, view, g_start + 4)
+                        duration = fragment / timescale or None
+        return duration
+    return None
+
+
+def _mvhd_fields(view, start):
+    version = view[start]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', view, start + 4 + 16)
+        unknown = duration == 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack_from('>II', view, start + 4 + 8)
+        unknown = duration == 0xFFFFFFFF
+    return timescale, (None if unknown else duration)
+
+
+def _mvhd_duration(view, start):
+    timescale, duration = _mvhd_fields(view, start)
+    if not timescale or not duration:
+        return None
+    return duration / timescale
+
+
+def _mvhd_timescale(view, moov_start, moov_end):
+    for box_type, start, _ in _boxes(view, moov_start, moov_end):
+        if box_type == b'mvhd':
+            return _mvhd_fields(view, start)[0]
+    return None
+
+
+# --- EBML (WebM/Matroska) ---
+
+def _vint(view, pos, strip_marker):
+    """Read an EBML variable-length integer; return (value, length, all_ones)."""
+    first = view[pos]
+    if first == 0:
+        raise ValueError("invalid EBML vint")
+    length = 1
+    mask = 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+    value = first & (mask - 1) if strip_marker else first
+    for i in range(1, length):
+        value = (value << 8) | view[pos + i]
+    all_ones = strip_marker and value == (1 << (7 * length)) - 1
+    return value, length, all_ones
+
+
+def _elements(view, start, end):
+    """Yield (id, data_start, data_end) for EBML elements in view[start:end]."""
+    pos = start
+    while pos < end:
+        element_id, id_len, _ = _vint(view, pos, strip_marker=False)
+        size, size_len, unknown = _vint(view, pos + id_len, strip_marker=True)
+        data_start = pos + id_len + size_len
+        data_end = end if unknown else min(data_start + size, end)
+        yield element_id, data_start, data_end
+        if unknown:
+            return
+        pos = data_end
+
+
+def _ebml_duration(view):
+    for element_id, start, end in _elements(view, 0, len(view)):
+        if element_id != EBML_SEGMENT:
+            continue
+        for child, c_start, c_end in _elements(view, start, end):
+            if child == EBML_CLUSTER:
+                # Info precedes the media data in practice; stop scanning here.
+                return None
+            if child != EBML_INFO:
+                continue
+            scale = 1000000
+            duration = None
+            for field, f_start, f_end in _elements(view, c_start, c_end):
+                if field == EBML_TIMECODE_SCALE:
+                    scale = int.from_bytes(view[f_start:f_end], 'big')
+                elif field == EBML_DURATION:
+                    fmt = '>d' if f_end - f_start == 8 else '>f'
+                    duration, = struct.unpack_from(fmt, view, f_start)
+            if duration is None or duration <= 0:
+                return None
+            return duration * scale / 1e9
+        return None
+    return None
@@ -4,101 +4,62 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Feed, FeedReaction
+from .models import Feed, FeedReaction, FeedReactionArchive
 from .serializers import FeedSerializer, FeedReactionSerializer
 from users.models import User
 from .serializers import FeedShareSerializer
 from .models import FeedShare
-import cloudinary.uploader
-from django.conf import settings
-import tempfile
-import os
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from . import media
+from uploads import staging
 
 logger = logging.getLogger(__name__)
 
 class FeedCreateView(APIView):
+    """Create a feed. Videos are staged and processed by the media worker.
+
+    A feed with a video is returned immediately with status ``processing``
+    (HTTP 202); `python manage.py process_feed_media` probes, thumbnails and
+    uploads the video and then flips the feed to ``ready``. Instead of a
+    multipart ``video`` the client may send ``upload_id`` of a completed
+    chunked upload (see `uploads`).
+    """
     permission_classes = [IsAdminUser]
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request):
-        logger.debug(f"User {request.user} creating feed with data: {request.data}")
-        serializer = FeedSerializer(data=request.data)
+        logger.debug("User %s creating feed with fields: %s", request.user, list(request.data))
+        try:
+            data, staged = staging.with_staged_file(request, 'video')
+        except staging.ChunkError as e:
+            return Response({"errors": {"upload_id": str(e)}}, status=e.status)
+        serializer = FeedSerializer(data=data)
         if not serializer.is_valid():
-            logger.error(f"Feed creation failed validation: {serializer.errors}")
+            logger.error("Feed creation failed validation: %s", serializer.errors)
+            if staged:
+                staged.close()
             return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Try normal save first (this uses the model storage configured)
+        video_file = serializer.validated_data.pop('video', None)
         try:
-            feed = serializer.save(posted_by=request.user)
-            logger.info(f"Feed {feed.id} created by {request.user.username}")
-            return Response(FeedSerializer(feed).data, status=status.HTTP_201_CREATED)
+            with transaction.atomic():
+                feed = serializer.save(posted_by=request.user, status='processing' if video_file else 'ready')
+                if video_file:
+                    media.enqueue_video(feed, video_file)
         except Exception as e:
-            # Log the exception with traceback to capture cloudinary_storage errors
-            logger.exception("Feed.save() failed — attempting Cloudinary fallback if video present")
-
-            # If there's a video file in the request, attempt a direct upload via Cloudinary
-            video_file = request.FILES.get('video')
-            if video_file:
-                tmp_path = None
-                try:
-                    logger.debug("Preparing temporary file for Cloudinary upload")
-                    # Write the uploaded file to a temporary file so Cloudinary
-                    # receives a fresh file stream (prevents Empty file errors).
-                    suffix = os.path.splitext(getattr(video_file, 'name', ''))[1] or '.mp4'
-                    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-                    try:
-                        for chunk in video_file.chunks():
-                            tmp.write(chunk)
-                        tmp.flush()
-                    finally:
-                        tmp.close()
-                    tmp_path = tmp.name
-
-                    v_size = os.path.getsize(tmp_path) if tmp_path and os.path.exists(tmp_path) else None
-                    v_name = getattr(video_file, 'name', None)
-                    logger.debug("Video temp file written: %s (original name=%s size=%s)", tmp_path, v_name, v_size)
-
-                    upload_opts = {
-                        'resource_type': 'video',
-                        'folder': getattr(settings, 'CLOUDINARY_VIDEO_FOLDER', 'feeds/videos/'),
-                    }
-
-                    # Use upload_large for filesystem paths (reliable for big files)
-                    logger.debug("Uploading temp file to Cloudinary via upload_large: %s", tmp_path)
-                    result = cloudinary.uploader.upload_large(tmp_path, **upload_opts)
-
-                    if not result or not isinstance(result, dict):
-                        logger.error("Cloudinary returned empty or invalid response for video upload: %r", result)
-                        raise RuntimeError("Empty or invalid response from Cloudinary")
-
-                    logger.info("Cloudinary upload result keys: %s", list(result.keys()))
-                    video_url = result.get('secure_url') or result.get('url')
-                    if not video_url:
-                        logger.error("Cloudinary response missing URL: %r", result)
-                        raise RuntimeError("Cloudinary response missing upload URL")
-
-                    feed = Feed.objects.create(
-                        posted_by=request.user,
-                        institution=serializer.validated_data.get('institution'),
-                        description=serializer.validated_data.get('description'),
-                        link=serializer.validated_data.get('link'),
-                        video=video_url,
-                    )
-                    logger.info(f"Feed {feed.id} created with video uploaded directly to Cloudinary by {request.user.username}")
-                    return Response(FeedSerializer(feed).data, status=status.HTTP_201_CREATED)
-                except Exception as e2:
-                    logger.exception("Direct Cloudinary video upload failed — returning error to client")
-                    return Response({"errors": {"video": "Cloudinary video upload failed", "details": str(e2)}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                finally:
-                    try:
-                        if tmp_path and os.path.exists(tmp_path):
-                            os.remove(tmp_path)
-                            logger.debug("Removed temporary file %s", tmp_path)
-                    except Exception:
-                        logger.exception("Failed to remove temporary upload file %s", tmp_path)
-
-            # No video fallback available — return original error
+            logger.exception("Feed creation failed")
+            if staged:
+                staged.close()
             return Response({"errors": {"server": str(e)}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if staged:
+            staging.finish(staged)
+
+        if video_file:
+            logger.info("Feed %s created by %s; video queued for processing", feed.id, request.user.username)
+            return Response(FeedSerializer(feed).data, status=status.HTTP_202_ACCEPTED)
+        logger.info("Feed %s created by %s", feed.id, request.user.username)
+        return Response(FeedSerializer(feed).data, status=status.HTTP_201_CREATED)
 
 class FeedListView(APIView):
     permission_classes = [AllowAny]
@@ -106,6 +67,9 @@ class FeedListView(APIView):
     def get(self, request):
         device_id = request.query_params.get('device_id') or request.META.get('HTTP_DEVICE_ID')
         feeds = Feed.objects.all().order_by('-created_at')
+        if not request.user.is_staff:
+            # Feeds whose video is still being processed (or failed) stay hidden
+            feeds = feeds.filter(status='ready')
 
         # Increment impressions for authenticated or anonymous users
         if request.user.is_authenticated:
@@ -114,28 +78,35 @@ class FeedListView(APIView):
             if not device_id:
                 logger.warning("Missing device_id in FeedListView")
             else:
-                user = User.objects.filter(device_id=device_id).first()
+                # Looked up on the primary, like the unseen feeds below: a lagging
+                # replica would miss a just-registered device or its `viewed` rows
+                # and count the impression twice.
+                user = User.objects.using(DEFAULT_DB_ALIAS).filter(device_id=device_id).first()
                 if not user:
-                    logger.info(f"No user found for device_id: {device_id}")
+                    logger.info("No user found for device_id: %s", device_id)
                 else:
-                    # Increment impressions only for feeds with no reactions from this user
-                    feeds_to_update = feeds.exclude(reactions__user=user)
-                    for feed in feeds_to_update:
-                        feed.impressions += 1
-                        feed.save()
-                        FeedReaction.objects.create(
-                            feed=feed,
-                            user=user,
-                            reaction_type='viewed'
-                        )
-                    logger.debug(f"Updated impressions for {feeds_to_update.count()} feeds for user {user.username}")
+                    # Increment impressions only for feeds with no reactions from this user,
+                    # archived views included (see feeds/archive.py)
+                    unseen_ids = list(
+                        feeds.using(DEFAULT_DB_ALIAS).exclude(reactions__user=user)
+                        .exclude(id__in=FeedReactionArchive.objects.filter(user=user).values('feed_id'))
+                        .values_list('id', flat=True)
+                    )
+                    if unseen_ids:
+                        with transaction.atomic():
+                            Feed.objects.filter(id__in=unseen_ids).update(impressions=F('impressions') + 1)
+                            FeedReaction.objects.bulk_create(
+                                [FeedReaction(feed_id=feed_id, user=user, reaction_type='viewed') for feed_id in unseen_ids],
+                                ignore_conflicts=True,
+                            )
+                    logger.debug("Updated impressions for %s feeds for user %s", len(unseen_ids), user.username)
 
         institution_id = request.query_params.get('institution')
         if institution_id:
             feeds = feeds.filter(institution__id=institution_id)
 
-        serializer = FeedSerializer(feeds, many=True)
-        logger.debug(f"Returning {len(serializer.data)} feeds")
+        serializer = FeedSerializer(FeedSerializer.with_related(feeds), many=True)
+        logger.debug("Returning %s feeds", len(serializer.data))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class FeedReactionView(APIView):
@@ -145,7 +116,7 @@ class FeedReactionView(APIView):
         try:
             feed = Feed.objects.get(id=feed_id)
         except Feed.DoesNotExist:
-            logger.error(f"Feed {feed_id} not found")
+            logger.error("Feed %s not found", feed_id)
             return Response({"errors": {"feed": "Feed not found"}}, status=status.HTTP_404_NOT_FOUND)
 
         device_id = request.data.get('device_id') or request.META.get('HTTP_DEVICE_ID')
@@ -162,23 +133,26 @@ class FeedReactionView(APIView):
                     username=f"anon_{device_id[:8]}",
                     user_type="anonymous"
                 )
-                logger.info(f"Created anonymous user for device_id: {device_id}")
+                logger.info("Created anonymous user for device_id: %s", device_id)
 
         reaction_type = request.data.get('reaction_type')
         if reaction_type not in ['like', 'love', 'cry', 'smile']:
-            logger.warning(f"Invalid reaction_type {reaction_type} for feed {feed_id}")
+            logger.warning("Invalid reaction_type %s for feed %s", reaction_type, feed_id)
             return Response({"errors": {"reaction_type": "Invalid reaction type"}}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Remove all existing reactions for this user on this feed
-        FeedReaction.objects.filter(feed=feed, user=user).delete()
-
-        # Create new reaction
-        reaction = FeedReaction.objects.create(
-            feed=feed,
-            user=user,
-            reaction_type=reaction_type
-        )
-        logger.info(f"Reaction {reaction_type} added by {user.username} to feed {feed_id}")
+        with transaction.atomic():
+            # Remove all existing reactions for this user on this feed, including
+            # an archived view (feeds/archive.py), which would otherwise count too
+            FeedReaction.objects.filter(feed=feed, user=user).delete()
+            FeedReactionArchive.objects.filter(feed=feed, user=user).delete()
+
+            # Create new reaction
+            reaction = FeedReaction.objects.create(
+                feed=feed,
+                user=user,
+                reaction_type=reaction_type
+            )
+        logger.info("Reaction %s added by %s to feed %s", reaction_type, user.username, feed_id)
         return Response(FeedReactionSerializer(reaction).data, status=status.HTTP_201_CREATED)
 
 
@@ -193,7 +167,7 @@ class FeedShareView(APIView):
         try:
             feed = Feed.objects.get(id=feed_id)
         except Feed.DoesNotExist:
-            logger.error(f"Feed {feed_id} not found for sharing")
+            logger.error("Feed %s not found for sharing", feed_id)
             return Response({"errors": {"feed": "Feed not found"}}, status=status.HTTP_404_NOT_FOUND)
 
         device_id = request.data.get('device_id') or request.META.get('HTTP_DEVICE_ID')
@@ -210,7 +184,7 @@ class FeedShareView(APIView):
                     username=f"anon_{device_id[:8]}",
                     user_type="anonymous"
                 )
-                logger.info(f"Created anonymous user for device_id: {device_id}")
+                logger.info("Created anonymous user for device_id: %s", device_id)
 
         message = request.data.get('message')
 
@@ -219,19 +193,19 @@ class FeedShareView(APIView):
             user=user,
             message=message
         )
-        logger.info(f"Feed {feed_id} shared by {user.username}")
+        logger.info("Feed %s shared by %s", feed_id, user.username)
         return Response(FeedShareSerializer(share).data, status=status.HTTP_201_CREATED)
 
 class FeedDeleteView(APIView):
     permission_classes = [IsAdminUser]
 
     def delete(self, request, feed_id):
-        logger.debug(f"User {request.user} attempting to delete feed {feed_id}")
+        logger.debug("User %s attempting to delete feed %s", request.user, feed_id)
         try:
             feed = Feed.objects.get(id=feed_id)
             feed.delete()
-            logger.info(f"Feed {feed_id} deleted by {request.user}")
+            logger.info("Feed %s deleted by %s", feed_id, request.user)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Feed.DoesNotExist:
-            logger.error(f"Feed {feed_id} not found")
+            logger.error("Feed %s not found", feed_id)
             return Response({"errors": {"feed": "Feed not found"}}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:30
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    apps.get_model('ilani', 'Ilani').objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ilani', '0002_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ilani',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -6,7 +6,11 @@ class Ilani(models.Model):
     description = models.TextField(blank=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='ilani/', null=True, blank=True)
+    # Resized WebP/JPEG copies of `image`, filled in by the imaging worker
+    image_variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # `?since=` delta sync reads this (see catalog/sync.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
@@ -1,7 +1,18 @@
 from rest_framework import serializers
+from imaging.serializers import SrcsetField
 from .models import Ilani
 
 class IlaniSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField('image')
+
     class Meta:
         model = Ilani
-        fields = '__all__'
+        fields = ['id', 'title', 'description', 'user', 'image', 'image_srcset', 'created_at', 'updated_at']
+
+
+class IlaniListSerializer(IlaniSerializer):
+    """Compact row for paginated/delta listings: no description or poster."""
+
+    class Meta(IlaniSerializer.Meta):
+        fields = ['id', 'title', 'image', 'image_srcset', 'created_at', 'updated_at']
+
@@ -3,11 +3,16 @@ from django.shortcuts import render
 # Create your views here.
 from rest_framework import viewsets, permissions
 from .models import Ilani
-from .serializers import IlaniSerializer
+from .serializers import IlaniSerializer, IlaniListSerializer
+from catalog.conditional import ConditionalGetMixin
+from catalog.sync import DeltaSyncMixin
 
-class IlaniViewSet(viewsets.ModelViewSet):
+class IlaniViewSet(ConditionalGetMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Ilani.objects.all().order_by('-created_at')
     serializer_class = IlaniSerializer
+    list_serializer_class = IlaniListSerializer
+    sync_resource = 'ilani'
+    conditional_resources = ('ilani',)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import ImageDerivativeJob
+
+
+@admin.register(ImageDerivativeJob)
+class ImageDerivativeJobAdmin(admin.ModelAdmin):
+    list_display = ['content_type', 'object_id', 'field_name', 'attempts', 'claimed_at', 'created_at']
+    list_filter = ['content_type']
+    readonly_fields = ['source_name', 'last_error']
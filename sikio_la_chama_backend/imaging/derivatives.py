@@ -0,0 +1,212 @@
+"""Responsive derivatives (WebP/JPEG at fixed widths) for uploaded images.
+
+Saving one of the `IMAGE_FIELDS` queues an `ImageDerivativeJob`; the
+`process_image_derivatives` management command renders the derivatives with
+Pillow, stores them next to the original and records their URLs on the
+model's ``<field>_variants`` JSON field. Serializers expose them via
+`imaging.serializers.SrcsetField`; until a job has run (or if the image has
+changed since) the field is null and clients use the original.
+"""
+import io
+import logging
+import os
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from catalog import versions
+
+from .models import ImageDerivativeJob
+
+logger = logging.getLogger(__name__)
+
+# (model label, image field); derivative URLs live on `<field>_variants`.
+IMAGE_FIELDS = (
+    ('feeds.Feed', 'image'),
+    ('ilani.Ilani', 'image'),
+    ('leaders.Leader', 'picture'),
+    ('reports.Report', 'image'),
+)
+
+DEFAULT_WIDTHS = (320, 640, 1080)
+DEFAULT_FORMATS = ('webp', 'jpeg')
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+QUALITY = {'webp': 80, 'jpeg': 82}
+MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class UnusableImage(Exception):
+    """The source can never be rendered (not an image, corrupt); don't retry."""
+
+
+def variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def formats():
+    return tuple(getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', DEFAULT_FORMATS))
+
+
+def registered_fields():
+    for label, field_name in IMAGE_FIELDS:
+        yield apps.get_model(label), field_name
+
+
+def needs_derivatives(instance, field_name):
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return False
+    current = getattr(instance, variants_field(field_name)) or {}
+    return current.get('source') != field_file.name
+
+
+def enqueue(instance, field_name):
+    """Queue (or re-queue) derivative generation for `instance.<field_name>`."""
+    job, _ = ImageDerivativeJob.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        field_name=field_name,
+        defaults={
+            'source_name': getattr(instance, field_name).name,
+            'attempts': 0,
+            'last_error': '',
+            'claimed_at': None,
+        },
+    )
+    return job
+
+
+def claim_next_job():
+    """Atomically claim the oldest unclaimed (or abandoned) job, if any."""
+    stale = timezone.now() - CLAIM_TIMEOUT
+    unclaimed = Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale)
+    candidates = ImageDerivativeJob.objects.filter(
+        unclaimed, attempts__lt=MAX_ATTEMPTS
+    ).values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        if ImageDerivativeJob.objects.filter(unclaimed, id=job_id).update(claimed_at=timezone.now()):
+            return ImageDerivativeJob.objects.select_related('content_type').get(id=job_id)
+    return None
+
+
+def process_job(job):
+    model = job.content_type.model_class()
+    instance = model._default_manager.filter(pk=job.object_id).first()
+    field_file = getattr(instance, job.field_name, None) if instance is not None else None
+    if not field_file or field_file.name != job.source_name:
+        # Deleted, cleared or replaced; a replacement re-queued this row with
+        # the new source_name, which the filter leaves alone.
+        ImageDerivativeJob.objects.filter(pk=job.pk, source_name=job.source_name).delete()
+        return
+
+    try:
+        variants, names = build_variants(field_file)
+    except UnusableImage as e:
+        logger.info("Skipping derivatives for %s: %s", job, e)
+        job.attempts = MAX_ATTEMPTS
+        job.last_error = str(e)
+        job.save(update_fields=['attempts', 'last_error'])
+        return
+    except Exception as e:
+        logger.exception("Rendering derivatives for %s failed", job)
+        job.attempts += 1
+        job.last_error = str(e)
+        job.claimed_at = None
+        job.save(update_fields=['attempts', 'last_error', 'claimed_at'])
+        return
+
+    changes = {variants_field(job.field_name): variants}
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        # update() skips auto_now; delta-syncing clients need to see the srcset
+        changes['updated_at'] = timezone.now()
+    with transaction.atomic():
+        # Only attach the derivatives if the image is still the one rendered.
+        updated = model._default_manager.filter(
+            pk=job.object_id, **{job.field_name: job.source_name}
+        ).update(**changes)
+        ImageDerivativeJob.objects.filter(pk=job.pk, source_name=job.source_name).delete()
+    if not updated:
+        for name in names:
+            field_file.storage.delete(name)
+        logger.info("Image for %s changed while rendering; derivatives discarded", job)
+        return
+    # queryset.update() sends no post_save: tell cached catalog responses.
+    versions.bump_for_model(model)
+    logger.info("Derivatives for %s stored", job)
+
+
+def build_variants(field_file):
+    """Render and store derivatives.
+
+    Returns the ``<field>_variants`` value and the stored file names.
+    """
+    storage = field_file.storage
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+    variants = {'source': field_file.name}
+    names = []
+    with field_file.open('rb') as source:
+        rendered = render(source.read(), widths(), formats())
+    for fmt, width, data in rendered:
+        name = storage.save(f"{directory}/derivatives/{stem}_{width}.{fmt}", ContentFile(data))
+        names.append(name)
+        variants.setdefault(fmt, []).append([width, storage.url(name)])
+    return variants, names
+
+
+def render(data, target_widths, target_formats):
+    """Return [(format, width, bytes)] for each width not wider than the source.
+
+    A source narrower than the smallest width yields one derivative at its
+    own width, so small uploads still get a WebP/JPEG re-encode.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise UnusableImage(str(e)) from e
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    results = []
+    for width in sorted({min(w, img.width) for w in target_widths}):
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        for fmt in target_formats:
+            out = io.BytesIO()
+            options = {'quality': QUALITY.get(fmt, 80)}
+            if fmt == 'jpeg':
+                options.update(optimize=True, progressive=True)
+            elif fmt == 'webp':
+                options['method'] = 4
+            resized.save(out, PIL_FORMATS[fmt], **options)
+            results.append((fmt, width, out.getvalue()))
+    return results
+
+
+def srcset(instance, field_name):
+    """``{format: "url 320w, url 640w"}`` for the current image, or None."""
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field(field_name)) or {}
+    if not field_file or variants.get('source') != field_file.name:
+        return None
+    return {
+        fmt: ', '.join(f"{url} {width}w" for width, url in entries)
+        for fmt, entries in variants.items()
+        if fmt != 'source'
+    }
+
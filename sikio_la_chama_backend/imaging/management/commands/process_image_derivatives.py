@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from imaging import derivatives
+
+
+class Command(BaseCommand):
+    help = "Render WebP/JPEG derivatives for newly uploaded images and attach their URLs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when no job is waiting instead of polling.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls when idle.')
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='First queue jobs for existing images that have no derivatives yet.',
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            queued = 0
+            for model, field_name in derivatives.registered_fields():
+                with_image = model._default_manager.exclude(**{f"{field_name}__isnull": True}).exclude(**{field_name: ''})
+                for instance in with_image.iterator():
+                    if derivatives.needs_derivatives(instance, field_name):
+                        derivatives.enqueue(instance, field_name)
+                        queued += 1
+            self.stdout.write(f"Queued {queued} images for derivatives")
+
+        while True:
+            job = derivatives.claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f"Rendering derivatives for {job}")
+            derivatives.process_job(job)
@@ -0,0 +1,32 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class ImageDerivativeJob(models.Model):
+    """Pending derivative generation for one image field of one object.
+
+    Created when an image is saved and worked off by
+    `process_image_derivatives`; `source_name` is the stored file the job was
+    queued for, so a job made stale by a newer upload is simply replaced.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=50)
+    source_name = models.CharField(max_length=500)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'field_name'], name='unique_image_derivative_job'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Derivatives for {self.content_type.model} {self.object_id}.{self.field_name}"
@@ -0,0 +1,129 @@
+"""Normalization of citizen-uploaded photos before they are stored.
+
+Phone photos (often 5-12 MP, with EXIF including GPS) are decoded with
+Pillow's JPEG draft mode, downscaled to ``REPORT_IMAGE_MAX_DIMENSION``,
+rotated per their EXIF orientation and re-encoded as a metadata-free JPEG.
+The work runs on a small shared thread pool (Pillow releases the GIL while
+decoding and resampling); a request waits at most
+``REPORT_IMAGE_TIMEOUT`` seconds and is turned away while the pool's
+backlog is full, so a burst of huge uploads can't pin every worker.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+
+DEFAULT_MAX_DIMENSION = 1920
+DEFAULT_QUALITY = 85
+DEFAULT_MAX_PIXELS = 40_000_000
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 10
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+class ImageBusy(APIException):
+    status_code = 503
+    default_detail = 'Image processing is busy, please retry shortly.'
+    default_code = 'image_busy'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _pool():
+    """Return the shared executor and the semaphore bounding its backlog."""
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = _setting('REPORT_IMAGE_WORKERS', DEFAULT_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-normalize')
+            # running plus queued jobs; callers beyond this are told to retry
+            _slots = threading.BoundedSemaphore(workers * 4)
+        return _executor, _slots
+
+
+def normalize_upload(uploaded_file):
+    """Return a downscaled, EXIF-free JPEG copy of `uploaded_file`.
+
+    Raises `serializers.ValidationError` for unreadable or oversized images
+    and `ImageBusy` when the pool is saturated or the image takes too long.
+    """
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise ImageBusy()
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    try:
+        future = executor.submit(
+            normalize_image,
+            data,
+            _setting('REPORT_IMAGE_MAX_DIMENSION', DEFAULT_MAX_DIMENSION),
+            _setting('REPORT_IMAGE_QUALITY', DEFAULT_QUALITY),
+            _setting('REPORT_IMAGE_MAX_PIXELS', DEFAULT_MAX_PIXELS),
+        )
+    except Exception:
+        slots.release()
+        raise
+    # The slot is held until the job really ends, even if we stop waiting.
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        output = future.result(timeout=_setting('REPORT_IMAGE_TIMEOUT', DEFAULT_TIMEOUT))
+    except FutureTimeout:
+        raise ImageBusy('Image took too long to process, please upload a smaller image.')
+
+    stem = os.path.splitext(os.path.basename(getattr(uploaded_file, 'name', '') or 'image'))[0]
+    return InMemoryUploadedFile(
+        io.BytesIO(output), getattr(uploaded_file, 'field_name', None), f"{stem}.jpg",
+        'image/jpeg', len(output), None,
+    )
+
+
+def normalize_image(data, max_dimension, quality, max_pixels):
+    """Decode `data`, fit it within `max_dimension` and return JPEG bytes without metadata."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        img = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise serializers.ValidationError("Upload a valid image.")
+    # Only the header has been read so far: refuse decompression bombs
+    # before any pixel buffer is allocated.
+    width, height = img.size
+    if width * height > max_pixels:
+        raise serializers.ValidationError(
+            f"Image is too large ({width}x{height}); the maximum is {max_pixels // 1_000_000} megapixels."
+        )
+    scale = min(1.0, max_dimension / max(width, height))
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    # JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale directly,
+    # never going below the target size.
+    img.draft('RGB', target)
+    try:
+        img.load()
+    except (OSError, Image.DecompressionBombError):
+        raise serializers.ValidationError("Upload a valid image.")
+    img.thumbnail(target, Image.LANCZOS)
+    # Apply the EXIF orientation to the pixels; the EXIF itself is dropped below.
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    out = io.BytesIO()
+    # No exif/icc arguments: the re-encoded file carries no metadata.
+    img.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
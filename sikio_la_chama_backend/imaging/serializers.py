@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from . import derivatives
+
+
+class SrcsetField(serializers.Field):
+    """Read-only ``{"webp": "url 320w, url 640w, ...", "jpeg": ...}`` for an image field.
+
+    Null until the derivatives for the current image have been rendered.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return derivatives.srcset(instance, self.image_field)
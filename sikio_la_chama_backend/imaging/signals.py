@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+
+from . import derivatives
+
+
+def queue_derivatives(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for model, field_name in derivatives.registered_fields():
+        if model is sender and derivatives.needs_derivatives(instance, field_name):
+            derivatives.enqueue(instance, field_name)
+
+
+for _model, _field_name in derivatives.registered_fields():
+    post_save.connect(queue_derivatives, sender=_model, dispatch_uid=f"imaging_derivatives_{_model._meta.label}")
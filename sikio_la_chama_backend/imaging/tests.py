@@ -0,0 +1,99 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from users.models import User
+from ilani.models import Ilani
+from imaging import derivatives
+from imaging.models import ImageDerivativeJob
+
+
+def _png(width, height):
+	from PIL import Image
+
+	out = io.BytesIO()
+	Image.new('RGBA', (width, height), (200, 40, 40, 255)).save(out, 'PNG')
+	return out.getvalue()
+
+
+class RenderTests(TestCase):
+	def test_renders_each_width_and_format_without_upscaling(self):
+		rendered = derivatives.render(_png(800, 400), (320, 640, 1080), ('webp', 'jpeg'))
+		self.assertEqual([(fmt, width) for fmt, width, _ in rendered], [
+			('webp', 320), ('jpeg', 320), ('webp', 640), ('jpeg', 640), ('webp', 800), ('jpeg', 800),
+		])
+		self.assertTrue(rendered[0][2].startswith(b'RIFF'))
+		self.assertTrue(rendered[1][2].startswith(b'\xff\xd8'))
+
+	def test_rejects_non_images(self):
+		with self.assertRaises(derivatives.UnusableImage):
+			derivatives.render(b'not an image', (320,), ('jpeg',))
+
+
+class DerivativePipelineTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root)
+		override = override_settings(
+			MEDIA_ROOT=self.media_root,
+			DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+			IMAGE_DERIVATIVE_WIDTHS=(320, 640),
+		)
+		override.enable()
+		self.addCleanup(override.disable)
+		self.user = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+
+	def _ilani(self, width=1000):
+		return Ilani.objects.create(
+			title='Notice', user=self.user, image=SimpleUploadedFile('notice.png', _png(width, 500), content_type='image/png')
+		)
+
+	def test_upload_queues_job_and_worker_attaches_srcset(self):
+		ilani = self._ilani()
+		job = ImageDerivativeJob.objects.get(object_id=ilani.id, field_name='image')
+		self.assertEqual(job.source_name, ilani.image.name)
+		resp = APIClient().get(f'/api/ilani/ilani/{ilani.id}/')
+		self.assertIsNone(resp.data['image_srcset'])
+
+		call_command('process_image_derivatives', '--once', stdout=io.StringIO())
+
+		self.assertFalse(ImageDerivativeJob.objects.exists())
+		ilani.refresh_from_db()
+		self.assertEqual(ilani.image_variants['source'], ilani.image.name)
+		self.assertEqual([w for w, _ in ilani.image_variants['webp']], [320, 640])
+		resp = APIClient().get(f'/api/ilani/ilani/{ilani.id}/')
+		self.assertRegex(resp.data['image_srcset']['webp'], r'_320\.webp 320w, .*_640\.webp 640w$')
+		self.assertIn('jpeg', resp.data['image_srcset'])
+
+	def test_replaced_image_keeps_new_job(self):
+		ilani = self._ilani()
+		stale = derivatives.claim_next_job()
+		ilani.image = SimpleUploadedFile('other.png', _png(700, 300), content_type='image/png')
+		ilani.save()
+		derivatives.process_job(stale)
+		job = ImageDerivativeJob.objects.get(object_id=ilani.id)
+		self.assertEqual(job.source_name, ilani.image.name)
+		self.assertIsNone(job.claimed_at)
+		ilani.refresh_from_db()
+		self.assertEqual(ilani.image_variants, {})
+
+	def test_saving_other_fields_does_not_requeue(self):
+		ilani = self._ilani()
+		call_command('process_image_derivatives', '--once', stdout=io.StringIO())
+		ilani.refresh_from_db()
+		ilani.title = 'Updated'
+		ilani.save()
+		self.assertFalse(ImageDerivativeJob.objects.exists())
+
+	def test_unusable_image_is_not_retried(self):
+		ilani = Ilani.objects.create(
+			title='Broken', user=self.user, image=SimpleUploadedFile('broken.png', b'garbage', content_type='image/png')
+		)
+		derivatives.process_job(derivatives.claim_next_job())
+		job = ImageDerivativeJob.objects.get(object_id=ilani.id)
+		self.assertEqual(job.attempts, derivatives.MAX_ATTEMPTS)
+		self.assertIsNone(derivatives.claim_next_job())
@@ -0,0 +1,185 @@
+"""Bulk import of institutions and departments.
+
+A row names an ``institution`` and optionally a ``department``, plus a
+``description`` for whichever of the two it creates. Institutions named by
+department rows are created when they don't exist yet. Uniqueness is
+checked case-insensitively in memory against one prefetch of the existing
+names (the ``Lower(name)`` unique constraints back it up), then the rows
+are written with `bulk_create` in batches inside one transaction.
+
+By default nothing is written when any row is invalid; with
+``partial=True`` the valid rows are imported and the rest reported.
+"""
+import csv
+import io
+import json
+
+from django.db import IntegrityError, transaction
+
+from catalog import versions
+
+from .models import Department, Institution
+
+DEFAULT_BATCH_SIZE = 500
+FORMATS = ('json', 'csv')
+
+
+class ImportFormatError(ValueError):
+    """The payload can't be read as rows at all."""
+
+
+class ImportConflict(Exception):
+    """A concurrent write created one of the names being imported."""
+
+
+def parse(content, fmt):
+    """Return the rows in `content` (str), a JSON or CSV document."""
+    if fmt == 'json':
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise ImportFormatError(f"Invalid JSON: {e}")
+        return rows_from_json(data)
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        fields = [(name or '').strip().lower() for name in reader.fieldnames or []]
+        if 'institution' not in fields:
+            raise ImportFormatError("CSV needs a header row with an 'institution' column.")
+        reader.fieldnames = fields
+        return [{key: (value or '').strip() for key, value in row.items() if key} for row in reader]
+    raise ImportFormatError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}.")
+
+
+def rows_from_json(data):
+    """Accept a list of rows, ``{"rows": [...]}``, or institutions with nested departments.
+
+    ``{"institution": "X", "departments": ["A", {"name": "B", "description": "..."}]}``
+    expands to the institution row followed by one row per department.
+    """
+    if isinstance(data, dict):
+        data = data.get('rows')
+    if not isinstance(data, list):
+        raise ImportFormatError("Expected a list of rows.")
+    rows = []
+    for item in data:
+        if not isinstance(item, dict):
+            raise ImportFormatError("Each row must be an object.")
+        departments = item.get('departments') or []
+        rows.append({key: value for key, value in item.items() if key != 'departments'})
+        for department in departments:
+            if not isinstance(department, dict):
+                department = {'name': department}
+            rows.append({
+                'institution': item.get('institution'),
+                'department': department.get('name'),
+                'description': department.get('description'),
+            })
+    return rows
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else ''
+
+
+def import_rows(rows, partial=False, skip_existing=False, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Validate and import `rows`; return a summary with per-row errors.
+
+    Rows are numbered from 1 in the order given. An institution-only row
+    for an existing institution is an error unless `skip_existing`, which
+    also applies to existing departments.
+    """
+    name_length = Institution._meta.get_field('name').max_length
+    institutions = {name.lower(): pk for pk, name in Institution.objects.order_by().values_list('id', 'name')}
+    departments = {
+        (institution_id, name.lower())
+        for institution_id, name in Department.objects.order_by().values_list('institution_id', 'name')
+    }
+
+    new_institutions = {}  # lower name -> Institution
+    declared = set()  # institutions with a row of their own in this import
+    new_departments = {}  # (lower institution name, lower name) -> Department
+    errors = []
+    skipped = 0
+
+    for number, row in enumerate(rows, start=1):
+        institution_name = _clean(row.get('institution'))
+        department_name = _clean(row.get('department'))
+        description = _clean(row.get('description')) or None
+        row_errors = {}
+        if not institution_name:
+            row_errors['institution'] = "This field is required."
+        elif len(institution_name) > name_length:
+            row_errors['institution'] = f"Ensure this field has no more than {name_length} characters."
+        if len(department_name) > name_length:
+            row_errors['department'] = f"Ensure this field has no more than {name_length} characters."
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+            continue
+
+        institution_key = institution_name.lower()
+        existing_id = institutions.get(institution_key)
+        if not department_name:
+            if existing_id is not None and skip_existing:
+                skipped += 1
+            elif existing_id is not None or institution_key in declared:
+                errors.append({'row': number, 'errors': {'institution': "Institution with this name already exists."}})
+            elif institution_key in new_institutions:
+                # created implicitly by an earlier department row
+                declared.add(institution_key)
+                new_institutions[institution_key].description = description
+            else:
+                declared.add(institution_key)
+                new_institutions[institution_key] = Institution(name=institution_name, description=description)
+            continue
+
+        department_key = (institution_key, department_name.lower())
+        if department_key in new_departments or (
+            existing_id is not None and (existing_id, department_key[1]) in departments
+        ):
+            if skip_existing and department_key not in new_departments:
+                skipped += 1
+                continue
+            errors.append({'row': number, 'errors': {
+                'department': "Department with this name already exists in the selected institution."
+            }})
+            continue
+        if existing_id is None and institution_key not in new_institutions:
+            new_institutions[institution_key] = Institution(name=institution_name)
+        new_departments[department_key] = Department(name=department_name, description=description)
+
+    result = {
+        'created': {'institutions': 0, 'departments': 0},
+        'skipped': skipped,
+        'errors': errors,
+        'dry_run': dry_run,
+    }
+    if dry_run or (errors and not partial):
+        if dry_run:
+            result['created'] = {'institutions': len(new_institutions), 'departments': len(new_departments)}
+        return result
+
+    try:
+        with transaction.atomic():
+            created = Institution.objects.bulk_create(new_institutions.values(), batch_size=batch_size)
+            if any(institution.pk is None for institution in created):
+                # Backends that can't return ids from a bulk insert
+                institutions.update(
+                    (name.lower(), pk) for pk, name in Institution.objects.filter(
+                        name__in=[institution.name for institution in created]
+                    ).values_list('id', 'name')
+                )
+            else:
+                institutions.update((key, institution.pk) for key, institution in new_institutions.items())
+            for (institution_key, _), department in new_departments.items():
+                department.institution_id = institutions[institution_key]
+            Department.objects.bulk_create(new_departments.values(), batch_size=batch_size)
+    except IntegrityError as e:
+        raise ImportConflict(str(e))
+
+    # bulk_create sends no post_save signals
+    if new_institutions:
+        versions.bump_for_model(Institution)
+    if new_departments:
+        versions.bump_for_model(Department)
+    result['created'] = {'institutions': len(new_institutions), 'departments': len(new_departments)}
+    return result
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from institutions import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import institutions and departments from a CSV (columns: "
+        "institution, department, description) or JSON file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file; '-' reads stdin (needs --format).")
+        parser.add_argument('--format', choices=bulk.FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without writing.')
+        parser.add_argument('--partial', action='store_true', help='Import the valid rows even if some fail.')
+        parser.add_argument('--skip-existing', action='store_true', help='Skip rows naming existing records.')
+        parser.add_argument('--batch-size', type=int, default=bulk.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        try:
+            if path == '-':
+                content = (options.get('stdin') or sys.stdin).read()
+            else:
+                with open(path, encoding='utf-8-sig') as f:
+                    content = f.read()
+            rows = bulk.parse(content, fmt)
+            result = bulk.import_rows(
+                rows,
+                partial=options['partial'],
+                skip_existing=options['skip_existing'],
+                dry_run=options['dry_run'],
+                batch_size=options['batch_size'],
+            )
+        except (OSError, UnicodeDecodeError, bulk.ImportFormatError, bulk.ImportConflict) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        created = result['created']
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(
+            f"{verb} {created['institutions']} institutions and {created['departments']} departments; "
+            f"skipped {result['skipped']}, rejected {len(result['errors'])} rows"
+        )
+        if result['errors'] and not (options['partial'] or options['dry_run']):
+            raise CommandError("Nothing was imported; fix the rows above or pass --partial.")
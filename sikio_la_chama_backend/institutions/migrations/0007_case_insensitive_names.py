@@ -0,0 +1,83 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:18
+
+import logging
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+logger = logging.getLogger(__name__)
+
+
+def _duplicate_groups(rows, key):
+    """Group `rows` (dicts ordered by id) by `key`; yield (oldest, newer ones) for groups of two or more."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(key(row), []).append(row)
+    for group in groups.values():
+        if len(group) > 1:
+            yield group[0], group[1:]
+
+
+def _merge(model, keep_id, duplicate_ids):
+    """Point every reference to `duplicate_ids` at `keep_id`, then delete the duplicates."""
+    for relation in model._meta.related_objects:
+        related = relation.related_model._base_manager
+        field = relation.field.name
+        if relation.one_to_one:
+            for duplicate_id in duplicate_ids:
+                if related.filter(**{field: keep_id}).exists():
+                    related.filter(**{field: duplicate_id}).delete()
+                else:
+                    related.filter(**{field: duplicate_id}).update(**{field: keep_id})
+        else:
+            related.filter(**{f'{field}__in': duplicate_ids}).update(**{field: keep_id})
+    model._base_manager.filter(id__in=duplicate_ids).delete()
+
+
+def _merge_case_duplicates(apps, schema_editor):
+    Institution = apps.get_model('institutions', 'Institution')
+    Department = apps.get_model('institutions', 'Department')
+
+    institutions = Institution.objects.order_by('id').values('id', 'name')
+    for keep, duplicates in _duplicate_groups(institutions, lambda row: row['name'].lower()):
+        duplicate_ids = [row['id'] for row in duplicates]
+        # Move the departments over first, merging those the kept institution already has
+        for department in Department.objects.filter(institution_id__in=duplicate_ids).order_by('id'):
+            existing = Department.objects.filter(institution_id=keep['id'], name__iexact=department.name).first()
+            if existing is not None:
+                _merge(Department, existing.id, [department.id])
+            else:
+                Department.objects.filter(id=department.id).update(institution_id=keep['id'])
+        _merge(Institution, keep['id'], duplicate_ids)
+        logger.warning("Merged institutions %s into %r", [row['name'] for row in duplicates], keep['name'])
+
+    departments = Department.objects.order_by('id').values('id', 'name', 'institution_id')
+    for keep, duplicates in _duplicate_groups(departments, lambda row: (row['institution_id'], row['name'].lower())):
+        _merge(Department, keep['id'], [row['id'] for row in duplicates])
+        logger.warning("Merged departments %s into %r", [row['name'] for row in duplicates], keep['name'])
+
+    if schema_editor.connection.vendor == 'postgresql':
+        # Fire the deferred foreign key checks queued by the updates above;
+        # Postgres refuses to index a table with pending trigger events.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institutions', '0006_alter_department_options_alter_institution_options_and_more'),
+    ]
+
+    operations = [
+        # Names differing only in case would violate the new constraints: merge
+        # them into the oldest row, moving everything that references them.
+        migrations.RunPython(_merge_case_duplicates, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='department',
+            constraint=models.UniqueConstraint(models.F('institution'), django.db.models.functions.text.Lower('name'), name='department_name_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='institution',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='institution_name_ci_unique'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 class Institution(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -8,6 +9,10 @@ class Institution(models.Model):
     class Meta:
         ordering = ['name']
         verbose_name_plural = "Institutions"
+        constraints = [
+            # Also the index behind case-insensitive name checks (see bulk.py)
+            models.UniqueConstraint(Lower('name'), name='institution_name_ci_unique'),
+        ]
 
     def __str__(self):
         return self.name
@@ -22,9 +27,13 @@ class Department(models.Model):
         ordering = ['name']
         unique_together = ['name', 'institution']
         verbose_name_plural = "Departments"
+        constraints = [
+            models.UniqueConstraint('institution', Lower('name'), name='department_name_ci_unique'),
+        ]
 
     def __str__(self):
-        return f"{self.name} ({self.institution.name})"
+        from catalog import refdata
+        return f"{self.name} ({refdata.name('institutions', self.institution_id)})"
 
 class InstitutionFilePermission(models.Model):
     institution = models.OneToOneField(
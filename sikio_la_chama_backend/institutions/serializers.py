@@ -1,5 +1,7 @@
+from django.db.models.functions import Lower
 from rest_framework import serializers
 from .models import Institution, Department
+from catalog.serializers import CachedPrimaryKeyRelatedField
 
 class InstitutionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,12 +10,13 @@ class InstitutionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def validate_name(self, value):
-        if Institution.objects.filter(name__iexact=value).exists():
+        # LOWER(name) = lower(value) is served by the case-insensitive unique index
+        if Institution.objects.annotate(lower_name=Lower('name')).filter(lower_name=value.lower()).exists():
             raise serializers.ValidationError("Institution with this name already exists.")
         return value
 
 class DepartmentSerializer(serializers.ModelSerializer):
-    institution = serializers.PrimaryKeyRelatedField(queryset=Institution.objects.all())  # For create/update, use ID
+    institution = CachedPrimaryKeyRelatedField('institutions', queryset=Institution.objects.all())  # For create/update, use ID
 
     class Meta:
         model = Department
@@ -22,6 +25,8 @@ class DepartmentSerializer(serializers.ModelSerializer):
 
     def validate_name(self, value):
         institution = self.initial_data.get('institution')
-        if Department.objects.filter(name__iexact=value, institution=institution).exists():
+        if Department.objects.annotate(lower_name=Lower('name')).filter(
+            lower_name=value.lower(), institution=institution
+        ).exists():
             raise serializers.ValidationError("Department with this name already exists in the selected institution.")
         return value
\ No newline at end of file
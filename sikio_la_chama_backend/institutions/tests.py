@@ -1,8 +1,19 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from user_messages.models import InstitutionFilePermission
 from users.models import User
-from institutions.models import Institution
+from institutions import bulk
+from institutions.models import Institution, Department
 
 
 class FilePermissionTests(TestCase):
@@ -40,3 +51,116 @@ class FilePermissionTests(TestCase):
 		self.assertEqual(resp.status_code, 200)
 		perm.refresh_from_db()
 		self.assertFalse(perm.allow_file)
+
+
+class BulkImportTests(TestCase):
+	def setUp(self):
+		self.admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True, is_superuser=True)
+		self.client = APIClient()
+		self.client.force_authenticate(self.admin)
+		self.water = Institution.objects.create(name='Water Board')
+		Department.objects.create(name='Billing', institution=self.water)
+
+	def test_json_rows_import_with_nested_departments(self):
+		rows = [
+			{'institution': 'Power', 'description': 'Electricity', 'departments': ['Outages', {'name': 'Meters'}]},
+			{'institution': 'water board', 'department': 'Leaks'},
+		]
+		resp = self.client.post('/api/institutions/import/', rows, format='json')
+		self.assertEqual(resp.status_code, 201, resp.data)
+		self.assertEqual(resp.data['created'], {'institutions': 1, 'departments': 3})
+		power = Institution.objects.get(name='Power')
+		self.assertEqual(power.description, 'Electricity')
+		self.assertEqual(set(power.departments.values_list('name', flat=True)), {'Outages', 'Meters'})
+		self.assertTrue(self.water.departments.filter(name='Leaks').exists())
+
+	def test_csv_upload_reports_row_errors_and_writes_nothing(self):
+		content = (
+			"Institution,Department,Description\n"
+			"Roads,,\n"
+			"WATER BOARD,billing,\n"
+			",Orphan,\n"
+			"Roads,,duplicate\n"
+		)
+		upload = SimpleUploadedFile('regions.csv', content.encode(), content_type='text/csv')
+		resp = self.client.post('/api/institutions/import/', {'file': upload}, format='multipart')
+		self.assertEqual(resp.status_code, 400)
+		self.assertEqual([e['row'] for e in resp.data['errors']], [2, 3, 4])
+		self.assertIn('department', resp.data['errors'][0]['errors'])
+		self.assertFalse(Institution.objects.filter(name='Roads').exists())
+
+	def test_file_format_overrides_extension(self):
+		upload = SimpleUploadedFile('export.txt', b"Institution\nRoads\n", content_type='text/plain')
+		resp = self.client.post('/api/institutions/import/?file_format=csv', {'file': upload}, format='multipart')
+		self.assertEqual(resp.status_code, 201, resp.data)
+		self.assertTrue(Institution.objects.filter(name='Roads').exists())
+
+	def test_partial_and_skip_existing(self):
+		rows = [{'institution': 'Water Board'}, {'institution': 'Roads'}, {'institution': ''}]
+		resp = self.client.post('/api/institutions/import/?partial=1&skip_existing=1', rows, format='json')
+		self.assertEqual(resp.status_code, 201)
+		self.assertEqual(resp.data['skipped'], 1)
+		self.assertEqual(len(resp.data['errors']), 1)
+		self.assertTrue(Institution.objects.filter(name='Roads').exists())
+
+	def test_query_count_does_not_grow_with_rows(self):
+		def queries(prefix, count):
+			rows = [{'institution': f'{prefix} {i}', 'department': 'Main'} for i in range(count)]
+			with CaptureQueriesContext(connection) as ctx:
+				result = bulk.import_rows(rows)
+			self.assertEqual(result['created'], {'institutions': count, 'departments': count})
+			return len(ctx.captured_queries)
+
+		queries('Warm', 1)
+		self.assertEqual(queries('Small', 5), queries('Large', 50))
+
+	def test_case_insensitive_unique_constraint(self):
+		with self.assertRaises(IntegrityError), transaction.atomic():
+			Institution.objects.create(name='WATER BOARD')
+
+	def test_command_dry_run(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+			json.dump({'rows': [{'institution': 'Health', 'department': 'Clinics'}]}, f)
+		self.addCleanup(os.remove, f.name)
+		out = io.StringIO()
+		call_command('import_institutions', f.name, '--dry-run', stdout=out)
+		self.assertIn('Would create 1 institutions and 1 departments', out.getvalue())
+		self.assertFalse(Institution.objects.filter(name='Health').exists())
+
+
+class CaseDuplicateMigrationTests(TransactionTestCase):
+	before = [('institutions', '0006_alter_department_options_alter_institution_options_and_more')]
+	after = [('institutions', '0007_case_insensitive_names')]
+
+	def migrate(self, targets):
+		executor = MigrationExecutor(connection)
+		executor.migrate(targets)
+		# Every other app at its latest state
+		nodes = [node for node in executor.loader.graph.leaf_nodes() if node[0] != 'institutions']
+		return executor.loader.project_state(nodes + targets).apps
+
+	def test_case_duplicates_are_merged_before_the_constraints(self):
+		old = self.migrate(self.before)
+		self.addCleanup(self.migrate, self.after)
+		OldInstitution = old.get_model('institutions', 'Institution')
+		OldDepartment = old.get_model('institutions', 'Department')
+		water = OldInstitution.objects.create(name='Water Board')
+		shouting = OldInstitution.objects.create(name='WATER BOARD', description='Duplicate')
+		billing = OldDepartment.objects.create(name='Billing', institution=water)
+		dup_billing = OldDepartment.objects.create(name='billing', institution=shouting)
+		leaks = OldDepartment.objects.create(name='Leaks', institution=shouting)
+		old.get_model('user_messages', 'InstitutionFilePermission').objects.create(institution=shouting, allow_file=True)
+		user = old.get_model('users', 'User').objects.create(
+			username='officer', institution_id=shouting.id, department_id=dup_billing.id,
+		)
+
+		with self.assertLogs('institutions.migrations.0007_case_insensitive_names', 'WARNING'):
+			self.migrate(self.after)
+
+		self.assertEqual(list(Institution.objects.values_list('name', flat=True)), ['Water Board'])
+		self.assertEqual(
+			set(Department.objects.filter(institution_id=water.id).values_list('id', flat=True)), {billing.id, leaks.id},
+		)
+		user = User.objects.get(pk=user.pk)
+		self.assertEqual((user.institution_id, user.department_id), (water.id, billing.id))
+		self.assertEqual(InstitutionFilePermission.objects.get().institution_id, water.id)
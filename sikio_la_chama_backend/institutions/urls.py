@@ -2,7 +2,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
-from .views import InstitutionViewSet, DepartmentViewSet, InstitutionFilePermissionsView, InstitutionFilePermissionDetailView, InstitutionFilePermissionViewSet, InstitutionCreateView, DepartmentCreateView, ToggleFilePermissionView
+from .views import InstitutionViewSet, DepartmentViewSet, InstitutionFilePermissionsView, InstitutionFilePermissionDetailView, InstitutionFilePermissionViewSet, InstitutionCreateView, DepartmentCreateView, ToggleFilePermissionView, InstitutionBulkImportView
 
 router = DefaultRouter()
 router.register(r'institutions', InstitutionViewSet, basename='institution')
@@ -18,6 +18,7 @@ urlpatterns = [
     # interpreted as a PK and dispatched to the read-only viewset which
     # doesn't allow POST).
     path('institutions/create/', InstitutionCreateView.as_view(), name='institution_create'),
+    path('institutions/import/', InstitutionBulkImportView.as_view(), name='institution_bulk_import'),
     path('institutions/<int:institution_id>/departments/create/', DepartmentCreateView.as_view(), name='department_create'),
     path('', include(router.urls)),
     # Expose institution-level file permission endpoints here BEFORE the
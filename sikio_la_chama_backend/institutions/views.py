@@ -9,22 +9,26 @@ from rest_framework import status
 from rest_framework.permissions import IsAdminUser
 from user_messages.models import InstitutionFilePermission
 from user_messages.serializers import InstitutionFilePermissionSerializer
+from catalog.conditional import ConditionalGetMixin
+from . import bulk
 import logging
 
 logger = logging.getLogger(__name__)
 
 # ViewSet for GET /institutions/, read-only for lists.
-class InstitutionViewSet(viewsets.ReadOnlyModelViewSet):
+class InstitutionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Institution.objects.all()
     serializer_class = InstitutionSerializer
+    conditional_resources = ('institutions',)
     permission_classes = [IsAuthenticatedOrReadOnly]  # Matches your settings
     filter_backends = [DjangoFilterBackend]  # Enable filtering
     filterset_fields = ['name']  # e.g., ?name=Police
 
 # ViewSet for GET /institutions/departments/, read-only for lists.
-class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    conditional_resources = ('departments',)
     permission_classes = [IsAuthenticatedOrReadOnly]  # Matches your settings
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['institution', 'name']  # e.g., ?institution=1&name=Crime
@@ -53,7 +57,7 @@ class InstitutionFilePermissionsView(APIView):
         return [IsAdminUser()]
 
     def get(self, request):
-        logger.debug(f"User {request.user} fetching file permissions (institutions scope)")
+        logger.debug("User %s fetching file permissions (institutions scope)", request.user)
         permissions = InstitutionFilePermission.objects.all()
         return Response([
             {'institution_id': p.institution.id, 'allow_file': p.allow_file}
@@ -71,15 +75,15 @@ class InstitutionFilePermissionDetailView(APIView):
         return [IsAdminUser()]
 
     def get(self, request, institution_id):
-        logger.debug(f"User {request.user} fetching file permission for institution {institution_id}")
+        logger.debug("User %s fetching file permission for institution %s", request.user, institution_id)
         permission = InstitutionFilePermission.objects.filter(institution_id=institution_id).first()
         if not permission:
             return Response({'institution_id': institution_id, 'allow_file': False}, status=status.HTTP_200_OK)
         return Response({'institution_id': institution_id, 'allow_file': permission.allow_file}, status=status.HTTP_200_OK)
 
     def patch(self, request, institution_id):
-        logger.debug(f"User {request.user} updating file permission for institution {institution_id}")
-        logger.debug(f"Request content_type={request.content_type} data={request.data}")
+        logger.debug("User %s updating file permission for institution %s", request.user, institution_id)
+        logger.debug("Request content_type=%s fields=%s", request.content_type, list(request.data))
         permission, _ = InstitutionFilePermission.objects.get_or_create(institution_id=institution_id, defaults={'allow_file': False})
         allow_keys = ['allow_file', 'allow', 'allowFile', 'allow_files']
         allow_present = False
@@ -91,14 +95,14 @@ class InstitutionFilePermissionDetailView(APIView):
                 allow_present = True
                 found_key = k
                 break
-        logger.debug(f"Found allow key={found_key} present={allow_present} raw_value={allow}")
+        logger.debug("Found allow key=%s present=%s raw_value=%s", found_key, allow_present, allow)
         if not allow_present:
-            logger.warning(f"No allow flag provided when patching permission for institution {institution_id}")
+            logger.warning("No allow flag provided when patching permission for institution %s", institution_id)
             return Response({'errors': {'allow_file': 'This field is required'}}, status=status.HTTP_400_BAD_REQUEST)
         if isinstance(allow, str):
             allow = allow.lower() in ['1', 'true', 'yes', 'on']
         permission.allow_file = bool(allow)
-        logger.debug(f"Computed allow={permission.allow_file} (from raw {allow})")
+        logger.debug("Computed allow=%s (from raw %s)", permission.allow_file, allow)
         permission.save()
         return Response({'institution_id': institution_id, 'allow_file': permission.allow_file}, status=status.HTTP_200_OK)
 
@@ -108,12 +112,12 @@ class InstitutionFilePermissionDetailView(APIView):
         For this simple resource the behavior mirrors PATCH, but we accept
         a full representation and return the updated object.
         """
-        logger.debug(f"User {request.user} replacing file permission for institution {institution_id} via PUT")
+        logger.debug("User %s replacing file permission for institution %s via PUT", request.user, institution_id)
         # Ensure the permission object exists
         permission, _ = InstitutionFilePermission.objects.get_or_create(
             institution_id=institution_id, defaults={'allow_file': False}
         )
-        logger.debug(f"Request content_type={request.content_type} data={request.data}")
+        logger.debug("Request content_type=%s fields=%s", request.content_type, list(request.data))
         # Interpret allow_file from payload; require explicit flag for PUT
         allow_keys = ['allow_file', 'allow', 'allowFile', 'allow_files']
         allow_present = False
@@ -125,14 +129,14 @@ class InstitutionFilePermissionDetailView(APIView):
                 allow_present = True
                 found_key = k
                 break
-        logger.debug(f"Found allow key={found_key} present={allow_present} raw_value={allow}")
+        logger.debug("Found allow key=%s present=%s raw_value=%s", found_key, allow_present, allow)
         if not allow_present:
-            logger.warning(f"No allow flag provided when putting permission for institution {institution_id}")
+            logger.warning("No allow flag provided when putting permission for institution %s", institution_id)
             return Response({'errors': {'allow_file': 'This field is required'}}, status=status.HTTP_400_BAD_REQUEST)
         if isinstance(allow, str):
             allow = allow.lower() in ['1', 'true', 'yes', 'on']
         permission.allow_file = bool(allow)
-        logger.debug(f"Computed allow={permission.allow_file} (from raw {allow})")
+        logger.debug("Computed allow=%s (from raw %s)", permission.allow_file, allow)
         permission.save()
         return Response({'institution_id': institution_id, 'allow_file': permission.allow_file}, status=status.HTTP_200_OK)
 
@@ -180,7 +184,7 @@ class InstitutionFilePermissionViewSet(viewsets.ViewSet):
                 allow_present = True
                 break
         if not allow_present:
-            logger.warning(f"No allow flag provided when partially updating permission for institution {institution_pk}")
+            logger.warning("No allow flag provided when partially updating permission for institution %s", institution_pk)
             return Response({'errors': {'allow_file': 'This field is required'}}, status=status.HTTP_400_BAD_REQUEST)
         if isinstance(allow, str):
             allow = allow.lower() in ['1', 'true', 'yes', 'on']
@@ -199,13 +203,13 @@ class ToggleFilePermissionView(APIView):
     permission_classes = [IsAdminUser]
 
     def post(self, request, institution_id):
-        logger.debug(f"User {request.user} toggling file permission for institution {institution_id}")
+        logger.debug("User %s toggling file permission for institution %s", request.user, institution_id)
         permission, _ = InstitutionFilePermission.objects.get_or_create(
             institution_id=institution_id, defaults={'allow_file': False}
         )
         permission.allow_file = not permission.allow_file
         permission.save()
-        logger.info(f"Toggled file permission for institution {institution_id} to {permission.allow_file} by {request.user}")
+        logger.info("Toggled file permission for institution %s to %s by %s", institution_id, permission.allow_file, request.user)
         return Response({'institution_id': institution_id, 'allow_file': permission.allow_file}, status=status.HTTP_200_OK)
 
 
@@ -220,9 +224,9 @@ class InstitutionCreateView(APIView):
         serializer = InstitutionSerializer(data=request.data)
         if serializer.is_valid():
             institution = serializer.save()
-            logger.info(f"Institution {institution.id} created by {request.user}")
+            logger.info("Institution %s created by %s", institution.id, request.user)
             return Response(InstitutionSerializer(institution).data, status=status.HTTP_201_CREATED)
-        logger.error(f"Institution creation failed: {serializer.errors}")
+        logger.error("Institution creation failed: %s", serializer.errors)
         return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -240,7 +244,57 @@ class DepartmentCreateView(APIView):
         serializer = DepartmentSerializer(data=data)
         if serializer.is_valid():
             department = serializer.save()
-            logger.info(f"Department {department.id} created under institution {institution_id} by {request.user}")
+            logger.info("Department %s created under institution %s by %s", department.id, institution_id, request.user)
             return Response(DepartmentSerializer(department).data, status=status.HTTP_201_CREATED)
-        logger.error(f"Department creation failed for institution {institution_id}: {serializer.errors}")
-        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        logger.error("Department creation failed for institution %s: %s", institution_id, serializer.errors)
+        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class InstitutionBulkImportView(APIView):
+    """Admin bulk import of institutions and departments.
+
+    POST a JSON list of rows (``{"institution", "department"?,
+    "description"?}``, see `institutions.bulk`) or a multipart ``file``
+    (.csv or .json; ``file_format`` overrides the extension, since DRF
+    reserves ``format``). Query flags: ``dry_run``, ``partial`` (import the
+    valid rows even if others fail) and ``skip_existing``. Invalid rows are
+    reported as ``errors: [{"row": n, "errors": {...}}]``.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                fmt = request.query_params.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+                try:
+                    content = upload.read().decode('utf-8-sig')
+                except UnicodeDecodeError:
+                    raise bulk.ImportFormatError("File must be UTF-8 encoded.")
+                rows = bulk.parse(content, fmt)
+            else:
+                rows = bulk.rows_from_json(request.data)
+        except bulk.ImportFormatError as e:
+            return Response({"errors": {"file": str(e)}}, status=status.HTTP_400_BAD_REQUEST)
+
+        flags = {
+            name: request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+            for name in ('dry_run', 'partial', 'skip_existing')
+        }
+        try:
+            result = bulk.import_rows(rows, **flags)
+        except bulk.ImportConflict as e:
+            logger.warning("Bulk institution import conflicted with a concurrent write: %s", e)
+            return Response({"errors": {"import": "A concurrent change created some of these names; retry the import."}}, status=status.HTTP_409_CONFLICT)
+
+        created = result['created']
+        logger.info(
+            "Bulk import by %s: %s institutions, %s departments, %s rejected rows%s",
+            request.user, created['institutions'], created['departments'], len(result['errors']),
+            " (dry run)" if flags['dry_run'] else "",
+        )
+        if flags['dry_run']:
+            return Response(result, status=status.HTTP_200_OK)
+        if result['errors'] and not flags['partial']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaders', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leader',
+            name='picture_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -5,7 +5,11 @@ class Leader(models.Model):
     role = models.CharField(max_length=100)
     description = models.TextField()
     picture = models.ImageField(upload_to='leaders/%Y/%m/%d/')
+    # Resized WebP/JPEG copies of `picture`, filled in by the imaging worker
+    picture_variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # `?since=` delta sync reads this (see catalog/sync.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -1,8 +1,18 @@
 from rest_framework import serializers
+from imaging.serializers import SrcsetField
 from .models import Leader
 
 class LeaderSerializer(serializers.ModelSerializer):
+    picture_srcset = SrcsetField('picture')
+
     class Meta:
         model = Leader
-        fields = ['id', 'name', 'role', 'description', 'picture', 'created_at']
-        read_only_fields = ['id', 'created_at']
\ No newline at end of file
+        fields = ['id', 'name', 'role', 'description', 'picture', 'picture_srcset', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class LeaderListSerializer(LeaderSerializer):
+    """Compact row for paginated/delta listings; the detail has the biography."""
+
+    class Meta(LeaderSerializer.Meta):
+        fields = ['id', 'name', 'role', 'picture', 'picture_srcset', 'created_at', 'updated_at']
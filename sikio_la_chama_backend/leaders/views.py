@@ -1,11 +1,16 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAdminUser, AllowAny
 from .models import Leader
-from .serializers import LeaderSerializer
+from .serializers import LeaderSerializer, LeaderListSerializer
+from catalog.conditional import ConditionalGetMixin
+from catalog.sync import DeltaSyncMixin
 
-class LeaderViewSet(viewsets.ModelViewSet):
+class LeaderViewSet(ConditionalGetMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Leader.objects.all().order_by('-created_at')
     serializer_class = LeaderSerializer
+    list_serializer_class = LeaderListSerializer
+    sync_resource = 'leaders'
+    conditional_resources = ('leaders',)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -0,0 +1,22 @@
+"""Load tests modelling the mobile app's and the admin dashboard's traffic.
+
+Virtual users run the scenarios in `scenarios` over HTTP against a running
+server (``runserver``, gunicorn, staging...), so the whole stack is
+exercised: the WSGI server, middleware, database and caches. Each user is
+a thread with its own session; task choice and think times come from a
+seeded random generator, so a run with the same options replays the same
+traffic mix. At the end throughput and latency percentiles are printed per
+endpoint, and can be written as JSON to compare runs.
+
+The package only needs `requests` and does not import Django, so it can
+run from any machine that can reach the server::
+
+    python manage.py seed_synthetic_data --scale 2
+    gunicorn sikio_la_chama_backend.wsgi -w 4 &
+    python -m loadtest --host http://127.0.0.1:8000 --users 50 --spawn-rate 5 \\
+        --duration 120 --admin-username admin --admin-password ...
+
+Mobile users are anonymous: each gets a fresh ``device_id`` and logs in
+with it, as the app does on first launch. Admin users only run when
+credentials are given.
+"""
@@ -0,0 +1,78 @@
+"""Command line entry point: ``python -m loadtest --help``."""
+import argparse
+import json
+import os
+import sys
+
+from .runner import Runner
+from .scenarios import USER_CLASSES
+from .stats import format_table
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description="Replay the app's traffic mix against a server.")
+    parser.add_argument('--host', default='http://127.0.0.1:8000', help='Base URL of the server under test')
+    parser.add_argument('--users', type=int, default=10, help='Number of concurrent virtual users')
+    parser.add_argument('--spawn-rate', type=float, default=2, help='Users started per second')
+    parser.add_argument('--duration', type=float, default=60, help='Length of the run in seconds')
+    parser.add_argument('--scenarios', default=','.join(USER_CLASSES),
+                        help=f"Comma-separated user kinds to run (of: {', '.join(USER_CLASSES)})")
+    parser.add_argument('--seed', type=int, default=1, help='Seed for task choice and think times')
+    parser.add_argument('--think-scale', type=float, default=1.0,
+                        help='Multiplier for think times; below 1 means more requests per user')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds')
+    parser.add_argument('--admin-username', default=os.environ.get('LOADTEST_ADMIN_USERNAME'))
+    parser.add_argument('--admin-password', default=os.environ.get('LOADTEST_ADMIN_PASSWORD'))
+    parser.add_argument('--json', dest='json_path', help='Also write the results as JSON to this file')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios.split(',')) - set(USER_CLASSES)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.users < 1 or args.spawn_rate <= 0 or args.duration <= 0:
+        parser.error('--users, --spawn-rate and --duration must be positive')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = {'admin_username': args.admin_username, 'admin_password': args.admin_password}
+    user_classes = []
+    for name in args.scenarios.split(','):
+        cls = USER_CLASSES[name]
+        if cls.available(options):
+            user_classes.append(cls)
+        else:
+            print(f'Skipping {name} users: {cls.unavailable_reason}', file=sys.stderr)
+    if not user_classes:
+        print('No scenario can run.', file=sys.stderr)
+        return 2
+
+    runner = Runner(
+        args.host, user_classes, seed=args.seed, think_scale=args.think_scale, timeout=args.timeout, options=options,
+    )
+
+    def progress(runner, elapsed):
+        total = runner.stats.summary(elapsed)[-1]
+        print(f"{elapsed:5.0f}s  {total['requests']} requests, {total['failures']} failures, "
+              f"{total['rps']} req/s, p95 {total['p95_ms']} ms", file=sys.stderr)
+
+    print(f'Running {args.users} users against {args.host} for {args.duration:g}s', file=sys.stderr)
+    try:
+        rows = runner.run(args.users, args.spawn_rate, args.duration, on_tick=progress)
+    except KeyboardInterrupt:
+        runner.stop()
+        rows = runner.stats.summary(runner.elapsed or 1)
+    print(format_table(rows))
+    if args.json_path:
+        result = {
+            'host': args.host, 'users': args.users, 'spawn_rate': args.spawn_rate, 'duration': args.duration,
+            'seed': args.seed, 'think_scale': args.think_scale, 'scenarios': args.scenarios.split(','),
+            'elapsed': round(runner.elapsed, 2), 'endpoints': rows,
+        }
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 1 if rows[-1]['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
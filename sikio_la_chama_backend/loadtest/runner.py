@@ -0,0 +1,79 @@
+"""Spawn virtual users, run them for a fixed time and collect their stats."""
+import random
+import threading
+import time
+
+from .stats import Stats
+
+
+def assign_classes(user_classes, count):
+    """Class of each of `count` users, interleaved in proportion to the weights.
+
+    Deterministic, so a run with the same options spawns the same users in
+    the same order; every class gets a user once `count` allows it.
+    """
+    if not user_classes:
+        return []
+    total = sum(cls.weight for cls in user_classes)
+    assigned = {cls: 0 for cls in user_classes}
+    order = []
+    for index in range(count):
+        missing = [cls for cls in user_classes if not assigned[cls]]
+        if missing and count - index <= len(missing):
+            cls = missing[0]
+        else:
+            cls = max(user_classes, key=lambda c: c.weight * (index + 1) / total - assigned[c])
+        assigned[cls] += 1
+        order.append(cls)
+    return order
+
+
+class Runner:
+    def __init__(self, host, user_classes, seed=1, think_scale=1.0, timeout=30, options=None):
+        self.host = host
+        self.user_classes = user_classes
+        self.seed = seed
+        self.think_scale = think_scale
+        self.timeout = timeout
+        self.options = options or {}
+        self.stats = Stats()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.elapsed = 0.0
+
+    def run(self, users, spawn_rate, duration, on_tick=None, tick=10):
+        """Start `users` users at `spawn_rate` per second and stop them `duration` seconds after the first.
+
+        `on_tick(runner, elapsed)` is called every `tick` seconds while the
+        run is going. Requests in flight when the time is up are allowed to
+        finish.
+        """
+        start = time.monotonic()
+        deadline = start + duration
+        next_tick = start + tick
+        for index, cls in enumerate(assign_classes(self.user_classes, users)):
+            user = cls(
+                self.host, self.stats, random.Random(f'{self.seed}:{index}'), self.stop_event,
+                think_scale=self.think_scale, timeout=self.timeout, options=self.options,
+            )
+            thread = threading.Thread(target=user.run, name=f'loadtest-{cls.__name__}-{index}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+            if time.monotonic() >= deadline or self.stop_event.wait(1 / spawn_rate):
+                break
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if on_tick is not None and now >= next_tick:
+                on_tick(self, now - start)
+                next_tick += tick
+            self.stop_event.wait(min(deadline, next_tick) - now)
+        self.stop()
+        self.elapsed = time.monotonic() - start
+        for thread in self.threads:
+            thread.join(self.timeout)
+        return self.stats.summary(self.elapsed)
+
+    def stop(self):
+        self.stop_event.set()
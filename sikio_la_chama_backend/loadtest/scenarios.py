@@ -0,0 +1,129 @@
+"""The traffic mix: mobile app users and admin dashboard users.
+
+Weights are per-user shares of the tasks; think times are seconds between
+two actions of the same person. Both were picked to resemble a busy day
+and can be tuned here; `--think-scale` shrinks all think times at once to
+stress a server harder with the same mix.
+"""
+import uuid
+
+from .users import StopUser, VirtualUser, json_or_none, task
+
+REACTIONS = ('like', 'love', 'cry', 'smile')
+
+
+def _results(data):
+    """Items of a possibly paginated list response."""
+    if isinstance(data, dict):
+        return data.get('results') or []
+    return data or []
+
+
+class MobileUser(VirtualUser):
+    """An anonymous app user identified by its device id.
+
+    On start it logs in with a fresh device id (as the app does on first
+    launch) and loads the reference data needed to file a message. Most of
+    the time it re-opens the app; sometimes it reacts to a feed post, votes
+    in an open poll or submits a message.
+    """
+    weight = 20
+    think_time = (3, 15)
+
+    def on_start(self):
+        self.device_id = uuid.uuid4().hex
+        self.session.headers['Device-Id'] = self.device_id
+        data = json_or_none(self.post('/api/users/login/', 'users/login (device)', json={'device_id': self.device_id}))
+        if not data:
+            raise StopUser
+        self.session.headers['Authorization'] = f"Token {data['token']}"
+        self.departments = json_or_none(self.get('/api/messages/institutions/departments/', 'messages/departments')) or []
+        self.problem_types = json_or_none(self.get('/api/problem-types/', 'problem-types')) or []
+        self.feeds = []
+        self.polls = []
+        self.voted = set()
+        self.app_launch()
+
+    @task(8)
+    def app_launch(self):
+        self.feeds = json_or_none(self.get('/api/feeds/list/', 'feeds/list')) or self.feeds
+        self.get('/api/announcements/', 'announcements/list')
+        self.polls = _results(json_or_none(self.get('/api/polls/', 'polls/list'))) or self.polls
+        self.get('/api/notifications/', 'notifications/list')
+
+    @task(4)
+    def react(self):
+        if not self.feeds:
+            return
+        feed = self.rng.choice(self.feeds)
+        self.post(
+            f"/api/feeds/{feed['id']}/react/", 'feeds/react',
+            json={'reaction_type': self.rng.choice(REACTIONS)}, ok_statuses=(201,),
+        )
+
+    @task(2)
+    def vote(self):
+        open_polls = [
+            poll for poll in self.polls
+            if poll['id'] not in self.voted and not poll.get('has_voted') and len(poll['options']) >= 2
+        ]
+        if not open_polls:
+            return
+        poll = self.rng.choice(open_polls)
+        option = self.rng.choice(poll['options'])
+        self.voted.add(poll['id'])
+        # 400 is the poll not being open; anything else is a real failure
+        self.post(f"/api/polls/{poll['id']}/vote/", 'polls/vote', json={'option_ids': [option['id']]}, ok_statuses=(201, 400))
+
+    @task(1)
+    def send_message(self):
+        if not self.departments or not self.problem_types:
+            return
+        department = self.rng.choice(self.departments)
+        payload = {
+            'device_id': self.device_id,
+            'institution': department['institution_id'],
+            'department': department['id'],
+            'problem_type': self.rng.choice(self.problem_types)['id'],
+            'content': 'Maji hayatoki tangu jana asubuhi.',
+            'ward': 'Kariakoo',
+            'street': 'Uhuru',
+            'phone_number': '0700000000',
+        }
+        # 429 is the daily message quota doing its job
+        self.post('/api/messages/send/', 'messages/send', json=payload, ok_statuses=(201, 429))
+
+
+class AdminUser(VirtualUser):
+    """A staff member with the dashboard open, refreshing it now and then.
+
+    All admin users share the account given on the command line.
+    """
+    weight = 1
+    think_time = (10, 30)
+    unavailable_reason = 'needs --admin-username and --admin-password'
+
+    @classmethod
+    def available(cls, options):
+        return bool(options.get('admin_username') and options.get('admin_password'))
+
+    def on_start(self):
+        credentials = {'username': self.options['admin_username'], 'password': self.options['admin_password']}
+        data = json_or_none(self.post('/api/users/login/', 'users/login (admin)', json=credentials))
+        if not data:
+            raise StopUser
+        self.session.headers['Authorization'] = f"Token {data['token']}"
+        self.refresh_dashboard()
+
+    @task(1)
+    def refresh_dashboard(self):
+        self.get('/api/analytics/admin-stats/', 'analytics/admin-stats')
+        self.get('/api/messages/list/', 'messages/list (admin)')
+        self.get('/api/reports/', 'reports/list (admin)')
+        self.get('/api/notifications/', 'notifications/list')
+
+
+USER_CLASSES = {
+    'mobile': MobileUser,
+    'admin': AdminUser,
+}
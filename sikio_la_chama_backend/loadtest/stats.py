@@ -0,0 +1,91 @@
+"""Per-endpoint request statistics collected from all virtual users."""
+import math
+import threading
+from collections import Counter
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted `values` (pct in 0..100)."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+class EndpointStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []  # ms
+        self.failures = 0
+        self.statuses = Counter()
+        self.bytes = 0
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        row = {
+            'name': self.name,
+            'requests': count,
+            'failures': self.failures,
+            'rps': round(count / elapsed, 2) if elapsed else None,
+            'mean_ms': round(sum(latencies) / count, 1) if count else None,
+            'max_ms': round(latencies[-1], 1) if count else None,
+            'avg_bytes': self.bytes // count if count else None,
+            'statuses': {str(code): n for code, n in sorted(self.statuses.items(), key=lambda item: str(item[0]))},
+        }
+        for pct in PERCENTILES:
+            value = percentile(latencies, pct)
+            row[f'p{pct}_ms'] = round(value, 1) if value is not None else None
+        return row
+
+
+class Stats:
+    """Thread-safe collector; `record()` is called once per request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._total = EndpointStats('Total')
+
+    def record(self, name, latency_ms, status, ok, size=0):
+        """`status` is the HTTP status code, or an exception name when no response came back."""
+        with self._lock:
+            entry = self._endpoints.get(name)
+            if entry is None:
+                entry = self._endpoints[name] = EndpointStats(name)
+            for target in (entry, self._total):
+                target.latencies.append(latency_ms)
+                target.statuses[status] += 1
+                target.bytes += size
+                if not ok:
+                    target.failures += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self._total = EndpointStats('Total')
+
+    def summary(self, elapsed):
+        """Rows per endpoint sorted by name, then the aggregate row."""
+        with self._lock:
+            rows = [self._endpoints[name].summary(elapsed) for name in sorted(self._endpoints)]
+            return rows + [self._total.summary(elapsed)]
+
+
+def format_table(rows):
+    columns = [('name', 'Endpoint'), ('requests', 'Reqs'), ('failures', 'Fails'), ('rps', 'Req/s')]
+    columns += [(f'p{pct}_ms', f'p{pct} ms') for pct in PERCENTILES]
+    columns += [('max_ms', 'Max ms')]
+    cells = [[label for _, label in columns]]
+    cells += [['-' if row[key] is None else str(row[key]) for key, _ in columns] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    lines = []
+    for index, line in enumerate(cells):
+        if index == len(cells) - 1:
+            lines.append('  '.join('-' * width for width in widths))
+        lines.append('  '.join(
+            cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(line, widths))
+        ))
+    return '\n'.join(lines)
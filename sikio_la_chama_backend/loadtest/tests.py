@@ -0,0 +1,59 @@
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from institutions.models import Department, Institution
+from feeds.models import Feed, FeedReaction
+from polls.models import Poll, PollOption, PollVote
+from problem_types.models import ProblemType
+from user_messages.models import Message
+from users.models import User
+
+from .runner import Runner, assign_classes
+from .scenarios import AdminUser, MobileUser
+from .stats import Stats, format_table, percentile
+
+
+class StatsTests(SimpleTestCase):
+	def test_percentiles_and_failures(self):
+		stats = Stats()
+		for ms in range(1, 101):
+			stats.record('feeds/list', ms, 200, ok=True, size=10)
+		stats.record('messages/send', 5, 500, ok=False)
+		feeds, send, total = stats.summary(elapsed=10)
+		self.assertEqual((feeds['requests'], feeds['rps'], feeds['p50_ms'], feeds['p99_ms']), (100, 10.0, 50, 99))
+		self.assertEqual((send['failures'], send['statuses']), (1, {'500': 1}))
+		self.assertEqual((total['name'], total['requests'], total['failures']), ('Total', 101, 1))
+		self.assertIn('feeds/list', format_table([feeds, send, total]))
+		self.assertIsNone(percentile([], 50))
+
+	def test_classes_follow_weights(self):
+		order = assign_classes([MobileUser, AdminUser], 42)
+		self.assertEqual(order.count(AdminUser), 2)
+		self.assertEqual(order, assign_classes([MobileUser, AdminUser], 42))
+		# The smaller class still gets a user
+		self.assertEqual(assign_classes([MobileUser, AdminUser], 2), [MobileUser, AdminUser])
+
+
+class LoadTestRunTests(LiveServerTestCase):
+	def test_short_run_covers_the_traffic_mix(self):
+		admin = User.objects.create_user(username='admin', password='pw', user_type='admin', is_staff=True)
+		institution = Institution.objects.create(name='Water')
+		Department.objects.create(name='Leaks', institution=institution)
+		ProblemType.objects.create(name='Leak')
+		feed = Feed.objects.create(posted_by=admin, description='Update')
+		poll = Poll.objects.create(question='Which road first?')
+		PollOption.objects.bulk_create([PollOption(poll=poll, text=text) for text in ('Uhuru', 'Morogoro')])
+
+		runner = Runner(
+			self.live_server_url, [MobileUser, AdminUser], think_scale=0,
+			options={'admin_username': 'admin', 'admin_password': 'pw'},
+		)
+		rows = runner.run(users=2, spawn_rate=10, duration=3)
+
+		by_name = {row['name']: row for row in rows}
+		self.assertEqual(by_name['Total']['failures'], 0, rows)
+		for name in ('feeds/list', 'announcements/list', 'polls/list', 'notifications/list', 'feeds/react',
+				'polls/vote', 'messages/send', 'analytics/admin-stats'):
+			self.assertIn(name, by_name)
+		self.assertTrue(FeedReaction.objects.filter(feed=feed).exclude(reaction_type='viewed').exists())
+		self.assertEqual(PollVote.objects.filter(poll=poll).count(), 1)
+		self.assertTrue(Message.objects.exists())
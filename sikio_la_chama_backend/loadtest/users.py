@@ -0,0 +1,109 @@
+"""Virtual users: an HTTP session, weighted tasks and think times.
+
+Subclasses declare tasks with the `task` decorator, in the manner of
+locust::
+
+    class Reader(VirtualUser):
+        weight = 3              # share of the simulated users
+        think_time = (2, 10)    # seconds between tasks, uniformly drawn
+
+        @task(5)
+        def browse(self):
+            self.get('/api/feeds/list/', name='feeds/list')
+
+A user runs `on_start()` once, then picks a task at random in proportion
+to the weights and sleeps a think time, until the run is stopped.
+"""
+import time
+
+import requests
+
+DEFAULT_TIMEOUT = 30
+
+
+def task(weight=1):
+    def decorate(func):
+        func.task_weight = weight
+        return func
+    return decorate
+
+
+class VirtualUser:
+    weight = 1
+    think_time = (1, 5)
+    unavailable_reason = ''
+
+    def __init__(self, host, stats, rng, stop_event, think_scale=1.0, timeout=DEFAULT_TIMEOUT, options=None):
+        self.host = host.rstrip('/')
+        self.stats = stats
+        self.rng = rng
+        self.stop_event = stop_event
+        self.think_scale = think_scale
+        self.timeout = timeout
+        self.options = options or {}
+        self.session = requests.Session()
+        self._tasks = [
+            (getattr(self, name), getattr(getattr(type(self), name), 'task_weight'))
+            for name in dir(type(self)) if hasattr(getattr(type(self), name), 'task_weight')
+        ]
+
+    @classmethod
+    def available(cls, options):
+        """Whether this kind of user can run with the given options."""
+        return True
+
+    def on_start(self):
+        pass
+
+    def run(self):
+        try:
+            self.on_start()
+            funcs, weights = zip(*self._tasks)
+            while not self.stop_event.is_set():
+                self.rng.choices(funcs, weights)[0]()
+                self.think()
+        except StopUser:
+            pass
+        finally:
+            self.session.close()
+
+    def think(self):
+        low, high = self.think_time
+        self.stop_event.wait(self.rng.uniform(low, high) * self.think_scale)
+
+    def request(self, method, path, name, ok_statuses=None, **kwargs):
+        """Send a request and record it under `name`; return the response, or None on a network error.
+
+        A response is a failure if its status is not in `ok_statuses` or,
+        by default, is 400 or above.
+        """
+        start = time.perf_counter()
+        try:
+            # Not streamed, so this returns once the whole body has been read
+            response = self.session.request(method, self.host + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.stats.record(name, (time.perf_counter() - start) * 1000, type(e).__name__, ok=False)
+            return None
+        latency_ms = (time.perf_counter() - start) * 1000
+        ok = response.status_code in ok_statuses if ok_statuses else response.status_code < 400
+        self.stats.record(name, latency_ms, response.status_code, ok, len(response.content))
+        return response
+
+    def get(self, path, name, **kwargs):
+        return self.request('GET', path, name, **kwargs)
+
+    def post(self, path, name, **kwargs):
+        return self.request('POST', path, name, **kwargs)
+
+
+class StopUser(Exception):
+    """Raised by a user that can't go on (e.g. its login failed)."""
+
+
+def json_or_none(response):
+    if response is None or response.status_code >= 400:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        # Import checks to register them
+        from . import checks  # noqa: F401
+        from .middleware import install_serializer_timing
+
+        install_serializer_timing()
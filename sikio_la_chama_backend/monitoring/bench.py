@@ -0,0 +1,157 @@
+"""In-process benchmark of the key API endpoints.
+
+Requests go through the full middleware/URL/view stack with Django's test
+`Client` against the configured database (seed it with
+``manage.py seed_synthetic_data`` first). Each endpoint is timed over
+several runs; endpoints marked `writes` run in a rolled-back transaction so
+repeated benchmarks see the same data.
+"""
+import math
+import statistics
+import time
+import uuid
+from contextlib import ExitStack, nullcontext
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.test import Client, override_settings
+
+from polls.models import PollOption
+from users.models import User
+
+from .middleware import RequestStats
+from .synthetic import SYNTHETIC_PREFIX
+
+BENCH_ADMIN = f'{SYNTHETIC_PREFIX}bench_admin'
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    client: str = 'anonymous'  # or 'admin'
+    data: dict = None
+    headers: dict = None
+    writes: bool = False
+    # Defeat per-URL caches (admin stats) by making each run's URL unique
+    unique_query: bool = False
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (pct in 0..100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def bench_admin():
+    admin, created = User.objects.get_or_create(
+        username=BENCH_ADMIN, defaults={'user_type': 'admin', 'is_staff': True},
+    )
+    if created:
+        admin.set_unusable_password()
+        admin.save(update_fields=['password'])
+    return admin
+
+
+def default_endpoints():
+    """The endpoints to benchmark, parameterised from the seeded data."""
+    device_user = (
+        User.objects.filter(username__startswith=SYNTHETIC_PREFIX, sent_messages__isnull=False)
+        .order_by('id').first()
+    )
+    endpoints = [
+        Endpoint('feeds/list', 'get', '/api/feeds/list/'),
+        Endpoint('messages/list (admin)', 'get', '/api/messages/list/', client='admin'),
+        Endpoint('analytics/admin-stats', 'get', '/api/analytics/admin-stats/', client='admin', unique_query=True),
+        Endpoint('polls/list', 'get', '/api/polls/'),
+        Endpoint('reports/list (admin)', 'get', '/api/reports/', client='admin'),
+    ]
+    if device_user is not None:
+        endpoints.insert(2, Endpoint(
+            'messages/list (device)', 'get', '/api/messages/list/', headers={'HTTP_DEVICE_ID': device_user.device_id},
+        ))
+    option = PollOption.objects.filter(poll__question__startswith=SYNTHETIC_PREFIX).order_by('poll_id', 'id').first()
+    if option is not None:
+        # A new device votes on each run
+        endpoints.append(Endpoint(
+            'polls/vote', 'post', f'/api/polls/{option.poll_id}/vote/', data={'option_ids': [option.id]}, writes=True,
+        ))
+    return endpoints
+
+
+def _request(client, endpoint):
+    path = endpoint.path
+    if endpoint.unique_query:
+        path += ('&' if '?' in path else '?') + f'_bench={uuid.uuid4().hex}'
+    headers = dict(endpoint.headers or {})
+    if endpoint.writes:
+        headers.setdefault('HTTP_DEVICE_ID', f'{SYNTHETIC_PREFIX}bench_{uuid.uuid4().hex[:12]}')
+    kwargs = {'content_type': 'application/json'} if endpoint.data is not None else {}
+    return getattr(client, endpoint.method)(path, endpoint.data, **kwargs, **headers)
+
+
+def measure(endpoint, clients, repeat, warmup=1):
+    client = clients[endpoint.client]
+    timings, queries, sizes, statuses = [], [], [], []
+    for run in range(warmup + repeat):
+        stats = RequestStats()
+        with transaction.atomic() if endpoint.writes else nullcontext():
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.execute_wrapper))
+                start = time.perf_counter()
+                response = _request(client, endpoint)
+                elapsed = time.perf_counter() - start
+            if endpoint.writes:
+                transaction.set_rollback(True)
+        if run < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(stats.queries)
+        sizes.append(len(response.content))
+        statuses.append(response.status_code)
+    return {
+        'name': endpoint.name,
+        'runs': repeat,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': int(statistics.median(queries)),
+        'max_queries': max(queries),
+        'bytes': int(statistics.median(sizes)),
+        'errors': sum(1 for code in statuses if code >= 400),
+    }
+
+
+def run(endpoints=None, repeat=20, warmup=1):
+    endpoints = endpoints if endpoints is not None else default_endpoints()
+    admin_client = Client(raise_request_exception=False)
+    admin_client.force_login(bench_admin())
+    clients = {'anonymous': Client(raise_request_exception=False), 'admin': admin_client}
+    # Report over-budget routes instead of failing them, and accept the
+    # test client's host name.
+    with override_settings(QUERY_BUDGET_ACTION='log', ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        return [measure(endpoint, clients, repeat, warmup) for endpoint in endpoints]
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Return regressions of `results` against a previous run's results.
+
+    Query counts may not grow at all; p95 latency may grow by `tolerance`.
+    """
+    previous = {row['name']: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row['name'])
+        if before is None:
+            continue
+        if row['queries'] > before['queries']:
+            regressions.append(f"{row['name']}: {before['queries']} -> {row['queries']} queries")
+        if row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{row['name']}: p95 {before['p95_ms']} -> {row['p95_ms']} ms")
+    return regressions
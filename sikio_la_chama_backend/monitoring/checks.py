@@ -0,0 +1,79 @@
+"""System checks for the database configuration and connection.
+
+The connection check is tagged ``database``, so it runs on ``migrate`` and
+on ``manage.py check --database default``, which a start command can run
+before launching gunicorn. It fails when a database can't be reached and
+warns when the server is close to its connection limit.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+from sikio_la_chama_backend.database import pool_supported
+
+# Warn once this share of the server's max_connections is in use
+CONNECTION_USAGE_WARNING = 0.8
+
+
+@register(Tags.compatibility)
+def check_database_pool(app_configs, **kwargs):
+    if getattr(settings, 'DB_POOL', False) and not pool_supported():
+        return [Warning(
+            'DB_POOL is set but connection pooling needs Django 5.1+ and psycopg[pool]; '
+            'connections are kept per thread (DB_CONN_MAX_AGE) instead.',
+            id='monitoring.W001',
+        )]
+    return []
+
+
+@register(Tags.database)
+def check_database_connection(app_configs, databases=None, **kwargs):
+    messages = []
+    for alias in databases or ():
+        connection = connections[alias]
+        start = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                if connection.vendor == 'postgresql':
+                    cursor.execute(
+                        "SELECT current_setting('max_connections')::int, (SELECT count(*) FROM pg_stat_activity)"
+                    )
+                    max_connections, in_use = cursor.fetchone()
+                    messages += _connection_budget(alias, max_connections, in_use)
+        except DatabaseError as e:
+            messages.append(Error(f'Cannot connect to database {alias!r}: {e}', id='monitoring.E001'))
+            continue
+        finally:
+            # Don't keep a connection open just for the check
+            if not connection.in_atomic_block:
+                connection.close()
+        latency = time.perf_counter() - start
+        if latency > 1:
+            messages.append(Warning(
+                f'Connecting to database {alias!r} and running the health check took {latency:.1f}s.',
+                id='monitoring.W002',
+            ))
+    return messages
+
+
+def _connection_budget(alias, max_connections, in_use):
+    messages = []
+    if in_use >= max_connections * CONNECTION_USAGE_WARNING:
+        messages.append(Warning(
+            f'Database {alias!r} has {in_use} of {max_connections} connections in use.',
+            hint='Lower the number of workers or DB_POOL_MAX_SIZE, or put pgbouncer in front (DB_PGBOUNCER).',
+            id='monitoring.W003',
+        ))
+    workers = int(os.environ.get('WEB_CONCURRENCY') or 0)
+    pool = settings.DATABASES[alias].get('OPTIONS', {}).get('pool')
+    if workers and isinstance(pool, dict) and workers * pool.get('max_size', 0) > max_connections:
+        messages.append(Warning(
+            f"{workers} workers with pools of up to {pool['max_size']} connections can exceed "
+            f"database {alias!r}'s limit of {max_connections} connections.",
+            id='monitoring.W004',
+        ))
+    return messages
@@ -0,0 +1,115 @@
+"""Logging plumbing: request ids, JSON records and a non-blocking handler.
+
+`RequestIdMiddleware` puts the request's id in `request_id`, a context
+variable; `RequestIdFilter` stamps it on every record, so log lines from
+one request can be grouped. `JsonFormatter` renders a record as one JSON
+object per line. `QueueHandler` hands records to a background thread
+which formats and writes them, so a slow stderr/pipe never blocks a
+request thread. Settings wire these up in ``LOGGING``.
+
+This module is imported while settings are configured, so it must not
+import models or read settings at import time.
+"""
+import contextvars
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+def current_request_id():
+    return request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Set ``record.request_id`` to the id of the request being handled (or None).
+
+    Django logs 4xx/5xx responses (``django.request``) after the middleware
+    has returned and the context variable is reset, but passes the request
+    along; its id is taken from there.
+    """
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = (
+                request_id.get() or getattr(getattr(record, 'request', None), 'request_id', None)
+            )
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with time, level, logger, message and request id.
+
+    Values passed with ``extra=`` are included as additional keys.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Queue records for a listener thread that writes them to a stream.
+
+    Filters run on the logging thread (so context variables such as the
+    request id are read there) and the message is merged with its args
+    there too, since args may be mutated once the call returns. Formatting
+    and I/O happen on the listener thread. When the bounded queue is full,
+    records are dropped and counted in `dropped` rather than blocking.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        # dictConfig's "formatter" applies to the output, not the queue
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until the listener has written everything queued so far."""
+        if self.listener._thread is not None:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+        super().close()
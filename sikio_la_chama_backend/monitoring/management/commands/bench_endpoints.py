@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the key API endpoints in-process against the current database and report "
+        "p50/p95 latency, query counts and response sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per endpoint first.')
+        parser.add_argument('--only', action='append', default=[], help='Benchmark only endpoints whose name contains this.')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+        parser.add_argument('--compare', help='Fail if results regress against this earlier --json file.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative p95 growth with --compare (query counts may not grow).')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+        endpoints = bench.default_endpoints()
+        if options['only']:
+            endpoints = [e for e in endpoints if any(part in e.name for part in options['only'])]
+        results = bench.run(endpoints, repeat=options['repeat'], warmup=options['warmup'])
+
+        header = f"{'endpoint':<26} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'queries':>8} {'bytes':>10} {'errors':>6}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in results:
+            self.stdout.write(
+                f"{row['name']:<26} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['max_ms']:>9.2f} "
+                f"{row['queries']:>8} {row['bytes']:>10} {row['errors']:>6}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+        if options['compare']:
+            with open(options['compare']) as f:
+                regressions = bench.compare(results, json.load(f), options['tolerance'])
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions against the baseline")
@@ -0,0 +1,90 @@
+import logging
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from monitoring import logs
+
+
+class SlowStream:
+    """A stream whose writes take `latency` seconds, like a backed-up pipe."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def write(self, text):
+        time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the request-thread cost of log calls: level-gated calls with %-style "
+        "and f-string messages, and emitted records through the queue or a plain stream handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=20000, help='Log calls per case.')
+        parser.add_argument('--write-latency', type=float, default=0.5,
+                            help='Milliseconds per write for the slow-stream cases.')
+
+    def handle(self, *args, **options):
+        calls = options['calls']
+        payload = {'title': 'Maji', 'institution': 3, 'department': 7, 'content': 'Hakuna maji tangu jana ' * 10}
+        logger = logging.getLogger('monitoring.bench_logging')
+        logger.propagate = False
+        devnull = open(os.devnull, 'w')
+        queued = logs.QueueHandler(stream=devnull, queue_size=calls + 1)
+        queued.setFormatter(logs.JsonFormatter())
+        queued.addFilter(logs.RequestIdFilter())
+        direct = logging.StreamHandler(devnull)
+        direct.setFormatter(logs.JsonFormatter())
+        direct.addFilter(logs.RequestIdFilter())
+        slow = SlowStream(options['write_latency'] / 1000)
+        slow_queued = logs.QueueHandler(stream=slow, queue_size=calls + 1)
+        slow_queued.setFormatter(logs.JsonFormatter())
+        slow_direct = logging.StreamHandler(slow)
+        slow_direct.setFormatter(logs.JsonFormatter())
+        slow_calls = max(1, calls // 100)
+
+        def timed(handler, level, call, count=calls):
+            logger.handlers = [handler]
+            logger.setLevel(level)
+            start = time.perf_counter()
+            for _ in range(count):
+                call()
+            elapsed = time.perf_counter() - start
+            handler.flush()
+            return elapsed / count * 1e6
+
+        cases = [
+            ('debug off, %-style args', direct, logging.INFO,
+             lambda: logger.debug("creating feed with data: %s", payload)),
+            ('debug off, f-string', direct, logging.INFO,
+             lambda: logger.debug(f"creating feed with data: {payload}")),
+            ('info on, queue handler (JSON)', queued, logging.INFO,
+             lambda: logger.info("creating feed with data: %s", payload)),
+            ('info on, stream handler (JSON)', direct, logging.INFO,
+             lambda: logger.info("creating feed with data: %s", payload)),
+        ]
+        slow_cases = [
+            ('slow stream, queue handler', slow_queued, logging.INFO,
+             lambda: logger.info("creating feed with data: %s", payload)),
+            ('slow stream, stream handler', slow_direct, logging.INFO,
+             lambda: logger.info("creating feed with data: %s", payload)),
+        ]
+        token = logs.request_id.set('bench')
+        try:
+            self.stdout.write(f"{'case':<34} {'us/call':>9}")
+            for name, handler, level, call in cases:
+                self.stdout.write(f"{name:<34} {timed(handler, level, call):>9.2f}")
+            for name, handler, level, call in slow_cases:
+                self.stdout.write(f"{name:<34} {timed(handler, level, call, slow_calls):>9.2f}")
+        finally:
+            logs.request_id.reset(token)
+            queued.close()
+            slow_queued.close()
+            devnull.close()
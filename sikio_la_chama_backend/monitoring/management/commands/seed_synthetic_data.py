@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset (users, institutions, messages with replies, feeds with "
+        "reactions and shares, polls with votes, reports) for benchmarking. Never run against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier on the base row counts (1.0 is ~500 users, 2000 messages).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for reproducible content.')
+        parser.add_argument('--purge', action='store_true', help='Delete previously generated data instead.')
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            self.stdout.write(f"Deleted {synthetic.purge()} synthetic rows")
+            return
+        if options['scale'] <= 0:
+            raise CommandError("--scale must be positive")
+        created = synthetic.generate(scale=options['scale'], seed=options['seed'], stdout=self.stdout)
+        self.stdout.write(f"Created {sum(created.values())} rows")
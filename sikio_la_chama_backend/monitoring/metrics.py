@@ -0,0 +1,152 @@
+"""In-process metric registry rendered in the Prometheus text format.
+
+Each worker process aggregates its own requests; scrape every worker (or
+sum across the per-process series) to get the whole deployment.
+"""
+import math
+import threading
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}_total{_labels(self.labelnames, labels)} {_number(value)}'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, labels):
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            for bound, count in zip(self.buckets, series):
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", _number(bound))])} {count}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-2])}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}'
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            name = metric.name + ('_total' if metric.kind == 'counter' else '')
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+ROUTE_LABELS = ('route', 'method')
+
+request_duration = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Time spent handling the request.', DURATION_BUCKETS, ROUTE_LABELS,
+))
+db_queries = REGISTRY.register(Histogram(
+    'http_request_db_queries', 'Database queries executed per request.', QUERY_BUCKETS, ROUTE_LABELS,
+))
+db_duration = REGISTRY.register(Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request.', DURATION_BUCKETS, ROUTE_LABELS,
+))
+view_duration = REGISTRY.register(Histogram(
+    'http_request_view_duration_seconds', 'Time spent in the view, serializers included.', DURATION_BUCKETS, ROUTE_LABELS,
+))
+serialize_duration = REGISTRY.register(Histogram(
+    'http_request_serialize_duration_seconds', 'Time spent building serializer data, its queries included.',
+    DURATION_BUCKETS, ROUTE_LABELS,
+))
+render_duration = REGISTRY.register(Histogram(
+    'http_response_render_duration_seconds', 'Time spent rendering the response body (JSON render).',
+    DURATION_BUCKETS, ROUTE_LABELS,
+))
+response_size = REGISTRY.register(Histogram(
+    'http_response_size_bytes', 'Response body size.', SIZE_BUCKETS, ROUTE_LABELS,
+))
+responses = REGISTRY.register(Counter(
+    'http_responses', 'Responses by route, method and status code.', ROUTE_LABELS + ('status',),
+))
+budget_exceeded = REGISTRY.register(Counter(
+    'http_request_query_budget_exceeded', 'Requests that ran more queries than their route budget.', ROUTE_LABELS,
+))
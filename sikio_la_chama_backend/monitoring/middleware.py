@@ -0,0 +1,221 @@
+import contextvars
+import logging
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import logs, metrics
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = '<unmatched>'
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Ids from a proxy or client are reused only if they look like ids
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+    """Per-request counters filled in by the database execute wrapper,
+    the serializer hook and the middleware's view/render callbacks."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_time = None
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self._view_started = None
+        self._render_started = None
+        self._serializing = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    def view_started(self):
+        self._view_started = time.perf_counter()
+
+    def view_finished(self):
+        if self._view_started is not None and self.view_time is None:
+            self.view_time = time.perf_counter() - self._view_started
+
+    def render_started(self):
+        self._render_started = time.perf_counter()
+
+    def render_finished(self, response=None):
+        if self._render_started is not None:
+            self.render_time += time.perf_counter() - self._render_started
+            self._render_started = None
+
+
+# Stats of the request being handled, for the serializer hook
+current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def _timed_data(data):
+    """Wrap a serializer's ``data`` property to add its time to the request's stats.
+
+    Only the outermost ``.data`` is timed: serializers built inside a
+    SerializerMethodField run within it. The time includes the queries
+    serialization runs (N+1s show up here).
+    """
+    getter = data.fget
+
+    def timed(serializer):
+        stats = current_stats.get()
+        if stats is None or stats._serializing:
+            return getter(serializer)
+        stats._serializing = True
+        start = time.perf_counter()
+        try:
+            return getter(serializer)
+        finally:
+            stats.serialize_time += time.perf_counter() - start
+            stats._serializing = False
+
+    timed.monitoring_timed = True
+    return property(timed, doc=data.__doc__)
+
+
+def install_serializer_timing():
+    """Time ``Serializer.data`` and ``ListSerializer.data``; called from the app's ready()."""
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for cls in (Serializer, ListSerializer):
+        if not getattr(cls.data.fget, 'monitoring_timed', False):
+            cls.data = _timed_data(cls.data)
+
+
+class RequestIdMiddleware:
+    """Give every request an id, for log records and the ``X-Request-ID`` header.
+
+    An incoming ``X-Request-ID`` (set by a proxy or the app) is kept when it
+    looks sane; otherwise a new one is generated. Place it first.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        request.request_id = incoming if VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = logs.request_id.set(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            logs.request_id.reset(token)
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+
+def route_for(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else UNMATCHED_ROUTE
+
+
+def query_budget(request, route):
+    """The query budget for the request's route, url name or the default."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if route in budgets:
+        return budgets[route]
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.view_name in budgets:
+        return budgets[match.view_name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+
+
+class RequestMetricsMiddleware:
+    """Measure queries, DB, view, serializer and render time and size of every response.
+
+    View time runs from the view's call until it returns its response.
+    Serializer time is the part of it spent building ``serializer.data``
+    (see `install_serializer_timing`), render time the JSON encoding DRF
+    does after the view returns.
+
+    The numbers go to the `monitoring.metrics` histograms (served by
+    `MetricsView`) and, when ``METRICS_SERVER_TIMING`` is on, to a
+    ``Server-Timing`` header browsers' dev tools display. A request running
+    more queries than its budget (``QUERY_BUDGETS`` by route pattern or
+    url name, else ``QUERY_BUDGET_DEFAULT``) is logged, or raises
+    `QueryBudgetExceeded` when ``QUERY_BUDGET_ACTION`` is ``raise``.
+    Place it first so the timings cover the rest of the middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = request.metrics = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        # Responses that aren't rendered later end the view time here
+        stats.view_finished()
+        total = time.perf_counter() - start
+        self.record(request, response, stats, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, 'metrics', None)
+        if stats is not None:
+            stats.view_started()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (JSON-encoded) after the view returns.
+        stats = getattr(request, 'metrics', None)
+        if stats is not None:
+            stats.view_finished()
+            stats.render_started()
+            response.add_post_render_callback(stats.render_finished)
+        return response
+
+    def record(self, request, response, stats, total):
+        route = route_for(request)
+        labels = (route, request.method)
+        size = len(response.content) if not response.streaming else None
+        metrics.request_duration.observe(labels, total)
+        metrics.db_queries.observe(labels, stats.queries)
+        metrics.db_duration.observe(labels, stats.db_time)
+        if stats.view_time is not None:
+            metrics.view_duration.observe(labels, stats.view_time)
+        metrics.serialize_duration.observe(labels, stats.serialize_time)
+        metrics.render_duration.observe(labels, stats.render_time)
+        if size is not None:
+            metrics.response_size.observe(labels, size)
+        metrics.responses.inc(labels + (str(response.status_code),))
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', settings.DEBUG):
+            timings = [f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"']
+            if stats.view_time is not None:
+                timings.append(f'view;dur={stats.view_time * 1000:.1f}')
+            timings += [
+                f'serialize;dur={stats.serialize_time * 1000:.1f}',
+                f'render;dur={stats.render_time * 1000:.1f};desc="JSON render"',
+                f'total;dur={total * 1000:.1f}',
+            ]
+            response['Server-Timing'] = ', '.join(timings)
+
+        budget = query_budget(request, route)
+        if budget is not None and stats.queries > budget:
+            metrics.budget_exceeded.inc(labels)
+            if getattr(settings, 'QUERY_BUDGET_ACTION', 'log') == 'raise':
+                raise QueryBudgetExceeded(f"{request.method} {route} ran {stats.queries} queries (budget {budget})")
+            logger.warning("%s %s ran %d queries (budget %d)", request.method, route, stats.queries, budget)
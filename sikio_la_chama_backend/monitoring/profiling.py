@@ -0,0 +1,333 @@
+"""Opt-in profiles of slow or explicitly flagged requests.
+
+With ``PROFILING_ENABLED`` on, `ProfilingMiddleware` keeps two kinds of
+profile, each stored with the request's SQL log:
+
+* Requests that take longer than ``PROFILING_THRESHOLD`` seconds. A single
+  background thread samples the stacks of requests still running after
+  ``PROFILING_SAMPLE_AFTER`` seconds, so fast requests cost a dict insert
+  and the SQL log. The profile is a list of "folded" stacks with sample
+  counts, which flamegraph.pl and speedscope both read.
+* Requests from staff users that carry the ``PROFILING_HEADER`` header.
+  They run under cProfile; the stats are kept as text and as a `.prof`
+  file for pstats/snakeviz. The caller's token or session is checked
+  before the profiler starts, and the header is ignored for anyone else.
+
+Profiles are JSON files in ``PROFILING_DIR``, and only the newest
+``PROFILING_KEEP`` are kept. `ProfileListView` and `ProfileDownloadView`
+serve them to admins. When profiling is disabled the middleware removes
+itself from the stack.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .middleware import route_for
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 2.0
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_KEEP = 50
+DEFAULT_HEADER = 'X-Profile'
+MAX_LOGGED_QUERIES = 1000
+MAX_STACK_DEPTH = 100
+PROFILE_ID_RE = re.compile(r'^[0-9]{13}-[0-9a-f]{8}$')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def profile_dir():
+    return _setting('PROFILING_DIR', os.path.join(settings.BASE_DIR, 'profiles'))
+
+
+class SqlLog:
+    """Database execute wrapper recording each statement and its duration."""
+
+    def __init__(self, limit=MAX_LOGGED_QUERIES):
+        self.limit = limit
+        self.entries = []
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            if len(self.entries) < self.limit:
+                self.entries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'ms': round((time.perf_counter() - start) * 1000, 3),
+                })
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})'
+
+
+def _folded_stack(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler:
+    """One daemon thread sampling the stacks of long-running requests.
+
+    Requests register their thread on entry. The thread sleeps until the
+    oldest registered request has been running for `sample_after` seconds,
+    and only then wakes every `interval` to sample the requests that are
+    due; fast requests never wake it.
+    """
+
+    def __init__(self, interval, sample_after):
+        self.interval = interval
+        self.sample_after = sample_after
+        self._active = {}  # thread id -> (started, Counter of folded stacks)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, ident):
+        samples = Counter()
+        with self._lock:
+            self._active[ident] = (time.monotonic(), samples)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return samples
+
+    def stop(self, ident):
+        with self._lock:
+            self._active.pop(ident, None)
+
+    def sample_once(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [(ident, samples) for ident, (started, samples) in self._active.items()
+                   if now - started >= self.sample_after]
+            if not due:
+                return
+            # Under the lock, so a request never reads its samples mid-update
+            frames = sys._current_frames()
+            for ident, samples in due:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[_folded_stack(frame)] += 1
+
+    def next_delay(self):
+        """Seconds until the next sample is due, or None when no request is running."""
+        with self._lock:
+            if not self._active:
+                self._wakeup.clear()
+                return None
+            oldest = min(started for started, _ in self._active.values())
+        return max(self.interval, oldest + self.sample_after - time.monotonic())
+
+    def _run(self):
+        while True:
+            delay = self.next_delay()
+            if delay is None:
+                self._wakeup.wait()
+                continue
+            # Requests registered meanwhile started later, so they aren't due earlier
+            time.sleep(delay)
+            self.sample_once()
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            interval = _setting('PROFILING_SAMPLE_INTERVAL', DEFAULT_SAMPLE_INTERVAL)
+            threshold = _setting('PROFILING_THRESHOLD', DEFAULT_THRESHOLD)
+            _sampler = Sampler(interval, _setting('PROFILING_SAMPLE_AFTER', threshold / 4))
+        return _sampler
+
+
+# Ring buffer on disk
+
+def save_profile(data, pstats_profile=None):
+    """Write a profile and drop the oldest beyond ``PROFILING_KEEP``; return its id."""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f'{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}'
+    data = {'id': profile_id, **data}
+    tmp_path = os.path.join(directory, f'.{profile_id}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=1, default=str)
+    if pstats_profile is not None:
+        pstats_profile.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+    os.replace(tmp_path, os.path.join(directory, f'{profile_id}.json'))
+    prune(_setting('PROFILING_KEEP', DEFAULT_KEEP))
+    return profile_id
+
+
+def profile_ids():
+    """Ids of the stored profiles, newest first."""
+    try:
+        names = os.listdir(profile_dir())
+    except FileNotFoundError:
+        return []
+    ids = [name[:-5] for name in names if name.endswith('.json') and PROFILE_ID_RE.match(name[:-5])]
+    return sorted(ids, reverse=True)
+
+
+def prune(keep):
+    for profile_id in profile_ids()[keep:]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(profile_dir(), profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def profile_path(profile_id, suffix='.json'):
+    """Path of a stored profile file, or None for an unknown or malformed id."""
+    if not PROFILE_ID_RE.match(profile_id or ''):
+        return None
+    path = os.path.join(profile_dir(), profile_id + suffix)
+    return path if os.path.exists(path) else None
+
+
+def load_summary(profile_id):
+    path = profile_path(profile_id)
+    if path is None:
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    return {key: data.get(key) for key in (
+        'id', 'created_at', 'trigger', 'method', 'path', 'route', 'status', 'duration_ms', 'query_count', 'user',
+    )}
+
+
+def _pstats_text(profiler, limit=60):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+def is_staff_request(request):
+    """Whether the request's API token or session belongs to an active staff user.
+
+    The middleware runs before Django's and DRF's authentication, so the
+    credentials are resolved here.
+    """
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    if authenticated is not None:
+        user = authenticated[0]
+    else:
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not session_key:
+            return False
+        session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        user = get_user(SimpleNamespace(session=session))
+    return bool(user.is_active and user.is_staff)
+
+
+class ProfilingMiddleware:
+    """Profile requests slower than ``PROFILING_THRESHOLD`` or flagged by staff.
+
+    Place it right after `RequestMetricsMiddleware`. The header is honoured
+    only for staff tokens and sessions (see `is_staff_request`), so other
+    clients can't make requests run under cProfile.
+    """
+
+    def __init__(self, get_response):
+        if not _setting('PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = _setting('PROFILING_THRESHOLD', DEFAULT_THRESHOLD)
+        self.header = _setting('PROFILING_HEADER', DEFAULT_HEADER)
+        self.sampler = get_sampler()
+
+    def __call__(self, request):
+        flagged = bool(request.headers.get(self.header)) and is_staff_request(request)
+        ident = threading.get_ident()
+        sql_log = SqlLog()
+        profiler = cProfile.Profile() if flagged else None
+        samples = self.sampler.start(ident)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sql_log))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            self.sampler.stop(ident)
+        duration = time.perf_counter() - start
+
+        if profiler is None and duration < self.threshold:
+            return response
+        try:
+            self.store(request, response, duration, sql_log, profiler, samples)
+        except OSError:
+            logger.exception("Could not store the profile of %s %s", request.method, request.path)
+        return response
+
+    def store(self, request, response, duration, sql_log, profiler, samples):
+        user = getattr(request, 'user', None)
+        data = {
+            'created_at': timezone.now().isoformat(),
+            'trigger': 'header' if profiler is not None else 'threshold',
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': route_for(request),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'user': user.username if getattr(user, 'is_authenticated', False) else None,
+            'request_id': getattr(request, 'request_id', None),
+            'query_count': sql_log.count,
+            'queries': sql_log.entries,
+        }
+        if profiler is not None:
+            data['pstats'] = _pstats_text(profiler)
+        else:
+            data['sample_interval_ms'] = self.sampler.interval * 1000
+            data['sampled_after_ms'] = self.sampler.sample_after * 1000
+            data['folded_stacks'] = [f'{stack} {count}' for stack, count in samples.most_common()]
+        profile_id = save_profile(data, profiler)
+        logger.info("Stored profile %s of %s %s (%.2fs)", profile_id, request.method, request.path, duration)
+        return profile_id
@@ -0,0 +1,221 @@
+"""Synthetic datasets for benchmarking.
+
+Everything is written with `bulk_create`, so model ``save()`` logic
+(message quotas, reply slots) and post_save signals (pushes, image jobs)
+are bypassed; the denormalized counters they maintain are filled in
+directly. Generated rows are recognisable by the ``SYNTHETIC_PREFIX`` on
+usernames, institution names, poll questions and titles, which is how
+`purge()` finds them again.
+"""
+import random
+import secrets
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from catalog import versions
+from feeds.models import Feed, FeedReaction, FeedShare
+from institutions.models import Department, Institution
+from polls.models import Poll, PollOption, PollVote
+from problem_types.models import ProblemType
+from reports.models import Report
+from user_messages.models import MAX_REPLIES_PER_MESSAGE, Message, Reply
+from users.models import User
+
+SYNTHETIC_PREFIX = 'syn_'
+BATCH_SIZE = 1000
+
+# Row counts at scale 1.0
+BASE_COUNTS = {
+    'users': 500,
+    'institutions': 10,
+    'departments_per_institution': 5,
+    'problem_types': 8,
+    'messages': 2000,
+    'feeds': 100,
+    'reactions_per_feed': 40,
+    'shares_per_feed': 5,
+    'polls': 20,
+    'options_per_poll': 4,
+    'votes_per_poll': 150,
+    'reports': 1000,
+}
+
+WARDS = ['Kariakoo', 'Upanga', 'Mikocheni', 'Sinza', 'Kinondoni', 'Temeke', 'Ilala', 'Mbagala']
+WORDS = (
+    'maji umeme barabara taka afya shule hospitali soko usafiri mfereji '
+    'water power road waste clinic school market transport drainage leak outage'
+).split()
+# Around Dar es Salaam
+CENTER = (-6.7924, 39.2083)
+
+
+def counts_for(scale):
+    # Per-parent fan-out stays fixed; the number of parents scales.
+    return {
+        name: count if '_per_' in name else max(1, round(count * scale))
+        for name, count in BASE_COUNTS.items()
+    }
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate(scale=1.0, seed=0, stdout=None):
+    """Create a synthetic dataset; return the number of rows per model."""
+    rng = random.Random(seed)
+    counts = counts_for(scale)
+    created = {}
+    password = make_password(None)
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    # Tags this run's unique names so repeated runs don't collide
+    run = secrets.token_hex(3)
+
+    with transaction.atomic():
+        institutions = Institution.objects.bulk_create([
+            Institution(name=f'{SYNTHETIC_PREFIX}{run} Institution {i}', description=_text(rng, 12))
+            for i in range(counts['institutions'])
+        ], batch_size=BATCH_SIZE)
+        departments = Department.objects.bulk_create([
+            Department(name=f'Department {j}', institution=institution, description=_text(rng, 8))
+            for institution in institutions
+            for j in range(counts['departments_per_institution'])
+        ], batch_size=BATCH_SIZE)
+        problem_types = list(ProblemType.objects.all()) or ProblemType.objects.bulk_create([
+            ProblemType(name=f'{SYNTHETIC_PREFIX}Problem {i}') for i in range(counts['problem_types'])
+        ])
+        created.update(institutions=len(institutions), departments=len(departments))
+        log(f"{len(institutions)} institutions, {len(departments)} departments")
+
+        users = User.objects.bulk_create([
+            User(
+                username=f'{SYNTHETIC_PREFIX}{run}_{i}', device_id=f'{SYNTHETIC_PREFIX}{run}_dev_{i}',
+                user_type='anonymous', password=password, phone_number=f'07{rng.randrange(10 ** 8):08d}',
+            )
+            for i in range(counts['users'])
+        ], batch_size=BATCH_SIZE)
+        staff = User.objects.bulk_create([
+            User(
+                username=f'{SYNTHETIC_PREFIX}{run}_staff_{i}', user_type='institution_user', password=password,
+                institution=institution,
+            )
+            for i, institution in enumerate(institutions)
+        ], batch_size=BATCH_SIZE)
+        created['users'] = len(users) + len(staff)
+        log(f"{created['users']} users")
+
+        messages = []
+        for _ in range(counts['messages']):
+            department = rng.choice(departments)
+            messages.append(Message(
+                sender=rng.choice(users), institution_id=department.institution_id, department=department,
+                problem_type=rng.choice(problem_types), content=_text(rng, rng.randint(10, 60)),
+                ward=rng.choice(WARDS), street=_text(rng, 2), phone_number=f'07{rng.randrange(10 ** 8):08d}',
+                status=rng.choice(['pending', 'pending', 'answered', 'solved']),
+                reply_count=rng.randint(0, min(3, MAX_REPLIES_PER_MESSAGE)),
+            ))
+        messages = Message.objects.bulk_create(messages, batch_size=BATCH_SIZE)
+        staff_by_institution = {user.institution_id: user for user in staff}
+        replies = Reply.objects.bulk_create([
+            Reply(
+                message=message, content=_text(rng, rng.randint(5, 30)),
+                sender=staff_by_institution[message.institution_id] if n % 2 == 0 else message.sender,
+            )
+            for message in messages
+            for n in range(message.reply_count)
+        ], batch_size=BATCH_SIZE)
+        created.update(messages=len(messages), replies=len(replies))
+        log(f"{len(messages)} messages, {len(replies)} replies")
+
+        feeds = Feed.objects.bulk_create([
+            Feed(
+                posted_by=rng.choice(staff), institution=rng.choice(institutions + [None]),
+                description=f'{SYNTHETIC_PREFIX}{_text(rng, rng.randint(20, 80))}',
+                impressions=rng.randint(0, 5000),
+            )
+            for _ in range(counts['feeds'])
+        ], batch_size=BATCH_SIZE)
+        reactions, shares = [], []
+        for feed in feeds:
+            for user in rng.sample(users, min(len(users), counts['reactions_per_feed'])):
+                reactions.append(FeedReaction(
+                    feed=feed, user=user, reaction_type=rng.choice(['viewed', 'viewed', 'like', 'love', 'cry', 'smile']),
+                ))
+            for user in rng.sample(users, min(len(users), counts['shares_per_feed'])):
+                shares.append(FeedShare(feed=feed, user=user, message=_text(rng, 5)))
+        FeedReaction.objects.bulk_create(reactions, batch_size=BATCH_SIZE)
+        FeedShare.objects.bulk_create(shares, batch_size=BATCH_SIZE)
+        created.update(feeds=len(feeds), feed_reactions=len(reactions), feed_shares=len(shares))
+        log(f"{len(feeds)} feeds, {len(reactions)} reactions, {len(shares)} shares")
+
+        polls = Poll.objects.bulk_create([
+            Poll(question=f'{SYNTHETIC_PREFIX}{_text(rng, 8)}?', show_results=True)
+            for _ in range(counts['polls'])
+        ], batch_size=BATCH_SIZE)
+        options = PollOption.objects.bulk_create([
+            PollOption(poll=poll, text=_text(rng, 3))
+            for poll in polls
+            for _ in range(counts['options_per_poll'])
+        ], batch_size=BATCH_SIZE)
+        options_by_poll = {}
+        for option in options:
+            options_by_poll.setdefault(option.poll_id, []).append(option)
+        votes, choices = [], []
+        for poll in polls:
+            for user in rng.sample(users, min(len(users), counts['votes_per_poll'])):
+                votes.append(PollVote(poll=poll, user=user))
+                choices.append(rng.choice(options_by_poll[poll.id]))
+        votes = PollVote.objects.bulk_create(votes, batch_size=BATCH_SIZE)
+        PollVote.selected_options.through.objects.bulk_create([
+            PollVote.selected_options.through(pollvote_id=vote.id, polloption_id=option.id)
+            for vote, option in zip(votes, choices)
+        ], batch_size=BATCH_SIZE)
+        tally = Counter(option.id for option in choices)
+        for option in options:
+            option.votes_count = tally[option.id]
+        PollOption.objects.bulk_update(options, ['votes_count'], batch_size=BATCH_SIZE)
+        created.update(polls=len(polls), poll_votes=len(votes))
+        log(f"{len(polls)} polls, {len(votes)} votes")
+
+        reports = []
+        for _ in range(counts['reports']):
+            department = rng.choice(departments)
+            user = rng.choice(users)
+            reports.append(Report(
+                title=f'{SYNTHETIC_PREFIX}{_text(rng, 4)}', description=_text(rng, rng.randint(10, 50)),
+                latitude=CENTER[0] + rng.uniform(-0.15, 0.15), longitude=CENTER[1] + rng.uniform(-0.15, 0.15),
+                user=user, device_id=user.device_id, institution_id=department.institution_id,
+                department=department, status=rng.choice(['pending', 'received', 'solving', 'solved']),
+            ))
+        Report.objects.bulk_create(reports, batch_size=BATCH_SIZE)
+        created['reports'] = len(reports)
+        log(f"{len(reports)} reports")
+
+    # bulk_create sends no signals
+    versions.bump_for_model(Institution)
+    versions.bump_for_model(Department)
+    versions.bump_for_model(ProblemType)
+    return created
+
+
+def purge():
+    """Delete everything `generate()` created; return the number of rows removed."""
+    with transaction.atomic():
+        deleted = 0
+        for queryset in (
+            Report.objects.filter(title__startswith=SYNTHETIC_PREFIX),
+            Poll.objects.filter(question__startswith=SYNTHETIC_PREFIX),
+            Feed.objects.filter(description__startswith=SYNTHETIC_PREFIX),
+            User.objects.filter(username__startswith=SYNTHETIC_PREFIX),
+            Institution.objects.filter(name__startswith=SYNTHETIC_PREFIX),
+            ProblemType.objects.filter(name__startswith=SYNTHETIC_PREFIX),
+        ):
+            count, _ = queryset.delete()
+            deleted += count
+    return deleted
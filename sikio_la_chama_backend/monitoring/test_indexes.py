@@ -0,0 +1,129 @@
+"""The query planner must use the indexes declared for the hot access paths.
+
+A few thousand rows are seeded and the tables analyzed, then each test
+EXPLAINs a query shaped like the one its view runs and looks for the
+index name in the plan. Postgres only prefers an index once a table is
+big enough and the filter selective enough, so the data is spread over
+many institutions, devices and recipients. Run these against PostgreSQL
+(``DATABASE_URL=postgres://... manage.py test monitoring.test_indexes``)
+for the answer that matters; SQLite runs them too.
+"""
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from feeds.models import Feed, FeedReaction
+from institutions.models import Department, Institution
+from notifications.models import Notification
+from polls.models import Poll, PollVote
+from reports.models import Report
+from user_messages.models import Message
+from users.models import User
+
+ROWS = 4000
+GROUPS = 40  # institutions/departments
+USERS = 200  # also devices and notification recipients
+FEEDS = POLLS = ROWS // USERS
+REACTIONS = ('like', 'love', 'cry', 'smile', 'viewed')
+
+
+def spread(objects, field, now):
+	"""Give `objects` one-minute-apart timestamps going back from `now` (bulk_create sets them all to now)."""
+	for i, obj in enumerate(objects):
+		setattr(obj, field, now - datetime.timedelta(minutes=i))
+	type(objects[0]).objects.bulk_update(objects, [field], batch_size=500)
+
+
+class IndexUsageTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		now = timezone.now()
+		cls.now = now
+		admin = User.objects.create_user(username='admin', password='pw', user_type='admin', is_staff=True)
+		institutions = Institution.objects.bulk_create([Institution(name=f'Institution {i}') for i in range(GROUPS)])
+		departments = Department.objects.bulk_create([
+			Department(name=f'Department {i}', institution=institution) for i, institution in enumerate(institutions)
+		])
+		users = User.objects.bulk_create([
+			User(username=f'user{i}', device_id=f'dev-{i}', user_type='anonymous') for i in range(USERS)
+		])
+		cls.institution, cls.department, cls.user = institutions[7], departments[7], users[7]
+
+		messages = Message.objects.bulk_create([
+			Message(
+				sender=users[i % USERS], institution=institutions[i % GROUPS], department=departments[i % GROUPS],
+				content='No water', ward='Kariakoo', street='Uhuru', phone_number='0700000000',
+			)
+			for i in range(ROWS)
+		])
+		spread(messages, 'timestamp', now)
+
+		reports = Report.objects.bulk_create([
+			Report(
+				title='Burst pipe', description='Water everywhere', latitude=-6.8, longitude=39.28,
+				# Half the reports come from registered users, without a device id
+				device_id=f'dev-{i % USERS}' if i % 2 else None, user=None if i % 2 else users[i % USERS],
+				institution=institutions[i % GROUPS], department=departments[i % GROUPS],
+			)
+			for i in range(ROWS)
+		])
+		spread(reports, 'created_at', now)
+
+		notifications = Notification.objects.bulk_create([
+			# Most notifications have been read
+			Notification(recipient=users[i % USERS], title='Reply', type='message_reply', read_at=now if i % 10 else None)
+			for i in range(ROWS)
+		])
+		spread(notifications, 'created_at', now)
+
+		feeds = Feed.objects.bulk_create([Feed(posted_by=admin, description='Update') for _ in range(FEEDS)])
+		cls.feed = feeds[3]
+		FeedReaction.objects.bulk_create([
+			FeedReaction(feed=feed, user=user, reaction_type=REACTIONS[i % len(REACTIONS)])
+			for feed in feeds for i, user in enumerate(users)
+		])
+
+		polls = Poll.objects.bulk_create([Poll(question='Which road first?') for _ in range(POLLS)])
+		cls.poll = polls[0]
+		votes = PollVote.objects.bulk_create([PollVote(poll=poll, user=user) for poll in polls for user in users])
+		spread(votes, 'created_at', now)
+
+		with connection.cursor() as cursor:
+			for model in (Message, Report, Notification, FeedReaction, PollVote):
+				cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+	def assertUsesIndex(self, queryset, index_name):
+		plan = queryset.explain()
+		self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+
+	def test_report_lists(self):
+		reports = Report.objects.order_by('-created_at')
+		self.assertUsesIndex(reports.filter(device_id='dev-7'), 'report_device_created_idx')
+		self.assertUsesIndex(reports.filter(institution=self.institution), 'report_inst_created_idx')
+		self.assertUsesIndex(reports.filter(department=self.department), 'report_dept_created_idx')
+
+	def test_message_lists(self):
+		messages = Message.objects.order_by('-timestamp')
+		self.assertUsesIndex(messages.filter(institution=self.institution), 'msg_inst_timestamp_idx')
+		self.assertUsesIndex(messages.filter(department=self.department), 'msg_dept_timestamp_idx')
+		self.assertUsesIndex(messages.filter(sender=self.user), 'msg_sender_timestamp_idx')
+
+	def test_message_date_range(self):
+		recent = Message.objects.filter(timestamp__gte=self.now - datetime.timedelta(hours=1)).order_by()
+		self.assertUsesIndex(recent, 'msg_timestamp_idx')
+
+	def test_notification_lists(self):
+		notifications = Notification.objects.filter(recipient=self.user)
+		self.assertUsesIndex(notifications[:100], 'notif_recipient_created_idx')
+		self.assertUsesIndex(notifications.filter(read_at__isnull=True)[:100], 'notif_unread_idx')
+
+	def test_reaction_counts(self):
+		self.assertUsesIndex(
+			FeedReaction.objects.filter(feed=self.feed, reaction_type='like').order_by(), 'feedreaction_feed_type_idx',
+		)
+
+	def test_poll_votes_in_range(self):
+		votes = PollVote.objects.filter(poll=self.poll, created_at__gte=self.now - datetime.timedelta(hours=1))
+		self.assertUsesIndex(votes, 'pollvote_poll_created_idx')
@@ -0,0 +1,180 @@
+"""Query counts of list endpoints must not grow with the number of rows.
+
+Each test seeds N rows, counts the queries of one request, seeds up to 10N
+and counts again. Rows are bulk-created so save() logic and signals don't
+get in the way, and every seeded user gets an API token up front: the
+token embedded in serialized users is created on first use, a one-off
+write per user.
+"""
+import itertools
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from catalog import refdata
+from feeds.models import Feed, FeedReaction, FeedShare
+from institutions.models import Department, Institution
+from notifications.models import Notification
+from polls.models import Poll, PollOption, PollVote
+from problem_types.models import ProblemType
+from reports.models import Report
+from user_messages.models import Message, Reply
+from users.models import User
+
+N = 2
+
+
+@override_settings(REFDATA_CHECK_INTERVAL=3600)
+class ListQueryCountTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.admin = User.objects.create_user(username='admin', password='pw', user_type='admin', is_staff=True)
+		Token.objects.create(user=self.admin)
+		self.institution = Institution.objects.create(name='Water')
+		self.department = Department.objects.create(name='Leaks', institution=self.institution)
+		self.problem_type = ProblemType.objects.create(name='Leak')
+		self.device_user = self.make_users(1, 'device')[0]
+		self._ids = itertools.count()
+		# Load the reference data cache so it isn't part of the counts
+		refdata.invalidate()
+		for name in refdata.CACHED:
+			refdata.objects(name)
+
+	def make_users(self, count, prefix='user'):
+		users = User.objects.bulk_create([
+			User(username=f'{prefix}{i}', device_id=f'{prefix}-dev-{i}', user_type='anonymous')
+			for i in range(count)
+		])
+		Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+		return users
+
+	def count_queries(self, request):
+		with CaptureQueriesContext(connection) as ctx:
+			response = request()
+		self.assertEqual(response.status_code, 200, getattr(response, 'data', response))
+		return len(ctx.captured_queries)
+
+	def assertConstantQueries(self, seed, request):
+		seed(N)
+		small = self.count_queries(request)
+		seed(9 * N)
+		self.assertEqual(self.count_queries(request), small)
+
+	def seed_messages(self, count, sender=None):
+		users = self.make_users(count, f'sender{next(self._ids)}_')
+		messages = Message.objects.bulk_create([
+			Message(
+				sender=sender or user, institution=self.institution, department=self.department,
+				problem_type=self.problem_type, content='No water', ward='Kariakoo', street='Uhuru',
+				phone_number='0700000000', reply_count=2,
+			)
+			for user in users
+		])
+		Reply.objects.bulk_create([
+			Reply(message=message, sender=replier, content='On it')
+			for message, user in zip(messages, users)
+			for replier in (self.admin, user)
+		])
+		return messages
+
+	def test_feed_list(self):
+		def seed(count):
+			users = self.make_users(count, f'reactor{next(self._ids)}_')
+			feeds = Feed.objects.bulk_create([Feed(posted_by=self.admin, description='Update') for _ in range(count)])
+			FeedReaction.objects.bulk_create([
+				FeedReaction(feed=feed, user=user, reaction_type='like') for feed in feeds for user in users
+			])
+			FeedShare.objects.bulk_create([FeedShare(feed=feed, user=users[0]) for feed in feeds])
+
+		self.assertConstantQueries(seed, lambda: self.client.get('/api/feeds/list/'))
+
+	def test_feed_list_records_impressions_in_bulk(self):
+		self.assertConstantQueries(
+			lambda count: Feed.objects.bulk_create([Feed(posted_by=self.admin, description='Update') for _ in range(count)]),
+			lambda: self.client.get('/api/feeds/list/', HTTP_DEVICE_ID=self.device_user.device_id),
+		)
+		self.assertEqual(FeedReaction.objects.filter(user=self.device_user).count(), 10 * N)
+		self.assertEqual(set(Feed.objects.values_list('impressions', flat=True)), {1})
+
+	def test_message_list_for_admin(self):
+		self.client.force_authenticate(self.admin)
+		self.assertConstantQueries(self.seed_messages, lambda: self.client.get('/api/messages/list/'))
+
+	def test_message_list_for_sender(self):
+		self.assertConstantQueries(
+			lambda count: self.seed_messages(count, sender=self.device_user),
+			lambda: self.client.get('/api/messages/list/', HTTP_DEVICE_ID=self.device_user.device_id),
+		)
+
+	def test_reply_list(self):
+		message = self.seed_messages(1)[0]
+
+		def seed(count):
+			users = self.make_users(count, f'replier{next(self._ids)}_')
+			Reply.objects.bulk_create([Reply(message=message, sender=user, content='Same here') for user in users])
+
+		self.client.force_authenticate(self.admin)
+		self.assertConstantQueries(seed, lambda: self.client.get(f'/api/messages/{message.id}/replies/'))
+
+	def test_report_list(self):
+		def seed(count):
+			users = self.make_users(count, f'reporter{next(self._ids)}_')
+			Report.objects.bulk_create([
+				Report(
+					title='Burst pipe', description='Water everywhere', latitude=-6.8, longitude=39.28,
+					user=user, device_id=user.device_id, institution=self.institution, department=self.department,
+				)
+				for user in users
+			])
+
+		self.client.force_authenticate(self.admin)
+		self.assertConstantQueries(seed, lambda: self.client.get('/api/reports/'))
+
+	def test_poll_list(self):
+		def seed(count):
+			users = self.make_users(count, f'voter{next(self._ids)}_')
+			polls = Poll.objects.bulk_create([Poll(question='Which road first?', show_results=True) for _ in range(count)])
+			PollOption.objects.bulk_create([
+				PollOption(poll=poll, text=text) for poll in polls for text in ('Uhuru', 'Morogoro')
+			])
+			PollVote.objects.bulk_create([PollVote(poll=poll, user=user) for poll in polls for user in users])
+
+		self.assertConstantQueries(
+			seed, lambda: self.client.get('/api/polls/', HTTP_DEVICE_ID=self.device_user.device_id)
+		)
+
+	def test_notification_list(self):
+		def seed(count):
+			Notification.objects.bulk_create([
+				Notification(recipient=self.admin, title='Reply', type='message_reply') for _ in range(count)
+			])
+
+		self.client.force_authenticate(self.admin)
+		self.assertConstantQueries(seed, lambda: self.client.get('/api/notifications/'))
+
+	def test_admin_analytics(self):
+		def seed(count):
+			self.seed_messages(count)
+			users = self.make_users(count, f'fan{next(self._ids)}_')
+			feeds = Feed.objects.bulk_create([Feed(posted_by=self.admin, description='Update') for _ in range(count)])
+			FeedReaction.objects.bulk_create([
+				FeedReaction(feed=feed, user=user, reaction_type='love') for feed in feeds for user in users
+			])
+			polls = Poll.objects.bulk_create([Poll(question='Which road first?') for _ in range(count)])
+			options = PollOption.objects.bulk_create([PollOption(poll=poll, text='Uhuru') for poll in polls])
+			votes = PollVote.objects.bulk_create([PollVote(poll=poll, user=user) for poll in polls for user in users])
+			PollVote.selected_options.through.objects.bulk_create([
+				PollVote.selected_options.through(pollvote_id=vote.id, polloption_id=option.id)
+				for vote in votes for option in options if option.poll_id == vote.poll_id
+			])
+
+		self.client.force_authenticate(self.admin)
+		# A distinct query string each time gets past the view's response cache
+		requests = itertools.count()
+		self.assertConstantQueries(seed, lambda: self.client.get(
+			'/api/analytics/admin-stats/',
+			{'per_feed': 'true', 'daily': 'true', 'start': '2020-01-01', 'end': '2030-12-31', 'n': next(requests)},
+		))
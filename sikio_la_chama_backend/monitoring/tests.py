@@ -0,0 +1,344 @@
+import io
+import itertools
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+from problem_types.models import ProblemType
+from feeds.models import Feed, FeedReaction
+from feeds.serializers import FeedSerializer
+from polls.models import PollVote
+from institutions.models import Institution
+from django.db import OperationalError, connection
+from monitoring import bench, checks, logs, metrics, middleware, profiling, synthetic
+from monitoring.middleware import QueryBudgetExceeded
+
+
+class RequestMetricsTests(TestCase):
+	def setUp(self):
+		metrics.REGISTRY.clear()
+		self.client = APIClient()
+		ProblemType.objects.create(name='Leak')
+
+	@override_settings(METRICS_SERVER_TIMING=True)
+	def test_server_timing_header(self):
+		resp = self.client.get('/api/problem-types/')
+		self.assertEqual(resp.status_code, 200)
+		timing = resp['Server-Timing']
+		self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+		self.assertIn('view;dur=', timing)
+		self.assertIn('serialize;dur=', timing)
+		self.assertIn('render;dur=', timing)
+		self.assertIn('total;dur=', timing)
+
+	@override_settings(METRICS_SERVER_TIMING=False)
+	def test_no_header_when_disabled(self):
+		self.assertNotIn('Server-Timing', self.client.get('/api/problem-types/'))
+
+	def test_histograms_by_route(self):
+		self.client.get('/api/problem-types/')
+		self.client.get('/api/problem-types/')
+		labels = ('api/problem-types/', 'GET')
+		self.assertEqual(metrics.request_duration.count(labels), 2)
+		self.assertEqual(metrics.db_queries.count(labels), 2)
+		self.assertEqual(metrics.responses.value(labels + ('200',)), 2)
+
+	def test_view_and_serializer_time(self):
+		admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		Feed.objects.create(posted_by=admin, description='Update')
+		self.client.get('/api/feeds/list/')
+		labels = ('api/feeds/list/', 'GET')
+		self.assertEqual(metrics.view_duration.count(labels), 1)
+		self.assertEqual(metrics.serialize_duration.count(labels), 1)
+
+	def test_nested_serializers_are_timed_once(self):
+		admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		feed = Feed.objects.create(posted_by=admin, description='Update')
+		# get_reactions builds a nested serializer's .data
+		FeedReaction.objects.create(feed=feed, user=admin, reaction_type='like')
+		stats = middleware.RequestStats()
+		token = middleware.current_stats.set(stats)
+		try:
+			# Each tick of the clock is one second; only the outer .data reads it
+			with mock.patch.object(middleware.time, 'perf_counter', side_effect=itertools.count()):
+				data = FeedSerializer(FeedSerializer.with_related(Feed.objects.all()), many=True).data
+		finally:
+			middleware.current_stats.reset(token)
+		self.assertEqual(len(data[0]['reactions']), 1)
+		self.assertEqual(stats.serialize_time, 1)
+
+	def test_metrics_endpoint_is_admin_only(self):
+		self.client.get('/api/problem-types/')
+		self.assertIn(self.client.get('/api/monitoring/metrics/').status_code, (401, 403))
+		admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		self.client.force_authenticate(admin)
+		resp = self.client.get('/api/monitoring/metrics/')
+		self.assertEqual(resp.status_code, 200)
+		self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+		body = resp.content.decode()
+		self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+		self.assertIn('http_request_db_queries_bucket{route="api/problem-types/",method="GET",le="+Inf"} 1', body)
+		self.assertIn('http_responses_total{route="api/problem-types/",method="GET",status="200"} 1', body)
+
+	@override_settings(QUERY_BUDGETS={'problem_type_list': 0}, QUERY_BUDGET_ACTION='raise')
+	def test_budget_raises_in_tests(self):
+		with self.assertRaises(QueryBudgetExceeded):
+			self.client.get('/api/problem-types/')
+
+	@override_settings(QUERY_BUDGETS={'api/problem-types/': 0}, QUERY_BUDGET_ACTION='log')
+	def test_budget_logs_in_production(self):
+		with self.assertLogs('monitoring.middleware', 'WARNING') as logs:
+			resp = self.client.get('/api/problem-types/')
+		self.assertEqual(resp.status_code, 200)
+		self.assertIn('budget 0', logs.output[0])
+		self.assertEqual(metrics.budget_exceeded.value(('api/problem-types/', 'GET')), 1)
+
+
+class BenchmarkTests(TestCase):
+	def test_seed_and_purge(self):
+		created = synthetic.generate(scale=0.02, seed=1)
+		self.assertEqual(created['institutions'], 1)
+		self.assertEqual(created['feed_reactions'], created['feeds'] * 10)  # capped by the 10 users
+		self.assertTrue(Institution.objects.filter(name__startswith=synthetic.SYNTHETIC_PREFIX).exists())
+		self.assertGreater(synthetic.purge(), sum(created.values()) - 1)
+		self.assertFalse(Institution.objects.filter(name__startswith=synthetic.SYNTHETIC_PREFIX).exists())
+		self.assertFalse(FeedReaction.objects.exists())
+
+	def test_bench_reports_and_rolls_back_writes(self):
+		synthetic.generate(scale=0.02)
+		endpoints = [
+			bench.Endpoint('problem-types', 'post', '/api/problem-types/create/', client='admin', data={'name': 'Bench'}, writes=True),
+			*bench.default_endpoints(),
+		]
+		votes = PollVote.objects.count()
+		results = bench.run(endpoints, repeat=2, warmup=0)
+		self.assertEqual([row['name'] for row in results], [e.name for e in endpoints])
+		self.assertIn('polls/vote', [row['name'] for row in results])
+		for row in results:
+			self.assertEqual(row['errors'], 0, row['name'])
+			self.assertGreater(row['queries'], 0)
+			self.assertGreaterEqual(row['p95_ms'], row['p50_ms'])
+		self.assertFalse(ProblemType.objects.filter(name='Bench').exists())
+		self.assertEqual(PollVote.objects.count(), votes)
+
+	def test_compare(self):
+		baseline = [{'name': 'a', 'queries': 5, 'p95_ms': 10.0}]
+		self.assertEqual(bench.compare([{'name': 'a', 'queries': 5, 'p95_ms': 12.0}], baseline), [])
+		regressions = bench.compare([{'name': 'a', 'queries': 6, 'p95_ms': 20.0}], baseline)
+		self.assertEqual(len(regressions), 2)
+
+
+class ProfilingTests(TestCase):
+	def setUp(self):
+		self.dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+		overrides = override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.dir, PROFILING_THRESHOLD=60)
+		overrides.enable()
+		self.addCleanup(overrides.disable)
+		self.client = APIClient()
+		self.admin = User.objects.create_user(username='admin', password='pw', user_type='admin', is_staff=True)
+		ProblemType.objects.create(name='Leak')
+
+	def test_disabled_by_default(self):
+		with override_settings(PROFILING_ENABLED=False):
+			with self.assertRaises(MiddlewareNotUsed):
+				profiling.ProfilingMiddleware(lambda request: None)
+
+	def test_header_profiles_staff_requests(self):
+		token = Token.objects.create(user=self.admin)
+		resp = self.client.get('/api/problem-types/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=f'Token {token.key}')
+		self.assertEqual(resp.status_code, 200)
+		[profile_id] = profiling.profile_ids()
+
+		self.client.force_authenticate(self.admin)
+
+		resp = self.client.get(f'/api/monitoring/profiles/{profile_id}/')
+		self.assertEqual(resp.status_code, 200)
+		data = json.loads(b''.join(resp.streaming_content))
+		self.assertEqual(data['trigger'], 'header')
+		self.assertEqual(data['path'], '/api/problem-types/')
+		self.assertIn('problem_types_problemtype', ' '.join(q['sql'] for q in data['queries']))
+		self.assertIn('cumulative', data['pstats'])
+		resp = self.client.get(f'/api/monitoring/profiles/{profile_id}/', {'type': 'pstats'})
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(resp['Content-Type'], 'application/octet-stream')
+
+	def test_header_ignored_for_other_users(self):
+		citizen = User.objects.create_user(username='citizen', password='pw')
+		with mock.patch.object(profiling.cProfile, 'Profile') as profile:
+			self.client.get('/api/problem-types/', HTTP_X_PROFILE='1')
+			self.client.get('/api/problem-types/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION='Token bogus')
+			token = Token.objects.create(user=citizen)
+			self.client.get('/api/problem-types/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=f'Token {token.key}')
+			self.client.login(username='citizen', password='pw')
+			self.client.get('/api/problem-types/', HTTP_X_PROFILE='1')
+		# The profiler is never started, not just its result discarded
+		profile.assert_not_called()
+		self.assertEqual(profiling.profile_ids(), [])
+
+	def test_header_accepted_with_staff_session(self):
+		self.client.login(username='admin', password='pw')
+		self.client.get('/api/problem-types/', HTTP_X_PROFILE='1')
+		[summary] = [profiling.load_summary(profile_id) for profile_id in profiling.profile_ids()]
+		self.assertEqual(summary['trigger'], 'header')
+
+	def test_slow_requests_are_profiled(self):
+		self.client.get('/api/problem-types/')
+		self.assertEqual(profiling.profile_ids(), [])
+		with override_settings(PROFILING_THRESHOLD=0):
+			self.client = APIClient()
+			self.client.get('/api/problem-types/')
+		[summary] = [profiling.load_summary(profile_id) for profile_id in profiling.profile_ids()]
+		self.assertEqual(summary['trigger'], 'threshold')
+		self.assertEqual(summary['route'], 'api/problem-types/')
+
+	def test_list_is_admin_only(self):
+		profiling.save_profile({'path': '/x/'})
+		self.assertIn(self.client.get('/api/monitoring/profiles/').status_code, (401, 403))
+		self.client.force_authenticate(self.admin)
+		resp = self.client.get('/api/monitoring/profiles/')
+		self.assertEqual([row['path'] for row in resp.data], ['/x/'])
+		self.assertEqual(self.client.get('/api/monitoring/profiles/0000000000000-00000000/').status_code, 404)
+		self.assertEqual(self.client.get('/api/monitoring/profiles/..%2Fsecret/').status_code, 404)
+
+	@override_settings(PROFILING_KEEP=2)
+	def test_ring_buffer_keeps_newest(self):
+		ids = []
+		for n in range(3):
+			ids.append(profiling.save_profile({'path': f'/{n}/'}))
+			time.sleep(0.002)
+		self.assertEqual(profiling.profile_ids(), ids[:0:-1])
+
+	def test_sampler_sleeps_until_a_request_is_due(self):
+		sampler = profiling.Sampler(interval=0.005, sample_after=10)
+		self.assertIsNone(sampler.next_delay())
+		with mock.patch.object(sampler, 'sample_once') as sample_once:
+			sampler.start(threading.get_ident())
+			time.sleep(0.1)
+			self.assertGreater(sampler.next_delay(), 9)
+			sample_once.assert_not_called()
+			sampler.stop(threading.get_ident())
+		sampler.sample_after = 0
+		sampler.start(threading.get_ident())
+		self.assertEqual(sampler.next_delay(), 0.005)
+		sampler.stop(threading.get_ident())
+
+	def test_sampler_collects_stacks(self):
+		def slow_handler():
+			time.sleep(0.2)
+
+		sampler = profiling.Sampler(interval=0.005, sample_after=0)
+		worker = threading.Thread(target=slow_handler)
+		worker.start()
+		samples = sampler.start(worker.ident)
+		worker.join()
+		sampler.stop(worker.ident)
+		self.assertTrue(any('slow_handler' in stack for stack in samples))
+
+
+class LoggingTests(TestCase):
+	def make_logger(self, handler):
+		logger = logging.getLogger('monitoring.tests.logging')
+		logger.handlers = [handler]
+		logger.propagate = False
+		logger.setLevel(logging.INFO)
+		self.addCleanup(setattr, logger, 'handlers', [])
+		return logger
+
+	def test_request_id_header(self):
+		resp = self.client.get('/api/problem-types/')
+		self.assertRegex(resp['X-Request-ID'], r'^[0-9a-f]{32}$')
+		resp = self.client.get('/api/problem-types/', HTTP_X_REQUEST_ID='edge-42')
+		self.assertEqual(resp['X-Request-ID'], 'edge-42')
+		resp = self.client.get('/api/problem-types/', HTTP_X_REQUEST_ID='bad id\n')
+		self.assertNotEqual(resp['X-Request-ID'], 'bad id\n')
+
+	def test_response_log_carries_request_id(self):
+		client = APIClient()
+		client.force_authenticate(User.objects.create_user(username='citizen', password='pw'))
+		with self.assertLogs('django.request', 'WARNING') as captured:
+			resp = client.get('/api/monitoring/profiles/', HTTP_X_REQUEST_ID='edge-43')
+		self.assertEqual(resp.status_code, 403)
+		# Logged after RequestIdMiddleware has reset the context variable
+		[record] = captured.records
+		self.assertIsNone(logs.current_request_id())
+		logs.RequestIdFilter().filter(record)
+		self.assertEqual(record.request_id, 'edge-43')
+
+	def test_json_records_carry_request_id(self):
+		stream = io.StringIO()
+		handler = logging.StreamHandler(stream)
+		handler.setFormatter(logs.JsonFormatter())
+		handler.addFilter(logs.RequestIdFilter())
+		logger = self.make_logger(handler)
+		token = logs.request_id.set('req-1')
+		try:
+			logger.info("Feed %s created", 5, extra={'feed_id': 5})
+		finally:
+			logs.request_id.reset(token)
+		entry = json.loads(stream.getvalue())
+		self.assertEqual(entry['message'], 'Feed 5 created')
+		self.assertEqual(entry['request_id'], 'req-1')
+		self.assertEqual(entry['feed_id'], 5)
+		self.assertEqual(entry['level'], 'INFO')
+
+	def test_queue_handler_writes_in_background(self):
+		stream = io.StringIO()
+		handler = logs.QueueHandler(stream=stream)
+		self.addCleanup(handler.close)
+		handler.setFormatter(logging.Formatter('%(request_id)s %(message)s'))
+		handler.addFilter(logs.RequestIdFilter())
+		logger = self.make_logger(handler)
+		data = {'n': 1}
+		token = logs.request_id.set('req-2')
+		try:
+			logger.info("data=%s", data)
+		finally:
+			logs.request_id.reset(token)
+		data['n'] = 2  # the message is merged with its args on the logging thread
+		handler.flush()
+		self.assertEqual(stream.getvalue(), "req-2 data={'n': 1}\n")
+
+	def test_queue_handler_drops_when_full(self):
+		handler = logs.QueueHandler(stream=io.StringIO(), queue_size=1)
+		handler.listener.stop()  # nothing drains the queue
+		logger = self.make_logger(handler)
+		logger.info("one")
+		logger.info("two")
+		self.assertEqual(handler.dropped, 1)
+		handler.close()
+
+
+class DatabaseCheckTests(TestCase):
+	def test_connection_check_passes(self):
+		self.assertEqual(checks.check_database_connection(None, databases=['default']), [])
+		# Only run when databases are asked for (migrate, check --database)
+		self.assertEqual(checks.check_database_connection(None), [])
+
+	def test_unreachable_database_is_an_error(self):
+		with mock.patch.object(connection, 'cursor', side_effect=OperationalError('connection refused')):
+			messages = checks.check_database_connection(None, databases=['default'])
+		self.assertEqual([m.id for m in messages], ['monitoring.E001'])
+		self.assertIn('connection refused', messages[0].msg)
+
+	def test_connection_budget(self):
+		self.assertEqual(checks._connection_budget('default', 100, 10), [])
+		self.assertEqual([m.id for m in checks._connection_budget('default', 100, 85)], ['monitoring.W003'])
+		pooled = {'default': {'OPTIONS': {'pool': {'max_size': 10}}}}
+		with override_settings(DATABASES=pooled), mock.patch.dict('os.environ', {'WEB_CONCURRENCY': '12'}):
+			self.assertEqual([m.id for m in checks._connection_budget('default', 100, 10)], ['monitoring.W004'])
+
+	@override_settings(DB_POOL=True)
+	def test_pool_without_support_warns(self):
+		with mock.patch.object(checks, 'pool_supported', return_value=False):
+			self.assertEqual([m.id for m in checks.check_database_pool(None)], ['monitoring.W001'])
+		with mock.patch.object(checks, 'pool_supported', return_value=True):
+			self.assertEqual(checks.check_database_pool(None), [])
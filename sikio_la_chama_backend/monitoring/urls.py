@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import MetricsView, ProfileDownloadView, ProfileListView
+
+urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('profiles/', ProfileListView.as_view(), name='profile_list'),
+    path('profiles/<str:profile_id>/', ProfileDownloadView.as_view(), name='profile_download'),
+]
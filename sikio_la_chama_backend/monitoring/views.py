@@ -0,0 +1,40 @@
+from django.http import FileResponse, HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics, profiling
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsView(APIView):
+    """Per-route request metrics of this worker process, Prometheus text format."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class ProfileListView(APIView):
+    """Summaries of the stored request profiles, newest first."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        summaries = (profiling.load_summary(profile_id) for profile_id in profiling.profile_ids())
+        return Response([summary for summary in summaries if summary is not None])
+
+
+class ProfileDownloadView(APIView):
+    """Download a stored profile as JSON, or its cProfile stats with ``?type=pstats``."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        pstats = request.query_params.get('type') == 'pstats'
+        path = profiling.profile_path(profile_id, '.prof' if pstats else '.json')
+        if path is None:
+            return Response({"errors": {"profile": "Profile not found"}}, status=status.HTTP_404_NOT_FOUND)
+        filename = f"{profile_id}.{'prof' if pstats else 'json'}"
+        content_type = 'application/octet-stream' if pstats else 'application/json'
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
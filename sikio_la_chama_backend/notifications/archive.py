@@ -0,0 +1,24 @@
+"""Move notifications older than NOTIFICATION_ARCHIVE_AFTER to `NotificationArchive`.
+
+The app lists recent notifications only, so old ones, read or not, are
+dead weight in the table every unread count and list query walks.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from sikio_la_chama_backend import archival
+
+from .models import Notification, NotificationArchive
+
+DEFAULT_ARCHIVE_AFTER = 90 * 24 * 60 * 60
+
+
+def archive_after():
+    return timedelta(seconds=getattr(settings, 'NOTIFICATION_ARCHIVE_AFTER', DEFAULT_ARCHIVE_AFTER))
+
+
+def archive_old(now=None, batch_size=None):
+    old = Notification.objects.filter(created_at__lt=(now or timezone.now()) - archive_after())
+    return archival.move_rows(old, NotificationArchive, batch_size)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from notifications import archive
+from notifications.models import Notification
+from sikio_la_chama_backend import archival
+
+
+class Command(BaseCommand):
+    help = "Move notifications older than NOTIFICATION_ARCHIVE_AFTER to the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Rows per transaction (default ARCHIVE_BATCH_SIZE).")
+        parser.add_argument('--no-vacuum', action='store_true', help="Don't VACUUM ANALYZE the table afterwards.")
+
+    def handle(self, *args, **options):
+        count = archive.archive_old(batch_size=options['batch_size'])
+        if count and not options['no_vacuum']:
+            archival.vacuum(Notification)
+        self.stdout.write(f"Archived {count} notifications")
@@ -30,6 +30,14 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+            # Unread list, badge count and "mark all read" only touch unread rows
+            models.Index(
+                fields=['recipient', '-created_at'], name='notif_unread_idx',
+                condition=models.Q(read_at__isnull=True),
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['recipient', 'type', 'content_type', 'object_id'],
@@ -44,6 +52,20 @@ class Notification(models.Model):
             self.save(update_fields=['read_at'])
 
 
+class NotificationArchive(models.Model):
+    """Notifications older than NOTIFICATION_ARCHIVE_AFTER (see `archive_notifications`)."""
+    id = models.BigIntegerField(primary_key=True)
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    type = models.CharField(max_length=32, choices=Notification.TYPE_CHOICES)
+    content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
 class PushDevice(models.Model):
     PLATFORM_CHOICES = (
         ('android', 'Android'),
@@ -5,13 +5,6 @@ from typing import Iterable, Dict, Any, List, Optional, Tuple
 import requests
 from django.conf import settings
 
-try:
-    import google.auth.transport.requests
-    from google.oauth2 import service_account
-    _HAS_GOOGLE_AUTH = True
-except Exception:  # pragma: no cover
-    _HAS_GOOGLE_AUTH = False
-
 from .models import PushDevice
 
 logger = logging.getLogger(__name__)
@@ -21,18 +14,23 @@ SCOPES = ["https://www.googleapis.com/auth/firebase.messaging"]
 
 def _get_sa_credentials() -> Optional[Tuple[str, str]]:
     """Return (access_token, project_id) if v1 credentials are configured and usable."""
-    if not _HAS_GOOGLE_AUTH:
-        return None
     json_blob = getattr(settings, 'FIREBASE_CREDENTIALS_JSON', None)
     path = getattr(settings, 'FIREBASE_CREDENTIALS_FILE', None)
+    if not json_blob and not path:
+        return None
+    # google-auth (and its crypto backends) is only needed once credentials
+    # are configured; importing it here keeps it out of every worker's boot.
+    try:
+        import google.auth.transport.requests
+        from google.oauth2 import service_account
+    except ImportError:  # pragma: no cover
+        return None
     try:
         if json_blob:
             info = json.loads(json_blob)
             creds = service_account.Credentials.from_service_account_info(info, scopes=SCOPES)
-        elif path:
-            creds = service_account.Credentials.from_service_account_file(str(path), scopes=SCOPES)
         else:
-            return None
+            creds = service_account.Credentials.from_service_account_file(str(path), scopes=SCOPES)
         req = google.auth.transport.requests.Request()
         creds.refresh(req)
         return creds.token, creds.project_id
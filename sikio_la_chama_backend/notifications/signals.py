@@ -46,8 +46,11 @@ def on_announcement_created(sender, instance: Announcement, created, **kwargs):
 
 
 @receiver(post_save, sender=Feed)
-def on_feed_created(sender, instance: Feed, created, **kwargs):
-    if not created:
+def on_feed_created(sender, instance: Feed, created, update_fields=None, **kwargs):
+    # Feeds with a video are announced once the media worker marks them ready.
+    if instance.status != 'ready':
+        return
+    if not created and 'status' not in (update_fields or ()):
         return
     title = 'New Feed'
     body = (instance.description or '')[:120]
@@ -0,0 +1,42 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications import archive
+from notifications.models import Notification, NotificationArchive
+from users.models import User
+
+
+@override_settings(NOTIFICATION_ARCHIVE_AFTER=90 * 24 * 60 * 60)
+class NotificationArchiveTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='citizen', password='pass')
+		self.now = timezone.now()
+
+	def _notify(self, days_ago, **kwargs):
+		notification = Notification.objects.create(recipient=self.user, title='Reply', type='message_reply', **kwargs)
+		Notification.objects.filter(pk=notification.pk).update(created_at=self.now - datetime.timedelta(days=days_ago))
+		return notification
+
+	def test_moves_old_notifications_in_batches(self):
+		old = [self._notify(100, read_at=self.now if i % 2 else None) for i in range(5)]
+		recent = self._notify(10)
+
+		self.assertEqual(archive.archive_old(now=self.now, batch_size=2), 5)
+
+		self.assertEqual(list(Notification.objects.values_list('pk', flat=True)), [recent.pk])
+		archived = NotificationArchive.objects.order_by('pk')
+		self.assertEqual([n.pk for n in archived], [n.pk for n in old])
+		self.assertEqual(archived[0].recipient, self.user)
+		self.assertEqual(archived[0].created_at, self.now - datetime.timedelta(days=100))
+		self.assertIsNone(archived[0].read_at)
+
+	def test_command(self):
+		self._notify(100)
+		out = StringIO()
+		call_command('archive_notifications', stdout=out)
+		self.assertIn('Archived 1 notifications', out.getvalue())
+		self.assertFalse(Notification.objects.exists())
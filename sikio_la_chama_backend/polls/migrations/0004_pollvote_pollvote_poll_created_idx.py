@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_poll_show_results_alter_poll_max_choices'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pollvote',
+            index=models.Index(fields=['poll', 'created_at'], name='pollvote_poll_created_idx'),
+        ),
+    ]
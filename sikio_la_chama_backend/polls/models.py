@@ -47,6 +47,8 @@ class PollVote(models.Model):
             models.UniqueConstraint(fields=['poll', 'user'], name='unique_poll_user_vote', condition=models.Q(user__isnull=False)),
             models.UniqueConstraint(fields=['poll', 'device_id'], name='unique_poll_device_vote', condition=models.Q(device_id__isnull=False)),
         ]
+        # Voters per poll within a date range (analytics)
+        indexes = [models.Index(fields=['poll', 'created_at'], name='pollvote_poll_created_idx')]
 
     def __str__(self):
         who = self.user or self.device_id
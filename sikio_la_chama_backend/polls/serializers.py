@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from .models import Poll, PollOption, PollVote
 from django.db import transaction, models
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
+# Max votes deleted per transaction when options are removed from a poll.
+VOTE_DELETE_BATCH_SIZE = 500
+
 class PollOptionSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=False, required=False)
     votes_count = serializers.SerializerMethodField()
@@ -33,11 +37,16 @@ class PollSerializer(serializers.ModelSerializer):
         return obj.total_voters()
 
     def validate(self, data):
-        options = data.get('options', [])
-        if len(options) < 2:
-            raise serializers.ValidationError("A poll must have at least 2 options.")
-        if len(options) > 10:
-            raise serializers.ValidationError("A poll may have at most 10 options.")
+        # Partial edits (e.g. fixing the question) may omit options entirely;
+        # fall back to the poll's current option count in that case.
+        if self.partial and 'options' not in data and self.instance is not None:
+            options_count = self.instance.options.count()
+        else:
+            options_count = len(data.get('options', []))
+            if options_count < 2:
+                raise serializers.ValidationError("A poll must have at least 2 options.")
+            if options_count > 10:
+                raise serializers.ValidationError("A poll may have at most 10 options.")
         allow_multiple = data.get('allow_multiple', False)
         max_choices = data.get('max_choices', None)
         if not allow_multiple and max_choices not in (None, 1):
@@ -45,7 +54,7 @@ class PollSerializer(serializers.ModelSerializer):
         if max_choices is not None:
             if max_choices < 1:
                 raise serializers.ValidationError("max_choices must be at least 1.")
-            if max_choices >= len(options):
+            if max_choices >= options_count:
                 raise serializers.ValidationError("max_choices must be strictly less than the number of options.")
         return data
 
@@ -59,19 +68,93 @@ class PollSerializer(serializers.ModelSerializer):
             PollOption.objects.create(poll=poll, text=opt['text'])
         return poll
 
-    @transaction.atomic
     def update(self, instance, validated_data):
+        """Apply edits without discarding votes on options that survive.
+
+        Options are matched by ``id``: changed text is bulk-updated and
+        entries without an id are bulk-created. Only votes that selected a
+        removed option are deleted, in batches and outside the main
+        transaction so a large poll doesn't hold locks for the whole purge.
+        """
         options_data = validated_data.pop('options', None)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        if options_data is not None:
-            instance.options.all().delete()
-            instance.votes.all().delete()
-            for opt in options_data:
-                PollOption.objects.create(poll=instance, text=opt['text'])
+        removed_ids = []
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if options_data is not None:
+                removed_ids = self._sync_options(instance, options_data)
+        if removed_ids:
+            self._delete_votes_for_options(removed_ids)
+            PollOption.objects.filter(id__in=removed_ids).delete()
         return instance
 
+    def _sync_options(self, instance, options_data):
+        """Update/create options in place and return ids of options to remove."""
+        existing = {opt.id: opt for opt in instance.options.all()}
+        to_update = []
+        to_create = []
+        kept_ids = set()
+        for opt in options_data:
+            opt_id = opt.get('id')
+            if opt_id is None:
+                to_create.append(PollOption(poll=instance, text=opt['text']))
+                continue
+            if opt_id not in existing:
+                raise serializers.ValidationError({'options': f"Option {opt_id} does not belong to this poll."})
+            if opt_id in kept_ids:
+                raise serializers.ValidationError({'options': f"Option {opt_id} is listed more than once."})
+            kept_ids.add(opt_id)
+            option = existing[opt_id]
+            if option.text != opt['text']:
+                option.text = opt['text']
+                to_update.append(option)
+        if to_update:
+            PollOption.objects.bulk_update(to_update, ['text'])
+        if to_create:
+            PollOption.objects.bulk_create(to_create)
+        return [opt_id for opt_id in existing if opt_id not in kept_ids]
+
+    def _delete_votes_for_options(self, removed_ids):
+        """Delete votes that selected any removed option, one batch per transaction.
+
+        Surviving options those votes also selected get their ``votes_count``
+        decremented so the cached counters stay consistent.
+        """
+        through = PollVote.selected_options.through
+        while True:
+            with transaction.atomic():
+                vote_ids = list(
+                    through.objects.filter(polloption_id__in=removed_ids)
+                    .values_list('pollvote_id', flat=True)
+                    .distinct()[:VOTE_DELETE_BATCH_SIZE]
+                )
+                if not vote_ids:
+                    return
+                surviving = (
+                    through.objects.filter(pollvote_id__in=vote_ids)
+                    .exclude(polloption_id__in=removed_ids)
+                    .values('polloption_id')
+                    .annotate(n=models.Count('id'))
+                )
+                for row in surviving:
+                    PollOption.objects.filter(id=row['polloption_id']).update(
+                        votes_count=models.F('votes_count') - row['n']
+                    )
+                PollVote.objects.filter(id__in=vote_ids).delete()
+
+def voter_lookup(request):
+    """Filter kwargs selecting the requester's votes, or None if they can't be identified."""
+    if not request:
+        return None
+    user = getattr(request, 'user', None)
+    device_id = request.headers.get('DEVICE_ID') or request.headers.get('Device-Id') or request.data.get('device_id')
+    if user and user.is_authenticated:
+        return {'user': user}
+    elif device_id:
+        return {'device_id': device_id}
+    return None
+
 class PollListSerializer(serializers.ModelSerializer):
     options = PollOptionSerializer(many=True, read_only=True)
     options_count = serializers.SerializerMethodField()
@@ -86,19 +169,27 @@ class PollListSerializer(serializers.ModelSerializer):
         return obj.options.count()
 
     def get_total_voters(self, obj):
+        # `annotate_for_list()` counts voters in the list query
+        if hasattr(obj, 'voters_count'):
+            return obj.voters_count
         return obj.total_voters()
 
     def get_has_voted(self, obj):
-        request = self.context.get('request')
-        if not request:
+        if hasattr(obj, 'requester_voted'):
+            return obj.requester_voted
+        lookup = voter_lookup(self.context.get('request'))
+        if lookup is None:
             return False
-        user = getattr(request, 'user', None)
-        device_id = request.headers.get('DEVICE_ID') or request.headers.get('Device-Id') or request.data.get('device_id')
-        if user and user.is_authenticated:
-            return obj.votes.filter(user=user).exists()
-        elif device_id:
-            return obj.votes.filter(device_id=device_id).exists()
-        return False
+        return obj.votes.filter(**lookup).exists()
+
+    @staticmethod
+    def annotate_for_list(queryset, request):
+        lookup = voter_lookup(request)
+        voted = (
+            Exists(PollVote.objects.filter(poll=OuterRef('pk'), **lookup)) if lookup is not None
+            else models.Value(False)
+        )
+        return queryset.annotate(voters_count=models.Count('votes'), requester_voted=voted)
 
 class VoteCreateSerializer(serializers.Serializer):
     option_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
@@ -1,3 +1,87 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from users.models import User
+from polls.models import Poll, PollOption, PollVote
 
-# Create your tests here.
+
+class PollUpdateTests(TestCase):
+	def setUp(self):
+		self.admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		token, _ = Token.objects.get_or_create(user=self.admin)
+		self.client = APIClient()
+		self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+		self.poll = Poll.objects.create(question='Best?', allow_multiple=True, max_choices=2)
+		self.a = PollOption.objects.create(poll=self.poll, text='Alpha')
+		self.b = PollOption.objects.create(poll=self.poll, text='Beta')
+		self.c = PollOption.objects.create(poll=self.poll, text='Gamma')
+		self.vote_a = self._vote('dev-a', [self.a])
+		self.vote_b = self._vote('dev-b', [self.b])
+		self.vote_ac = self._vote('dev-ac', [self.a, self.c])
+		self.url = f'/api/polls/{self.poll.id}/'
+
+	def _vote(self, device_id, options):
+		vote = PollVote.objects.create(poll=self.poll, device_id=device_id)
+		vote.selected_options.set(options)
+		for opt in options:
+			PollOption.objects.filter(id=opt.id).update(votes_count=opt.votes_count + 1)
+			opt.refresh_from_db()
+		return vote
+
+	def test_text_edit_keeps_votes(self):
+		payload = {'options': [{'id': self.a.id, 'text': 'Alpha (fixed)'}, {'id': self.b.id, 'text': 'Beta'}, {'id': self.c.id, 'text': 'Gamma'}]}
+		resp = self.client.patch(self.url, payload, format='json')
+		self.assertEqual(resp.status_code, 200)
+		self.a.refresh_from_db()
+		self.assertEqual(self.a.text, 'Alpha (fixed)')
+		self.assertEqual(self.a.votes_count, 2)
+		self.assertEqual(PollVote.objects.filter(poll=self.poll).count(), 3)
+
+	def test_removed_option_only_deletes_its_votes(self):
+		payload = {'options': [{'id': self.a.id, 'text': 'Alpha'}, {'id': self.b.id, 'text': 'Beta'}, {'text': 'Delta'}]}
+		resp = self.client.patch(self.url, payload, format='json')
+		self.assertEqual(resp.status_code, 200)
+		self.assertFalse(PollOption.objects.filter(id=self.c.id).exists())
+		self.assertTrue(PollOption.objects.filter(poll=self.poll, text='Delta').exists())
+		self.assertEqual(
+			set(PollVote.objects.filter(poll=self.poll).values_list('id', flat=True)),
+			{self.vote_a.id, self.vote_b.id},
+		)
+		self.a.refresh_from_db()
+		self.assertEqual(self.a.votes_count, 1)
+
+	def test_foreign_option_id_rejected(self):
+		other = Poll.objects.create(question='Other?')
+		foreign = PollOption.objects.create(poll=other, text='X')
+		payload = {'options': [{'id': self.a.id, 'text': 'Alpha'}, {'id': foreign.id, 'text': 'X'}]}
+		resp = self.client.patch(self.url, payload, format='json')
+		self.assertEqual(resp.status_code, 400)
+		self.assertEqual(PollOption.objects.filter(poll=self.poll).count(), 3)
+
+	def test_partial_edit_without_options(self):
+		resp = self.client.patch(self.url, {'question': 'Best option?'}, format='json')
+		self.assertEqual(resp.status_code, 200)
+		self.poll.refresh_from_db()
+		self.assertEqual(self.poll.question, 'Best option?')
+		self.assertEqual(PollVote.objects.filter(poll=self.poll).count(), 3)
+
+
+class PollVoteTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.poll = Poll.objects.create(question='Which road first?')
+		self.a = PollOption.objects.create(poll=self.poll, text='Uhuru')
+		self.b = PollOption.objects.create(poll=self.poll, text='Morogoro')
+
+	def test_device_vote_is_recorded_once(self):
+		url = f'/api/polls/{self.poll.id}/vote/'
+		response = self.client.post(url, {'option_ids': [self.a.id]}, format='json', HTTP_DEVICE_ID='dev-1')
+		self.assertEqual(response.status_code, 201, response.data)
+		self.assertTrue(response.data['poll']['has_voted'])
+		self.a.refresh_from_db()
+		self.assertEqual(self.a.votes_count, 1)
+
+		response = self.client.post(url, {'option_ids': [self.b.id]}, format='json', HTTP_DEVICE_ID='dev-1')
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(PollVote.objects.filter(poll=self.poll).count(), 1)
@@ -7,9 +7,11 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAdminUser
 from .models import ProblemType
 from .serializers import ProblemTypeSerializer
+from catalog.conditional import ConditionalGetMixin
 
-class ProblemTypeListView(APIView):
+class ProblemTypeListView(ConditionalGetMixin, APIView):
     permission_classes = [AllowAny]
+    conditional_resources = ('problem_types',)
     def get(self, request):
         problem_types = ProblemType.objects.all()
         serializer = ProblemTypeSerializer(problem_types, many=True)
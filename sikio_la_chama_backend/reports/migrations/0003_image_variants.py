@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_alter_report_options_remove_report_reporter_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
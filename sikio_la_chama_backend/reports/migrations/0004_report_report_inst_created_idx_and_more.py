@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['institution', '-created_at'], name='report_inst_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['department', '-created_at'], name='report_dept_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(condition=models.Q(('device_id__isnull', False)), fields=['device_id', '-created_at'], name='report_device_created_idx'),
+        ),
+    ]
@@ -13,6 +13,8 @@ class Report(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to='reports/', null=True, blank=True)
+    # Resized WebP/JPEG copies of `image`, filled in by the imaging worker
+    image_variants = models.JSONField(default=dict, blank=True)
     latitude = models.FloatField()
     longitude = models.FloatField()
     user = models.ForeignKey(
@@ -43,6 +45,15 @@ class Report(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # Report lists scoped to an institution, department or device, newest first
+        indexes = [
+            models.Index(fields=['institution', '-created_at'], name='report_inst_created_idx'),
+            models.Index(fields=['department', '-created_at'], name='report_dept_created_idx'),
+            models.Index(
+                fields=['device_id', '-created_at'], name='report_device_created_idx',
+                condition=models.Q(device_id__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.status})"
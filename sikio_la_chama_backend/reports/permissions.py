@@ -79,11 +79,16 @@ class DeviceIdPermission(permissions.BasePermission):
 
         if not device_id:
             # Extra debug output: dump a few useful request.META keys to help diagnose missing headers
-            try:
-                meta_sample = {k: v for k, v in request.META.items() if k.startswith('HTTP_') or k in ('CONTENT_TYPE', 'CONTENT_LENGTH')}
-            except Exception:
-                meta_sample = 'unavailable'
-            logger.debug('DeviceIdPermission: missing device_id; request.META sample=%s', meta_sample)
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    meta_sample = {
+                        k: v for k, v in request.META.items()
+                        if (k.startswith('HTTP_') or k in ('CONTENT_TYPE', 'CONTENT_LENGTH'))
+                        and k not in ('HTTP_AUTHORIZATION', 'HTTP_COOKIE')
+                    }
+                except Exception:
+                    meta_sample = 'unavailable'
+                logger.debug('DeviceIdPermission: missing device_id; request.META sample=%s', meta_sample)
             return False  # Reject requests without device ID when not authenticated
 
         # Attach or create a user based on device_id for anonymous/device-driven access
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Report
 from users.serializers import UserSerializer
+from imaging.normalize import normalize_upload
+from imaging.serializers import SrcsetField
 
 # 1️⃣ Create report (anonymous/device)
 class CreateReportSerializer(serializers.ModelSerializer):
@@ -9,13 +11,20 @@ class CreateReportSerializer(serializers.ModelSerializer):
         fields = ['title', 'description', 'image', 'latitude', 'longitude',
                   'device_id', 'institution', 'department']
 
+    def validate_image(self, value):
+        """Store a downscaled copy without EXIF (location) metadata."""
+        if not value:
+            return value
+        return normalize_upload(value)
+
 # 2️⃣ Fetch report (shared)
 class ReportSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    image_srcset = SrcsetField('image')
 
     class Meta:
         model = Report
-        fields = ['id', 'title', 'description', 'image', 'latitude', 'longitude',
+        fields = ['id', 'title', 'description', 'image', 'image_srcset', 'latitude', 'longitude',
                   'user', 'device_id', 'institution', 'department',
                   'status', 'created_at', 'updated_at', 'distance_to_admin', 'route_info']
 
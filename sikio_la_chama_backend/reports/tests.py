@@ -1,3 +1,70 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from reports.models import Report
+from imaging import normalize
+
+
+def _photo(width, height, gps=True):
+	from PIL import Image
+
+	exif = Image.Exif()
+	exif[0x0112] = 6  # rotate 90° clockwise on display
+	if gps:
+		exif[0x8825] = {2: (6.0, 48.0, 0.0), 4: (39.0, 17.0, 0.0)}
+	out = io.BytesIO()
+	Image.new('RGB', (width, height), (30, 120, 200)).save(out, 'JPEG', exif=exif.tobytes())
+	return out.getvalue()
+
+
+class ReportImageNormalizationTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root)
+		override = override_settings(
+			MEDIA_ROOT=self.media_root,
+			DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+			REPORT_IMAGE_MAX_DIMENSION=800,
+			REPORT_IMAGE_MAX_PIXELS=20_000_000,
+		)
+		override.enable()
+		self.addCleanup(override.disable)
+		self.client = APIClient()
+
+	def _post(self, data, name='photo.jpg'):
+		return self.client.post('/api/reports/', {
+			'title': 'Pothole', 'description': 'Big one', 'latitude': -6.8, 'longitude': 39.28,
+			'image': SimpleUploadedFile(name, data, content_type='image/jpeg'),
+		}, format='multipart', HTTP_DEVICE_ID='dev-1')
+
+	def test_image_is_downscaled_rotated_and_stripped(self):
+		from PIL import Image
+
+		resp = self._post(_photo(3200, 2400))
+		self.assertEqual(resp.status_code, 201, resp.data)
+		report = Report.objects.get()
+		with report.image.open('rb') as f:
+			stored = Image.open(io.BytesIO(f.read()))
+			# 3200x2400 shown rotated, fitted within 800px
+			self.assertEqual(stored.size, (600, 800))
+			self.assertEqual(dict(stored.getexif()), {})
+		self.assertTrue(report.image.name.endswith('.jpg'))
+
+	def test_oversized_image_rejected_before_decoding(self):
+		with mock.patch('PIL.ImageFile.ImageFile.load') as load:
+			resp = self._post(_photo(5000, 5000, gps=False))
+		self.assertEqual(resp.status_code, 400)
+		self.assertIn('megapixels', str(resp.data['image']))
+		load.assert_not_called()
+		self.assertFalse(Report.objects.exists())
+
+	def test_busy_pool_returns_503(self):
+		_, slots = normalize._pool()
+		with mock.patch.object(slots, 'acquire', return_value=False):
+			resp = self._post(_photo(100, 100))
+		self.assertEqual(resp.status_code, 503)
@@ -23,7 +23,7 @@ class ReportViewSet(viewsets.ModelViewSet):
         - department: reports for their department
         - anonymous/device user: reports created from the same device_id
         """
-        qs = Report.objects.all().order_by('-created_at')
+        qs = Report.objects.select_related('user__auth_token').order_by('-created_at')
         request = getattr(self, 'request', None)
         user = getattr(request, 'user', None) if request is not None else None
 
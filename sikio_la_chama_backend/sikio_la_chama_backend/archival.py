@@ -0,0 +1,57 @@
+"""Move old rows out of fast-growing tables into archive tables.
+
+An archive model mirrors its source model's columns (same names, same
+ids) plus ``archived_at``. `move_rows` copies a batch of rows and deletes
+the originals in one transaction, so a row is never in both tables or in
+neither, and a batch never holds locks for long. The source tables stay
+small, which keeps their indexes in memory and lets Postgres answer
+counts with index-only scans once vacuumed.
+"""
+import logging
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def batch_size():
+    return getattr(settings, 'ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def move_rows(queryset, archive_model, size=None):
+    """Move the rows of `queryset` into `archive_model` in batches; return how many were moved."""
+    size = size or batch_size()
+    model = queryset.model
+    fields = [field.attname for field in model._meta.concrete_fields]
+    pk = model._meta.pk.attname
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked: rows being updated right now are left for the next run
+            rows = list(queryset.select_for_update(skip_locked=True, of=('self',)).order_by(pk).values(*fields)[:size])
+            if not rows:
+                break
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows], ignore_conflicts=True)
+            model.objects.filter(pk__in=[row[pk] for row in rows]).delete()
+        moved += len(rows)
+        logger.debug("Archived %s %s rows", moved, model._meta.label)
+    if moved:
+        logger.info("Moved %s %s rows to %s", moved, model._meta.label, archive_model._meta.label)
+    return moved
+
+
+def vacuum(model, using=DEFAULT_DB_ALIAS):
+    """VACUUM ANALYZE the model's table on Postgres; a no-op elsewhere.
+
+    Marks the freed space reusable and refreshes the visibility map that
+    index-only scans rely on, without waiting for autovacuum. Must run
+    outside a transaction.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'VACUUM (ANALYZE) {connection.ops.quote_name(model._meta.db_table)}')
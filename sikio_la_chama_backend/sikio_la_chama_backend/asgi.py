@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sikio_la_chama_backend.settings')
+# Requests run in varying threads here, so per-thread persistent
+# connections would accumulate; close them per request (or set DB_POOL).
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
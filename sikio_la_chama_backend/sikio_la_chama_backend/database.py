@@ -0,0 +1,48 @@
+"""Build ``DATABASES`` entries from a database URL and connection options.
+
+Imported by settings, so it must not touch ``django.conf.settings``.
+"""
+import importlib.util
+
+import dj_database_url
+import django
+
+POSTGRES_ENGINE = 'django.db.backends.postgresql'
+
+
+def pool_supported():
+    """Whether Django can pool psycopg 3 connections (Django 5.1+ with psycopg_pool)."""
+    return django.VERSION >= (5, 1) and importlib.util.find_spec('psycopg_pool') is not None
+
+
+def database_settings(url, conn_max_age=0, pgbouncer=False, pool=None, connect_timeout=None):
+    """Settings for one database alias.
+
+    `conn_max_age` keeps a connection open between requests (with a health
+    check before reuse). `pgbouncer` makes the connection safe behind
+    pgbouncer in transaction mode. `pool` is a dict of psycopg_pool
+    arguments (min_size, max_size, max_idle, timeout); when given and
+    supported, connections come from a per-process pool instead of being
+    kept per thread. `connect_timeout` (seconds) bounds connection attempts
+    to Postgres.
+    """
+    db = dj_database_url.parse(
+        url, conn_max_age=conn_max_age, conn_health_checks=conn_max_age != 0,
+        # A transaction-mode pooler hands each transaction a different server
+        # connection, so named cursors (QuerySet.iterator()) and prepared
+        # statements would not survive from one transaction to the next.
+        disable_server_side_cursors=pgbouncer,
+    )
+    if db['ENGINE'] != POSTGRES_ENGINE:
+        return db
+    options = db.setdefault('OPTIONS', {})
+    if connect_timeout:
+        options['connect_timeout'] = connect_timeout
+    if pgbouncer:
+        options['prepare_threshold'] = None
+    if pool and pool_supported():
+        options['pool'] = dict(pool)
+        # Django refuses persistent connections together with a pool
+        db['CONN_MAX_AGE'] = 0
+        db['CONN_HEALTH_CHECKS'] = False
+    return db
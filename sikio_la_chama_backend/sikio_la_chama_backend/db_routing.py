@@ -0,0 +1,187 @@
+"""Send reads of public, read-only endpoints to a database replica.
+
+`ReplicaRoutingMiddleware` marks a request as replica-safe when it is a
+GET/HEAD to one of ``DATABASE_REPLICA_ROUTES`` (url names or route
+patterns). While the request runs, `ReplicaRouter` sends its reads to the
+``DATABASE_REPLICA_ALIAS`` connection; everything else, and every request
+that isn't marked, uses ``default``.
+
+Reads stay consistent with writes:
+
+* After the first write in a request, the rest of that request reads from
+  the primary, as do reads inside a transaction. Views that decide what to
+  write from what they read on a replica-safe route must read that with
+  ``.using('default')``.
+* After a request that wrote something (whatever its method: the feed
+  list records impressions on GET), the same client is pinned to the
+  primary for ``DATABASE_REPLICA_PIN_SECONDS``, so a device sees its own
+  vote or message even if the replica lags. Clients are told
+  apart by token, device id or session cookie, and pins are kept in the
+  default cache, which must be shared between workers for pins to follow a
+  client across them.
+
+When the replica can't be reached, reads fall back to the primary and
+the replica is not tried again for ``DATABASE_REPLICA_RETRY_SECONDS``.
+Without a replica configured, or with ``DATABASE_REPLICA_ENABLED`` off,
+everything goes to ``default``.
+"""
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLICA_ALIAS = 'replica'
+DEFAULT_PIN_SECONDS = 10
+DEFAULT_RETRY_SECONDS = 30
+SAFE_METHODS = ('GET', 'HEAD')
+PIN_KEY_PREFIX = 'db-pin:'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replica_alias():
+    """The replica's alias, or None when no replica is configured or routing is off."""
+    alias = _setting('DATABASE_REPLICA_ALIAS', DEFAULT_REPLICA_ALIAS)
+    if not _setting('DATABASE_REPLICA_ENABLED', False) or alias not in settings.DATABASES:
+        return None
+    return alias
+
+
+class RequestRouting:
+    """Routing state of the request being handled."""
+
+    def __init__(self):
+        self.use_replica = False
+        # Set by the first write; the request's later reads go to the primary
+        self.wrote = False
+
+
+routing = contextvars.ContextVar('db_routing', default=None)
+
+
+class ReplicaHealth:
+    """Remembers for a while that the replica could not be reached."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def available(self, alias):
+        if time.monotonic() < self._down_until:
+            return False
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            retry = _setting('DATABASE_REPLICA_RETRY_SECONDS', DEFAULT_RETRY_SECONDS)
+            with self._lock:
+                self._down_until = time.monotonic() + retry
+            logger.warning("Database replica %r is unavailable, reading from the primary for %ss", alias, retry,
+                           exc_info=True)
+            return False
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._down_until = 0.0
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """Route reads of replica-safe requests to the replica (see module docstring)."""
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+        alias = replica_alias()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if not health.available(alias):
+            state.use_replica = False
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema through replication
+        if db == replica_alias():
+            return False
+        return None
+
+
+def client_key(request):
+    """Cache key identifying the client for read-your-writes pinning, or None."""
+    identity = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.META.get('HTTP_DEVICE_ID')
+        or request.GET.get('device_id')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not identity:
+        return None
+    # Hashed so tokens don't end up in cache keys
+    return PIN_KEY_PREFIX + hashlib.sha256(identity.encode()).hexdigest()
+
+
+def is_replica_route(request):
+    routes = _setting('DATABASE_REPLICA_ROUTES', ())
+    match = getattr(request, 'resolver_match', None)
+    return match is not None and (match.route in routes or match.view_name in routes)
+
+
+class ReplicaRoutingMiddleware:
+    """Mark replica-safe requests and pin clients to the primary after writes.
+
+    Place it before middleware that may write (push device registration),
+    so those writes count too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestRouting()
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if state.wrote and replica_alias() is not None:
+            key = client_key(request)
+            if key is not None:
+                cache.set(key, True, timeout=_setting('DATABASE_REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routing.get()
+        if (
+            state is None or request.method not in SAFE_METHODS
+            or replica_alias() is None or not is_replica_route(request)
+        ):
+            return None
+        key = client_key(request)
+        state.use_replica = key is None or not cache.get(key)
+        return None
@@ -45,6 +45,8 @@ urlpatterns = [
     path('api/ilani/', include('ilani.urls')),
     path('api/feeds/', include('feeds.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/uploads/', include('uploads.urls')),
+    path('api/monitoring/', include('monitoring.urls')),
 ]
 
 # Media files during development
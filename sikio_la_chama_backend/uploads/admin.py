@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import ChunkedUpload
+
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'owner', 'device_id', 'offset', 'size', 'status', 'expires_at']
+    list_filter = ['status']
+    readonly_fields = ['sha256', 'offset']
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from uploads import staging
+
+
+class Command(BaseCommand):
+    help = "Delete expired chunked uploads and their staging files."
+
+    def handle(self, *args, **options):
+        count = staging.purge_expired()
+        self.stdout.write(f"Purged {count} expired uploads")
@@ -0,0 +1,42 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+from users.models import User
+
+
+class ChunkedUpload(models.Model):
+    """A file being uploaded in chunks to a local staging file.
+
+    Clients PUT chunks at `offset` (the number of bytes already received), so
+    after a dropped connection they only resend what is missing. A completed
+    upload is referenced by id from `FeedCreateView`/`SendMessageView`
+    instead of a multipart file.
+    """
+    STATUS_CHOICES = (
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='chunked_uploads')
+    device_id = models.CharField(max_length=255, blank=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def staged_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.id.hex}.part")
@@ -0,0 +1,203 @@
+"""Staging-file operations behind the chunked upload API.
+
+Chunks are written with ``os.pwrite`` at the offset the client claims and
+the upload's `offset` only advances through a conditional UPDATE on the
+previous value, so a retried or duplicated chunk can never move it twice.
+"""
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+COPY_BLOCK = 64 * 1024
+
+
+class ChunkError(Exception):
+    """The chunk can't be accepted; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class StagedFile(File):
+    """A completed chunked upload, usable wherever an uploaded file is expected.
+
+    Like `TemporaryUploadedFile` it exposes `temporary_file_path()`, so the
+    feed media pipeline moves it instead of copying, and storages that know
+    the protocol can do the same.
+    """
+
+    def __init__(self, upload):
+        super().__init__(open(upload.staged_path, 'rb'), name=upload.filename)
+        self.upload = upload
+        self.size = upload.size
+        self.content_type = upload.content_type or 'application/octet-stream'
+        self.charset = None
+        self.content_type_extra = {}
+
+    def temporary_file_path(self):
+        return self.upload.staged_path
+
+
+def upload_dir():
+    path = settings.CHUNKED_UPLOAD_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def start(owner, device_id, filename, size, sha256, content_type=''):
+    upload_dir()
+    upload = ChunkedUpload.objects.create(
+        owner=owner if owner is not None and owner.is_authenticated else None,
+        device_id=device_id or '',
+        filename=os.path.basename(filename)[:255],
+        content_type=content_type[:100],
+        size=size,
+        sha256=sha256.lower(),
+        expires_at=timezone.now() + timedelta(seconds=settings.CHUNKED_UPLOAD_TTL),
+    )
+    # Pre-create the staging file so every chunk is a positional write.
+    with open(upload.staged_path, 'wb'):
+        pass
+    return upload
+
+
+def write_chunk(upload, offset, stream, length, chunk_sha256=None):
+    """Write `length` bytes from `stream` at `offset`; return the new offset."""
+    if upload.status != 'uploading':
+        raise ChunkError("Upload is already complete.", status=409)
+    if offset != upload.offset:
+        raise ChunkError(f"Expected offset {upload.offset}.", status=409)
+    if length <= 0:
+        raise ChunkError("Empty chunk.")
+    if length > settings.CHUNKED_UPLOAD_MAX_CHUNK:
+        raise ChunkError(f"Chunks may not exceed {settings.CHUNKED_UPLOAD_MAX_CHUNK} bytes.", status=413)
+    if offset + length > upload.size:
+        raise ChunkError("Chunk extends past the declared upload size.")
+
+    digest = hashlib.sha256()
+    fd = os.open(upload.staged_path, os.O_WRONLY)
+    try:
+        position = offset
+        remaining = length
+        while remaining:
+            block = stream.read(min(COPY_BLOCK, remaining))
+            if not block:
+                raise ChunkError("Chunk body is shorter than Content-Length.")
+            digest.update(block)
+            os.pwrite(fd, block, position)
+            position += len(block)
+            remaining -= len(block)
+    finally:
+        os.close(fd)
+    if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+        # The bytes past `offset` are simply overwritten by the retry.
+        raise ChunkError("Chunk checksum mismatch.")
+
+    advanced = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset, status='uploading').update(
+        offset=F('offset') + length
+    )
+    if not advanced:
+        upload.refresh_from_db(fields=['offset', 'status'])
+        raise ChunkError(f"Expected offset {upload.offset}.", status=409)
+    upload.offset = offset + length
+    return upload.offset
+
+
+def complete(upload):
+    """Verify size and checksum and mark the upload complete."""
+    if upload.status == 'complete':
+        return upload
+    if upload.offset != upload.size:
+        raise ChunkError(f"Upload incomplete: {upload.offset} of {upload.size} bytes received.", status=409)
+    digest = hashlib.sha256()
+    with open(upload.staged_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    if digest.hexdigest() != upload.sha256:
+        # Nothing identifies the bad chunk: start over.
+        ChunkedUpload.objects.filter(pk=upload.pk).update(offset=0)
+        os.truncate(upload.staged_path, 0)
+        upload.offset = 0
+        raise ChunkError("Checksum mismatch; the upload has been reset.", status=422)
+    ChunkedUpload.objects.filter(pk=upload.pk).update(status='complete')
+    upload.status = 'complete'
+    return upload
+
+
+def owned_uploads(request, device_id=None):
+    """Uploads belonging to the requester (user, or device id for anonymous clients).
+
+    The device id defaults to the DEVICE_ID header or ``?device_id=``; the
+    request body is never parsed here, chunk bodies are raw bytes.
+    """
+    if request.user.is_authenticated:
+        return ChunkedUpload.objects.filter(owner=request.user)
+    device_id = device_id or request.META.get('HTTP_DEVICE_ID') or request.query_params.get('device_id')
+    if not device_id:
+        return ChunkedUpload.objects.none()
+    return ChunkedUpload.objects.filter(owner__isnull=True, device_id=device_id)
+
+
+def with_staged_file(request, file_field, upload_field='upload_id'):
+    """Return (data, staged) with a completed upload bound to `file_field`.
+
+    `data` is `request.data` and `staged` None when no upload id was sent.
+    Raises `ChunkError` if the id is unknown, not the requester's or the
+    upload is incomplete. Call `finish(staged)` once the file is stored.
+    """
+    upload_id = request.data.get(upload_field)
+    if not upload_id:
+        return request.data, None
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        raise ChunkError("Unknown upload.", status=404)
+    device_id = request.data.get('device_id')
+    upload = owned_uploads(request, device_id).filter(pk=upload_id, expires_at__gt=timezone.now()).first()
+    if upload is None:
+        raise ChunkError("Unknown upload.", status=404)
+    if upload.status != 'complete':
+        raise ChunkError("Upload is not complete.", status=409)
+
+    if hasattr(request.data, 'lists'):
+        data = type(request.data)(mutable=True)
+        for key, values in request.data.lists():
+            if key != upload_field:
+                data.setlist(key, values)
+    else:
+        data = {key: value for key, value in request.data.items() if key != upload_field}
+    staged = StagedFile(upload)
+    data[file_field] = staged
+    return data, staged
+
+
+def finish(staged):
+    """The staged file has been stored or handed off: drop the upload."""
+    staged.close()
+    discard(staged.upload)
+
+
+def discard(upload):
+    """Remove a consumed or expired upload and whatever is left of its file."""
+    try:
+        os.remove(upload.staged_path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def purge_expired(now=None):
+    count = 0
+    for upload in ChunkedUpload.objects.filter(expires_at__lte=now or timezone.now()).iterator():
+        discard(upload)
+        count += 1
+    return count
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import User
+from institutions.models import Institution, Department
+from feeds.models import Feed, FeedMediaJob
+from user_messages.models import Message
+from uploads.models import ChunkedUpload
+
+
+class ChunkedUploadTests(TestCase):
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.tmp)
+		override = override_settings(
+			CHUNKED_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'),
+			CHUNKED_UPLOAD_MAX_CHUNK=4,
+			FEED_MEDIA_STAGING_DIR=os.path.join(self.tmp, 'staging'),
+			MEDIA_ROOT=os.path.join(self.tmp, 'media'),
+			DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+		)
+		override.enable()
+		self.addCleanup(override.disable)
+		self.client = APIClient()
+		self.content = b'0123456789'
+
+	def _start(self, **headers):
+		resp = self.client.post('/api/uploads/', {
+			'filename': 'clip.mp4', 'size': len(self.content), 'sha256': hashlib.sha256(self.content).hexdigest(),
+		}, format='json', **headers)
+		self.assertEqual(resp.status_code, 201, resp.data)
+		return resp.data['id']
+
+	def _put(self, upload_id, offset, chunk, **headers):
+		return self.client.generic(
+			'PUT', f'/api/uploads/{upload_id}/?offset={offset}', chunk,
+			content_type='application/octet-stream', **headers
+		)
+
+	def _upload_all(self, upload_id, **headers):
+		for offset in range(0, len(self.content), 4):
+			resp = self._put(upload_id, offset, self.content[offset:offset + 4], **headers)
+			self.assertEqual(resp.status_code, 200, resp.data)
+		resp = self.client.post(f'/api/uploads/{upload_id}/complete/', **headers)
+		self.assertEqual(resp.status_code, 200, resp.data)
+
+	def test_resume_only_resends_missing_chunks(self):
+		headers = {'HTTP_DEVICE_ID': 'dev-1'}
+		upload_id = self._start(**headers)
+		self.assertEqual(self._put(upload_id, 0, b'0123', **headers).data['offset'], 4)
+		# A retried chunk whose response was lost is refused with the current offset.
+		resp = self._put(upload_id, 0, b'0123', **headers)
+		self.assertEqual(resp.status_code, 409)
+		self.assertEqual(resp.data['offset'], 4)
+		self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/', **headers).data['offset'], 4)
+		self._put(upload_id, 4, b'4567', **headers)
+		# Completing early reports what is missing.
+		self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/complete/', **headers).status_code, 409)
+		self._put(upload_id, 8, b'89', **headers)
+		resp = self.client.post(f'/api/uploads/{upload_id}/complete/', **headers)
+		self.assertEqual(resp.data['status'], 'complete')
+
+	def test_chunk_checksum_and_ownership(self):
+		upload_id = self._start(HTTP_DEVICE_ID='dev-1')
+		resp = self._put(upload_id, 0, b'0123', HTTP_DEVICE_ID='dev-1', HTTP_UPLOAD_CHECKSUM='sha256 ' + '0' * 64)
+		self.assertEqual(resp.status_code, 400)
+		self.assertEqual(resp.data['offset'], 0)
+		self.assertEqual(self._put(upload_id, 0, b'0123', HTTP_DEVICE_ID='dev-2').status_code, 404)
+
+	def test_file_checksum_mismatch_resets_upload(self):
+		upload_id = self._start(HTTP_DEVICE_ID='dev-1')
+		self.content = b'0123456780'
+		for offset in range(0, 10, 4):
+			self._put(upload_id, offset, self.content[offset:offset + 4], HTTP_DEVICE_ID='dev-1')
+		resp = self.client.post(f'/api/uploads/{upload_id}/complete/', HTTP_DEVICE_ID='dev-1')
+		self.assertEqual(resp.status_code, 422)
+		self.assertEqual(ChunkedUpload.objects.get().offset, 0)
+
+	def test_completed_upload_becomes_feed_video(self):
+		admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		self.client.force_authenticate(admin)
+		upload_id = self._start()
+		self._upload_all(upload_id)
+		resp = self.client.post('/api/feeds/create/', {'description': 'Clip', 'upload_id': upload_id}, format='multipart')
+		self.assertEqual(resp.status_code, 202, resp.data)
+		job = FeedMediaJob.objects.get(feed_id=resp.data['id'])
+		with open(job.staged_path, 'rb') as f:
+			self.assertEqual(f.read(), self.content)
+		self.assertEqual(job.original_name, 'clip.mp4')
+		self.assertFalse(ChunkedUpload.objects.exists())
+
+	def test_completed_upload_becomes_message_attachment(self):
+		institution = Institution.objects.create(name='Test Inst')
+		department = Department.objects.create(name='Test Dept', institution=institution)
+		upload_id = self._start(HTTP_DEVICE_ID='dev-1')
+		self._upload_all(upload_id, HTTP_DEVICE_ID='dev-1')
+		resp = self.client.post('/api/messages/send/', {
+			'device_id': 'dev-1', 'institution': institution.id, 'department': department.id,
+			'other_problem': 'Water', 'content': 'Hello', 'ward': 'Ward', 'street': 'Street',
+			'phone_number': '0700000000', 'upload_id': upload_id,
+		}, format='json')
+		self.assertEqual(resp.status_code, 201, resp.data)
+		message = Message.objects.get()
+		with message.file.open('rb') as f:
+			self.assertEqual(f.read(), self.content)
+		self.assertFalse(ChunkedUpload.objects.exists())
+
+	def test_purge_removes_expired_uploads(self):
+		upload_id = self._start(HTTP_DEVICE_ID='dev-1')
+		upload = ChunkedUpload.objects.get(pk=upload_id)
+		ChunkedUpload.objects.filter(pk=upload_id).update(expires_at=timezone.now())
+		call_command('purge_chunked_uploads', stdout=open(os.devnull, 'w'))
+		self.assertFalse(ChunkedUpload.objects.exists())
+		self.assertFalse(os.path.exists(upload.staged_path))
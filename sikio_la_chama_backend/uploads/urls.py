@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import ChunkedUploadStartView, ChunkedUploadView, ChunkedUploadCompleteView
+
+urlpatterns = [
+    path('', ChunkedUploadStartView.as_view(), name='chunked_upload_start'),
+    path('<uuid:upload_id>/', ChunkedUploadView.as_view(), name='chunked_upload'),
+    path('<uuid:upload_id>/complete/', ChunkedUploadCompleteView.as_view(), name='chunked_upload_complete'),
+]
@@ -0,0 +1,128 @@
+import logging
+import re
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import staging
+
+logger = logging.getLogger(__name__)
+
+SHA256_RE = re.compile(r'^[0-9a-fA-F]{64}$')
+
+
+def _upload_state(upload):
+    return {
+        "id": str(upload.id),
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": upload.offset,
+        "status": upload.status,
+        "chunk_size": settings.CHUNKED_UPLOAD_MAX_CHUNK,
+        "expires_at": upload.expires_at,
+    }
+
+
+class ChunkedUploadStartView(APIView):
+    """Start a resumable upload.
+
+    POST {"filename", "size", "sha256", "content_type"?} (plus DEVICE_ID for
+    anonymous clients). Then PUT each chunk to the returned upload with its
+    byte offset, POST to ``complete/`` and pass the id as ``upload_id`` to
+    the feed or message create endpoint in place of the file.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        device_id = request.data.get("device_id") or request.META.get("HTTP_DEVICE_ID")
+        if not request.user.is_authenticated and not device_id:
+            return Response({"errors": {"device_id": "Device ID is required"}}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = {}
+        filename = (request.data.get("filename") or "").strip()
+        if not filename:
+            errors["filename"] = "This field is required."
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            size = None
+        if size is None or size <= 0:
+            errors["size"] = "A positive size in bytes is required."
+        elif size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            errors["size"] = f"Uploads may not exceed {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes."
+        sha256 = request.data.get("sha256") or ""
+        if not SHA256_RE.match(sha256):
+            errors["sha256"] = "The file's SHA-256 as 64 hex characters is required."
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = staging.start(
+            request.user, device_id, filename, size, sha256, request.data.get("content_type") or ""
+        )
+        logger.info("Chunked upload %s started for %s (%s bytes)", upload.id, filename, size)
+        return Response(_upload_state(upload), status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadView(APIView):
+    """GET the current offset (to resume) or PUT a raw chunk.
+
+    A chunk's offset comes from ``?offset=`` or the ``Upload-Offset`` header
+    and must equal the bytes already received; an optional
+    ``Upload-Checksum: sha256 <hex>`` header is verified before the offset
+    advances. A 409 response carries the offset to continue from.
+    """
+    permission_classes = [AllowAny]
+    # The body is read from the request stream directly, unbuffered.
+    parser_classes = []
+
+    def _get_upload(self, request, upload_id):
+        return staging.owned_uploads(request).filter(pk=upload_id).first()
+
+    def get(self, request, upload_id):
+        upload = self._get_upload(request, upload_id)
+        if upload is None:
+            return Response({"errors": {"upload": "Not found"}}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_upload_state(upload))
+
+    def put(self, request, upload_id):
+        upload = self._get_upload(request, upload_id)
+        if upload is None:
+            return Response({"errors": {"upload": "Not found"}}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            offset = int(request.query_params.get("offset", request.META.get("HTTP_UPLOAD_OFFSET", "")))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response({"errors": {"offset": "An integer offset is required."}}, status=status.HTTP_400_BAD_REQUEST)
+
+        checksum = request.META.get("HTTP_UPLOAD_CHECKSUM", "")
+        algorithm, _, chunk_sha256 = checksum.partition(" ")
+        if checksum and algorithm.lower() != "sha256":
+            return Response({"errors": {"checksum": "Only sha256 chunk checksums are supported."}}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            new_offset = staging.write_chunk(upload, offset, request.stream, length, chunk_sha256 or None)
+        except staging.ChunkError as e:
+            logger.warning("Chunk rejected for upload %s: %s", upload.id, e)
+            return Response(
+                {"errors": {"chunk": str(e)}, "offset": upload.offset}, status=e.status
+            )
+        return Response(_upload_state(upload) | {"offset": new_offset})
+
+
+class ChunkedUploadCompleteView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request, upload_id):
+        upload = staging.owned_uploads(request).filter(pk=upload_id).first()
+        if upload is None:
+            return Response({"errors": {"upload": "Not found"}}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            staging.complete(upload)
+        except staging.ChunkError as e:
+            logger.warning("Chunked upload %s could not be completed: %s", upload.id, e)
+            return Response({"errors": {"upload": str(e)}, "offset": upload.offset}, status=e.status)
+        logger.info("Chunked upload %s completed", upload.id)
+        return Response(_upload_state(upload))
@@ -0,0 +1,169 @@
+"""Delivery of message and reply attachments.
+
+Files on remote storage (Cloudinary) are never proxied through a worker:
+the client is redirected to a short-lived signed download URL. Files on
+local storage are served with ETag/If-None-Match revalidation and single
+byte-range support, or handed to the front-end server via
+``X-Accel-Redirect``/``X-Sendfile`` when ``ATTACHMENT_OFFLOAD`` is set.
+"""
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.utils.http import content_disposition_header, http_date, parse_etags, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def wants_preview(request):
+    return request.GET.get('preview', 'false').lower() in ['1', 'true', 'yes']
+
+
+def serve_attachment(request, field_file):
+    """Return a response delivering ``field_file`` to the requester.
+
+    Callers are responsible for access checks and for ensuring the field
+    actually holds a file.
+    """
+    preview = wants_preview(request)
+    if isinstance(field_file.storage, FileSystemStorage):
+        return _serve_local(request, field_file, preview)
+    response = HttpResponseRedirect(signed_url(field_file, preview))
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+def signed_url(field_file, preview=False):
+    """Return a URL for a remote file that stops working after ATTACHMENT_URL_TTL seconds."""
+    storage = field_file.storage
+    ttl = getattr(settings, 'ATTACHMENT_URL_TTL', 300)
+    if type(storage).__module__.startswith('cloudinary_storage'):
+        import cloudinary.utils
+
+        return cloudinary.utils.private_download_url(
+            field_file.name,
+            '',
+            resource_type=storage._get_resource_type(field_file.name),
+            type='upload',
+            expires_at=int(time.time()) + ttl,
+            attachment=not preview,
+        )
+    try:
+        # e.g. S3-style storages that presign URLs with an expiry
+        return storage.url(field_file.name, expire=ttl)
+    except TypeError:
+        return storage.url(field_file.name)
+
+
+def _serve_local(request, field_file, preview):
+    path = field_file.path
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404
+    size = stat.st_size
+    filename = os.path.basename(path)
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{size:x}")
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+        _set_validators(response, etag, stat.st_mtime)
+        return response
+
+    offload = getattr(settings, 'ATTACHMENT_OFFLOAD', None)
+    if offload:
+        # The front-end server streams the file (and handles Range itself).
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel':
+            prefix = getattr(settings, 'ATTACHMENT_ACCEL_PREFIX', '/protected-media/')
+            relative = os.path.relpath(path, field_file.storage.location).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = content_disposition_header(not preview, filename)
+        _set_validators(response, etag, stat.st_mtime)
+        return response
+
+    byte_range = _requested_range(request, etag, size)
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        _set_validators(response, etag, stat.st_mtime)
+        return response
+
+    if byte_range is None:
+        # FileResponse uses wsgi.file_wrapper, letting the server sendfile().
+        response = FileResponse(open(path, 'rb'), content_type=content_type, as_attachment=not preview, filename=filename)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(not preview, filename)
+    _set_validators(response, etag, stat.st_mtime)
+    return response
+
+
+def _requested_range(request, etag, size):
+    """Parse a single-range ``Range`` header into (start, end) inclusive.
+
+    Returns None to serve the whole file (no/ignored header, multi-range,
+    stale If-Range) and 'unsatisfiable' for ranges outside the file.
+    """
+    header = request.META.get('HTTP_RANGE')
+    if not header:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range.strip() != etag:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0:
+            return 'unsatisfiable'
+        start, end = max(size - suffix, 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _set_validators(response, etag, mtime):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
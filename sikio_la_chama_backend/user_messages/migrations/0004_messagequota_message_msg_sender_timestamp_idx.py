@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('user_messages', '0003_institutionfilepermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageQuota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'timestamp'], name='msg_sender_timestamp_idx'),
+        ),
+        migrations.AddField(
+            model_name='messagequota',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_quotas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='messagequota',
+            constraint=models.UniqueConstraint(fields=('sender', 'date'), name='unique_message_quota_per_day'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_messages', '0004_messagequota_message_msg_sender_timestamp_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['-timestamp'], name='msg_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['institution', '-timestamp'], name='msg_inst_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['department', '-timestamp'], name='msg_dept_timestamp_idx'),
+        ),
+    ]
@@ -1,10 +1,51 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from users.models import User
 from institutions.models import Institution, Department
 from problem_types.models import ProblemType
 
+DAILY_MESSAGE_LIMIT = 10
+MAX_REPLIES_PER_MESSAGE = 10
+
+
+class MessageQuota(models.Model):
+    """Per-sender count of messages sent on a given local date.
+
+    Keeps the daily limit check to a single indexed UPDATE on message
+    creation instead of a COUNT over the sender's messages on every save.
+    """
+    sender = models.ForeignKey(User, related_name='message_quotas', on_delete=models.CASCADE)
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sender', 'date'], name='unique_message_quota_per_day'),
+        ]
+
+    @classmethod
+    def consume(cls, sender_id, limit=DAILY_MESSAGE_LIMIT):
+        """Take one message from today's quota; return False once it is used up."""
+        today = timezone.localdate()
+        # Second pass covers losing a concurrent first-of-day insert race.
+        for _ in range(2):
+            updated = cls.objects.filter(
+                sender_id=sender_id, date=today, count__lt=limit
+            ).update(count=F('count') + 1)
+            if updated:
+                return True
+            _, created = cls.objects.get_or_create(
+                sender_id=sender_id, date=today, defaults={'count': 1}
+            )
+            if created:
+                return True
+        return False
+
+    def __str__(self):
+        return f"{self.sender_id} on {self.date}: {self.count}"
+
 class Message(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -28,18 +69,26 @@ class Message(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     reply_count = models.PositiveIntegerField(default=0)
 
-    def clean(self):
-        messages_today = Message.objects.filter(
-            sender=self.sender, timestamp__date=timezone.now().date()
-        ).count()
-        if messages_today >= 10:
-            raise ValidationError("You can only send 10 messages per day.")
-        if self.reply_count >= 10:
-            raise ValidationError("Maximum 10 replies per message.")
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', 'timestamp'], name='msg_sender_timestamp_idx'),
+            # Staff message lists (all, or scoped to an institution or
+            # department) newest first, and analytics date ranges.
+            models.Index(fields=['-timestamp'], name='msg_timestamp_idx'),
+            models.Index(fields=['institution', '-timestamp'], name='msg_inst_timestamp_idx'),
+            models.Index(fields=['department', '-timestamp'], name='msg_dept_timestamp_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # The daily quota only applies to new messages; roll it back if the
+        # insert itself fails.
+        with transaction.atomic():
+            if not MessageQuota.consume(self.sender_id):
+                raise ValidationError(f"You can only send {DAILY_MESSAGE_LIMIT} messages per day.")
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.sender.username} to {self.institution.name}: {self.content[:50]}"
@@ -52,11 +101,20 @@ class Reply(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        if self.message.reply_count >= 10:
-            raise ValidationError("Maximum 10 replies per message.")
-        self.message.reply_count += 1
-        self.message.save()
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Reserve a reply slot with a conditional UPDATE so concurrent replies
+        # can neither lose increments nor exceed the limit.
+        with transaction.atomic():
+            reserved = Message.objects.filter(
+                pk=self.message_id, reply_count__lt=MAX_REPLIES_PER_MESSAGE
+            ).update(reply_count=F('reply_count') + 1)
+            if not reserved:
+                raise ValidationError(f"Maximum {MAX_REPLIES_PER_MESSAGE} replies per message.")
+            super().save(*args, **kwargs)
+        if Reply.message.is_cached(self):
+            self.message.reply_count += 1
 
     def __str__(self):
         return f"Reply by {self.sender.username}: {self.content[:50]}"
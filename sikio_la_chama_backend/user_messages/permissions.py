@@ -0,0 +1,58 @@
+from users.models import User
+
+STAFF_USER_TYPES = ('admin', 'institution_user', 'department')
+
+
+class MessageAccessPolicy:
+    """Access rules for a message thread, evaluated for one requester.
+
+    The requester is the authenticated user or, for anonymous clients, the
+    user registered for the request's device_id. Scope checks compare FK ids
+    only, so they never load the requester's or the message's
+    institution/department, and results are memoised per (institution,
+    department) pair for list views that check many messages.
+    """
+
+    def __init__(self, requester):
+        self.requester = requester
+        self.user_type = getattr(requester, 'user_type', None)
+        self._scope_cache = {}
+
+    @classmethod
+    def for_request(cls, request):
+        if request.user.is_authenticated:
+            return cls(request.user)
+        device_id = request.query_params.get('device_id') or request.META.get('HTTP_DEVICE_ID')
+        requester = User.objects.filter(device_id=device_id).first() if device_id else None
+        return cls(requester)
+
+    @property
+    def is_staff(self):
+        return self.user_type in STAFF_USER_TYPES
+
+    def is_sender(self, message):
+        return self.requester is not None and message.sender_id == self.requester.pk
+
+    def in_scope(self, message):
+        """Whether a staff requester handles messages for this institution/department."""
+        if not self.is_staff:
+            return False
+        key = (message.institution_id, message.department_id)
+        if key not in self._scope_cache:
+            if self.user_type == 'department':
+                allowed = self.requester.department_id == message.department_id
+            elif self.user_type == 'institution_user':
+                allowed = self.requester.institution_id == message.institution_id
+            else:
+                allowed = True
+            self._scope_cache[key] = allowed
+        return self._scope_cache[key]
+
+    def can_view_message_file(self, message):
+        return self.is_sender(message) or self.in_scope(message)
+
+    def can_view_reply_file(self, reply):
+        # The reply's author, the owner of the thread and in-scope staff.
+        if self.requester is not None and reply.sender_id == self.requester.pk:
+            return True
+        return self.can_view_message_file(reply.message)
@@ -1,8 +1,12 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Message, Reply, InstitutionFilePermission
+from .permissions import STAFF_USER_TYPES
 from users.serializers import UserSerializer
 from institutions.models import Institution, Department
 from problem_types.models import ProblemType
+from catalog import refdata
+from catalog.serializers import CachedPrimaryKeyRelatedField
 
 # 20 MB max
 MAX_UPLOAD_SIZE = 20 * 1024 * 1024
@@ -27,7 +31,7 @@ class ReplySerializer(serializers.ModelSerializer):
             current_user = request.user
         elif device_user:
             current_user = device_user
-        return current_user == obj.sender
+        return current_user is not None and current_user.pk == obj.sender_id
 
     def get_is_staff(self, obj):
         return getattr(obj.sender, 'user_type', None) in ['admin', 'institution_user', 'department']
@@ -46,14 +50,14 @@ class MessageSerializer(serializers.ModelSerializer):
     # so we can access the request context.
     replies = serializers.SerializerMethodField()
     file = serializers.FileField(required=False, allow_null=True)
-    institution = serializers.PrimaryKeyRelatedField(
-        queryset=Institution.objects.all(), write_only=True
+    institution = CachedPrimaryKeyRelatedField(
+        'institutions', queryset=Institution.objects.all(), write_only=True
     )
-    department = serializers.PrimaryKeyRelatedField(
-        queryset=Department.objects.all(), write_only=True
+    department = CachedPrimaryKeyRelatedField(
+        'departments', queryset=Department.objects.all(), write_only=True
     )
-    problem_type = serializers.PrimaryKeyRelatedField(
-        queryset=ProblemType.objects.all(), write_only=True, required=False, allow_null=True
+    problem_type = CachedPrimaryKeyRelatedField(
+        'problem_types', queryset=ProblemType.objects.all(), write_only=True, required=False, allow_null=True
     )
     institution_detail = serializers.SerializerMethodField(read_only=True)
     department_detail = serializers.SerializerMethodField(read_only=True)
@@ -79,10 +83,10 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
 
     def get_institution_detail(self, obj):
-        return {"id": obj.institution.id, "name": obj.institution.name} if obj.institution else None
+        return refdata.detail('institutions', obj.institution_id)
 
     def get_department_detail(self, obj):
-        return {"id": obj.department.id, "name": obj.department.name} if obj.department else None
+        return refdata.detail('departments', obj.department_id)
 
     def validate(self, data):
         if not data.get('problem_type') and not data.get('other_problem'):
@@ -124,26 +128,32 @@ class MessageSerializer(serializers.ModelSerializer):
         if not current_user:
             return []
 
+        # Filtered in Python so replies prefetched by `with_related()` are used
         # Message sender: show both their own replies and authoritative replies
-        if current_user == obj.sender:
-            from django.db.models import Q
-            replies_qs = obj.replies.filter(
-                Q(sender=obj.sender) | Q(sender__user_type__in=['admin', 'institution_user', 'department'])
-            )
-            return ReplySerializer(replies_qs, many=True, context=self.context).data
+        if current_user.pk == obj.sender_id:
+            replies = [
+                reply for reply in obj.replies.all()
+                if reply.sender_id == obj.sender_id or reply.sender.user_type in STAFF_USER_TYPES
+            ]
+            return ReplySerializer(replies, many=True, context=self.context).data
 
         # Staff views: ensure they belong to the same scope
-        if getattr(current_user, 'user_type', None) in ['admin', 'institution_user', 'department']:
-            if current_user.user_type == 'department' and current_user.department != obj.department:
+        if getattr(current_user, 'user_type', None) in STAFF_USER_TYPES:
+            if current_user.user_type == 'department' and current_user.department_id != obj.department_id:
                 return []
-            if current_user.user_type == 'institution_user' and current_user.institution != obj.institution:
+            if current_user.user_type == 'institution_user' and current_user.institution_id != obj.institution_id:
                 return []
             # admin can see everything
-            replies_qs = obj.replies.all()
-            return ReplySerializer(replies_qs, many=True, context=self.context).data
+            return ReplySerializer(obj.replies.all(), many=True, context=self.context).data
 
         return []
 
+    @staticmethod
+    def with_related(queryset):
+        return queryset.select_related('sender__auth_token').prefetch_related(
+            Prefetch('replies', queryset=Reply.objects.select_related('sender__auth_token').order_by('timestamp', 'id'))
+        )
+
 class InstitutionFilePermissionSerializer(serializers.ModelSerializer):
     # expose institution_id as a read-only integer sourced from the related institution
     institution_id = serializers.IntegerField(source='institution.id', read_only=True)
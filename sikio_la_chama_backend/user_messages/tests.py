@@ -1,3 +1,178 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, RequestFactory, override_settings
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from rest_framework.test import APIClient
+from users.models import User
+from institutions.models import Institution, Department
+from user_messages.models import Message, MessageQuota, Reply, DAILY_MESSAGE_LIMIT, MAX_REPLIES_PER_MESSAGE
+from user_messages.attachments import serve_attachment
 
-# Create your tests here.
+
+class MessageQuotaTests(TestCase):
+	def setUp(self):
+		self.sender = User.objects.create(username='anon_dev1', device_id='dev-1', user_type='anonymous')
+		self.institution = Institution.objects.create(name='Test Inst')
+		self.department = Department.objects.create(name='Test Dept', institution=self.institution)
+
+	def _message(self, **extra):
+		return Message.objects.create(
+			sender=self.sender, institution=self.institution, department=self.department,
+			content='Hello', ward='Ward', street='Street', phone_number='0700000000', **extra
+		)
+
+	def test_quota_blocks_creation_after_limit(self):
+		for _ in range(DAILY_MESSAGE_LIMIT):
+			self._message()
+		with self.assertRaises(ValidationError):
+			self._message()
+		self.assertEqual(Message.objects.filter(sender=self.sender).count(), DAILY_MESSAGE_LIMIT)
+		self.assertEqual(MessageQuota.objects.get(sender=self.sender).count, DAILY_MESSAGE_LIMIT)
+
+	def test_update_does_not_recount(self):
+		messages = [self._message() for _ in range(DAILY_MESSAGE_LIMIT)]
+		message = messages[0]
+		message.status = 'solved'
+		# a single UPDATE, no quota or COUNT query
+		with self.assertNumQueries(1):
+			message.save()
+		message.refresh_from_db()
+		self.assertEqual(message.status, 'solved')
+
+	def test_send_endpoint_returns_429_when_quota_used(self):
+		for _ in range(DAILY_MESSAGE_LIMIT):
+			self._message()
+		client = APIClient()
+		resp = client.post('/api/messages/send/', {
+			'device_id': 'dev-1', 'institution': self.institution.id, 'department': self.department.id,
+			'other_problem': 'Water', 'content': 'Hello', 'ward': 'Ward', 'street': 'Street',
+			'phone_number': '0700000000',
+		}, format='json')
+		self.assertEqual(resp.status_code, 429)
+
+
+class ReplyCountTests(TestCase):
+	def setUp(self):
+		self.sender = User.objects.create(username='anon_dev1', device_id='dev-1', user_type='anonymous')
+		self.admin = User.objects.create_user(username='admin', password='pass', user_type='admin', is_staff=True)
+		institution = Institution.objects.create(name='Test Inst')
+		department = Department.objects.create(name='Test Dept', institution=institution)
+		self.message = Message.objects.create(
+			sender=self.sender, institution=institution, department=department,
+			content='Hello', ward='Ward', street='Street', phone_number='0700000000'
+		)
+
+	def test_reply_limit_enforced_in_database(self):
+		for i in range(MAX_REPLIES_PER_MESSAGE):
+			Reply.objects.create(message=self.message, sender=self.admin, content=f'Reply {i}')
+		with self.assertRaises(ValidationError):
+			Reply.objects.create(message=self.message, sender=self.admin, content='One too many')
+		self.message.refresh_from_db()
+		self.assertEqual(self.message.reply_count, MAX_REPLIES_PER_MESSAGE)
+		self.assertEqual(self.message.replies.count(), MAX_REPLIES_PER_MESSAGE)
+
+	def test_stale_message_instance_does_not_lose_increments(self):
+		stale = Message.objects.get(pk=self.message.pk)
+		Reply.objects.create(message=self.message, sender=self.admin, content='First')
+		Reply.objects.create(message=stale, sender=self.admin, content='Second')
+		self.message.refresh_from_db()
+		self.assertEqual(self.message.reply_count, 2)
+
+	def test_status_update_allowed_at_reply_limit(self):
+		Message.objects.filter(pk=self.message.pk).update(reply_count=MAX_REPLIES_PER_MESSAGE)
+		self.message.refresh_from_db()
+		self.message.status = 'solved'
+		self.message.save(update_fields=['status'])
+		self.message.refresh_from_db()
+		self.assertEqual(self.message.status, 'solved')
+
+
+class AttachmentDeliveryTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root)
+		sender = User.objects.create(username='anon_dev1', device_id='dev-1', user_type='anonymous')
+		institution = Institution.objects.create(name='Test Inst')
+		department = Department.objects.create(name='Test Dept', institution=institution)
+		self.message = Message(
+			sender=sender, institution=institution, department=department,
+			content='Hello', ward='Ward', street='Street', phone_number='0700000000'
+		)
+		storage = FileSystemStorage(location=self.media_root)
+		name = storage.save('message_files/report.txt', ContentFile(b'0123456789'))
+		self.message.file = name
+		self.message.file.storage = storage
+		self.factory = RequestFactory()
+
+	def test_full_download_with_etag(self):
+		resp = serve_attachment(self.factory.get('/'), self.message.file)
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(b''.join(resp.streaming_content), b'0123456789')
+		self.assertEqual(resp['Accept-Ranges'], 'bytes')
+		self.assertIn('attachment', resp['Content-Disposition'])
+		resp2 = serve_attachment(self.factory.get('/', HTTP_IF_NONE_MATCH=resp['ETag']), self.message.file)
+		self.assertEqual(resp2.status_code, 304)
+
+	def test_byte_ranges(self):
+		resp = serve_attachment(self.factory.get('/', HTTP_RANGE='bytes=2-5'), self.message.file)
+		self.assertEqual(resp.status_code, 206)
+		self.assertEqual(resp['Content-Range'], 'bytes 2-5/10')
+		self.assertEqual(b''.join(resp.streaming_content), b'2345')
+		resp = serve_attachment(self.factory.get('/', HTTP_RANGE='bytes=-3'), self.message.file)
+		self.assertEqual(b''.join(resp.streaming_content), b'789')
+		resp = serve_attachment(self.factory.get('/', HTTP_RANGE='bytes=20-'), self.message.file)
+		self.assertEqual(resp.status_code, 416)
+
+	@override_settings(ATTACHMENT_OFFLOAD='x-accel', ATTACHMENT_ACCEL_PREFIX='/protected/')
+	def test_x_accel_offload(self):
+		resp = serve_attachment(self.factory.get('/?preview=1'), self.message.file)
+		self.assertEqual(resp['X-Accel-Redirect'], '/protected/' + self.message.file.name)
+		self.assertIn('inline', resp['Content-Disposition'])
+		self.assertEqual(resp.content, b'')
+
+	def test_remote_storage_redirects_to_signed_url(self):
+		self.message.file.storage = MediaCloudinaryStorage()
+		self.message.file.name = 'media/message_files/report'
+		resp = serve_attachment(self.factory.get('/'), self.message.file)
+		self.assertEqual(resp.status_code, 302)
+		self.assertIn('expires_at=', resp['Location'])
+		self.assertIn('signature=', resp['Location'])
+
+
+class AttachmentEndpointTests(TestCase):
+	def setUp(self):
+		self.owner = User.objects.create(username='anon_dev1', device_id='dev-1', user_type='anonymous')
+		institution = Institution.objects.create(name='Test Inst')
+		department = Department.objects.create(name='Test Dept', institution=institution)
+		other_department = Department.objects.create(name='Other Dept', institution=institution)
+		self.in_scope = User.objects.create_user(username='dept', password='pass', user_type='department', department=department)
+		self.out_of_scope = User.objects.create_user(username='other', password='pass', user_type='department', department=other_department)
+		self.message = Message.objects.create(
+			sender=self.owner, institution=institution, department=department,
+			content='Hello', ward='Ward', street='Street', phone_number='0700000000',
+			file='message_files/report',
+		)
+		self.reply = Reply.objects.create(message=self.message, sender=self.in_scope, content='Hi', file='reply_files/answer')
+		self.client = APIClient()
+
+	def test_owner_gets_message_and_reply_files(self):
+		resp = self.client.get(f'/api/messages/{self.message.id}/file/', HTTP_DEVICE_ID='dev-1')
+		self.assertEqual(resp.status_code, 302)
+		resp = self.client.get(f'/api/messages/replies/{self.reply.id}/file/', HTTP_DEVICE_ID='dev-1')
+		self.assertEqual(resp.status_code, 302)
+
+	def test_scope_enforced_for_staff(self):
+		self.client.force_authenticate(self.out_of_scope)
+		resp = self.client.get(f'/api/messages/replies/{self.reply.id}/file/')
+		self.assertEqual(resp.status_code, 403)
+		self.client.force_authenticate(self.in_scope)
+		with self.assertNumQueries(1):
+			resp = self.client.get(f'/api/messages/replies/{self.reply.id}/file/')
+		self.assertEqual(resp.status_code, 302)
+
+	def test_stranger_forbidden(self):
+		resp = self.client.get(f'/api/messages/{self.message.id}/file/', HTTP_DEVICE_ID='someone-else')
+		self.assertEqual(resp.status_code, 403)
@@ -3,8 +3,7 @@ from .views import (
     SendMessageView,
     MessageListView,
     ReplyMessageView,
-    MessageFileView,
-    ReplyFileView,
+    AttachmentFileView,
     ReplyListView,
     UpdateMessageStatusView,
     DeleteMessageView,
@@ -18,7 +17,8 @@ urlpatterns = [
     path('list/', MessageListView.as_view(), name='message_list'),
     path('<int:message_id>/reply/', ReplyMessageView.as_view(), name='reply_message'),
     path('<int:message_id>/replies/', ReplyListView.as_view(), name='reply_list'),
-    path('<int:message_id>/file/', MessageFileView.as_view(), name='message_file'),
+    path('<int:message_id>/file/', AttachmentFileView.as_view(), name='message_file'),
+    path('replies/<int:reply_id>/file/', AttachmentFileView.as_view(), name='reply_file'),
     path('<int:message_id>/status/', UpdateMessageStatusView.as_view(), name='update_message_status'),
     path('<int:message_id>/', DeleteMessageView.as_view(), name='delete_message'),
     path('institutions/', InstitutionListView.as_view(), name='institution_list'),
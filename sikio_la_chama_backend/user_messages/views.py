@@ -5,11 +5,13 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAdminUser
 from .models import Message, Reply  # removed InstitutionFilePermission import
 from .serializers import MessageSerializer, ReplySerializer  # removed InstitutionFilePermissionSerializer
+from .attachments import serve_attachment
+from .permissions import MessageAccessPolicy, STAFF_USER_TYPES
 from users.models import User
 from institutions.models import Institution, Department
-from django.http import FileResponse, Http404
-import mimetypes
-import os
+from uploads import staging
+from catalog.conditional import ConditionalGetMixin
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.pagination import PageNumberPagination
 
 logger = logging.getLogger(__name__)
@@ -31,15 +33,30 @@ class SendMessageView(APIView):
                     username=f"anon_{device_id[:8]}",
                     user_type="anonymous"
                 )
-                logger.info(f"Created anonymous user for device_id: {device_id}")
+                logger.info("Created anonymous user for device_id: %s", device_id)
 
-        serializer = MessageSerializer(data=request.data, context={'request': request, 'device_user': sender})
+        # A large attachment may arrive as `upload_id` of a completed chunked upload.
+        try:
+            data, staged = staging.with_staged_file(request, 'file')
+        except staging.ChunkError as e:
+            return Response({"errors": {"upload_id": str(e)}}, status=e.status)
+        serializer = MessageSerializer(data=data, context={'request': request, 'device_user': sender})
         if not serializer.is_valid():
-            logger.error(f"Serializer errors in SendMessageView: {serializer.errors}")
+            logger.error("Serializer errors in SendMessageView: %s", serializer.errors)
+            if staged:
+                staged.close()
             return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        message = serializer.save(sender=sender)
-        logger.info(f"Message {message.id} created by {sender.username}")
+        try:
+            message = serializer.save(sender=sender)
+        except DjangoValidationError as e:
+            logger.warning("Daily message quota reached for %s", sender.username)
+            if staged:
+                staged.close()
+            return Response({"errors": {"quota": e.messages[0]}}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        if staged:
+            staging.finish(staged)
+        logger.info("Message %s created by %s", message.id, sender.username)
         return Response(MessageSerializer(message, context={'request': request, 'device_user': sender}).data, status=status.HTTP_201_CREATED)
 
 
@@ -61,7 +78,7 @@ class MessageListView(APIView):
                 return Response({"errors": {"device_id": "Device ID required"}}, status=status.HTTP_400_BAD_REQUEST)
             sender = User.objects.filter(device_id=device_id).first()
             if not sender:
-                logger.info(f"No user found for device_id: {device_id}")
+                logger.info("No user found for device_id: %s", device_id)
                 return Response([], status=status.HTTP_200_OK)
             messages = messages.filter(sender=sender)
 
@@ -76,8 +93,10 @@ class MessageListView(APIView):
         if not request.user.is_authenticated and device_id:
             device_user = User.objects.filter(device_id=device_id).first()
 
-        serializer = MessageSerializer(messages, many=True, context={'request': request, 'device_user': device_user})
-        logger.debug(f"Returning {len(serializer.data)} messages")
+        serializer = MessageSerializer(
+            MessageSerializer.with_related(messages), many=True, context={'request': request, 'device_user': device_user}
+        )
+        logger.debug("Returning %s messages", len(serializer.data))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -87,7 +106,7 @@ class ReplyMessageView(APIView):
         try:
             message = Message.objects.get(id=message_id)
         except Message.DoesNotExist:
-            logger.error(f"Message {message_id} not found in ReplyMessageView")
+            logger.error("Message %s not found in ReplyMessageView", message_id)
             return Response({"errors": {"message": "Message not found"}}, status=status.HTTP_404_NOT_FOUND)
 
         device_id = request.data.get("device_id") or request.META.get("HTTP_DEVICE_ID")
@@ -101,25 +120,29 @@ class ReplyMessageView(APIView):
                     username=f"anon_{device_id[:8]}",
                     user_type="anonymous"
                 )
-                logger.info(f"Created anonymous user for device_id: {device_id}")
+                logger.info("Created anonymous user for device_id: %s", device_id)
 
         if sender.user_type == "anonymous" and message.sender != sender:
-            logger.warning(f"Anonymous user {sender.username} attempted to reply to message {message_id}")
+            logger.warning("Anonymous user %s attempted to reply to message %s", sender.username, message_id)
             return Response({"errors": {"permission": "Cannot reply to this message"}}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = ReplySerializer(data=request.data, context={'request': request, 'device_user': sender})
         if not serializer.is_valid():
-            logger.error(f"Serializer errors in ReplyMessageView: {serializer.errors}")
+            logger.error("Serializer errors in ReplyMessageView: %s", serializer.errors)
             return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        reply = serializer.save(sender=sender, message=message)
+        try:
+            reply = serializer.save(sender=sender, message=message)
+        except DjangoValidationError as e:
+            logger.warning("Reply limit reached for message %s", message_id)
+            return Response({"errors": {"replies": e.messages[0]}}, status=status.HTTP_400_BAD_REQUEST)
 
         if sender.user_type == "admin" and message.status == "pending":
             message.status = "answered"
-            message.save()
-            logger.info(f"Message {message_id} status updated to answered by admin {sender.username}")
+            message.save(update_fields=["status"])
+            logger.info("Message %s status updated to answered by admin %s", message_id, sender.username)
 
-        logger.info(f"Reply {reply.id} created for message {message_id} by {sender.username}")
+        logger.info("Reply %s created for message %s by %s", reply.id, message_id, sender.username)
         return Response(ReplySerializer(reply, context={'request': request, 'device_user': sender}).data, status=status.HTTP_201_CREATED)
 
 
@@ -131,24 +154,20 @@ class ReplyListView(APIView):
         except Message.DoesNotExist:
             return Response({"errors": {"message": "Message not found"}}, status=status.HTTP_404_NOT_FOUND)
 
-        device_id = request.query_params.get('device_id') or request.META.get('HTTP_DEVICE_ID')
-        requester = request.user if request.user.is_authenticated else None
-        if not requester and device_id:
-            requester = User.objects.filter(device_id=device_id).first()
+        policy = MessageAccessPolicy.for_request(request)
+        requester = policy.requester
 
-        if requester == message.sender:
+        if policy.is_sender(message):
             from django.db.models import Q
-            qs = message.replies.filter(Q(sender=message.sender) | Q(sender__user_type__in=['admin', 'institution_user', 'department']))
-        elif requester and getattr(requester, 'user_type', None) in ['admin', 'institution_user', 'department']:
-            if requester.user_type == 'department' and requester.department != message.department:
-                return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
-            if requester.user_type == 'institution_user' and requester.institution != message.institution:
+            qs = message.replies.filter(Q(sender=message.sender) | Q(sender__user_type__in=STAFF_USER_TYPES))
+        elif policy.is_staff:
+            if not policy.in_scope(message):
                 return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
             qs = message.replies.all()
         else:
             qs = message.replies.none()
 
-        qs = qs.order_by('timestamp')
+        qs = qs.select_related('sender__auth_token').order_by('timestamp')
         paginator = PageNumberPagination()
         paginator.page_size = 20
         page = paginator.paginate_queryset(qs, request)
@@ -156,154 +175,85 @@ class ReplyListView(APIView):
         return paginator.get_paginated_response(serializer.data)
 
 
-class MessageFileView(APIView):
-    """Serve message file: owner or staff (admin/institution_user/department in same scope)"""
-    permission_classes = [AllowAny]
-
-    def get(self, request, message_id):
-        try:
-            message = Message.objects.get(id=message_id)
-        except Message.DoesNotExist:
-            return Response({"errors": {"message": "Message not found"}}, status=status.HTTP_404_NOT_FOUND)
+class AttachmentFileView(APIView):
+    """Serve a message or reply file to its owner or in-scope staff.
 
-        device_id = request.query_params.get('device_id') or request.META.get('HTTP_DEVICE_ID')
-        requester = request.user if request.user.is_authenticated else None
-        if not requester and device_id:
-            requester = User.objects.filter(device_id=device_id).first()
-
-        # owner always allowed
-        if requester == message.sender:
-            if not message.file:
-                return Response({"errors": {"file": "No file attached"}}, status=status.HTTP_404_NOT_FOUND)
-            file_path = message.file.path
-            if not os.path.exists(file_path):
-                raise Http404
-            preview = request.query_params.get('preview', 'false').lower() in ['1', 'true', 'yes']
-            content_type, _ = mimetypes.guess_type(file_path)
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type or 'application/octet-stream')
-            if preview:
-                response['Content-Disposition'] = 'inline; filename="%s"' % os.path.basename(file_path)
-            else:
-                response['Content-Disposition'] = 'attachment; filename="%s"' % os.path.basename(file_path)
-            return response
-
-        # staff in same scope may access
-        if requester and getattr(requester, 'user_type', None) in ['admin', 'institution_user', 'department']:
-            if requester.user_type == 'department' and requester.department != message.department:
-                return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
-            if requester.user_type == 'institution_user' and requester.institution != message.institution:
-                return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
-            if not message.file:
-                return Response({"errors": {"file": "No file attached"}}, status=status.HTTP_404_NOT_FOUND)
-            file_path = message.file.path
-            if not os.path.exists(file_path):
-                raise Http404
-            preview = request.query_params.get('preview', 'false').lower() in ['1', 'true', 'yes']
-            content_type, _ = mimetypes.guess_type(file_path)
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type or 'application/octet-stream')
-            if preview:
-                response['Content-Disposition'] = 'inline; filename="%s"' % os.path.basename(file_path)
-            else:
-                response['Content-Disposition'] = 'attachment; filename="%s"' % os.path.basename(file_path)
-            return response
-
-        return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
-
-
-class ReplyFileView(APIView):
-    """Serve reply file: owner or staff (admin/institution_user/department in same scope)"""
+    Routed as ``<message_id>/file/`` and ``replies/<reply_id>/file/``. The
+    file together with the ids needed for the access check is loaded in a
+    single query.
+    """
     permission_classes = [AllowAny]
 
-    def get(self, request, reply_id):
-        try:
-            reply = Reply.objects.get(id=reply_id)
-        except Reply.DoesNotExist:
-            return Response({"errors": {"reply": "Reply not found"}}, status=status.HTTP_404_NOT_FOUND)
-
-        device_id = request.query_params.get('device_id') or request.META.get('HTTP_DEVICE_ID')
-        requester = request.user if request.user.is_authenticated else None
-        if not requester and device_id:
-            requester = User.objects.filter(device_id=device_id).first()
-
-        if requester == reply.sender:
-            if not reply.file:
-                return Response({"errors": {"file": "No file attached"}}, status=status.HTTP_404_NOT_FOUND)
-            file_path = reply.file.path
-            if not os.path.exists(file_path):
-                raise Http404
-            preview = request.query_params.get('preview', 'false').lower() in ['1', 'true', 'yes']
-            content_type, _ = mimetypes.guess_type(file_path)
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type or 'application/octet-stream')
-            if preview:
-                response['Content-Disposition'] = 'inline; filename="%s"' % os.path.basename(file_path)
-            else:
-                response['Content-Disposition'] = 'attachment; filename="%s"' % os.path.basename(file_path)
-            return response
-
-        # staff in same scope may access
-        if requester and getattr(requester, 'user_type', None) in ['admin', 'institution_user', 'department']:
-            if requester.user_type == 'department' and requester.department != reply.message.department:
-                return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
-            if requester.user_type == 'institution_user' and requester.institution != reply.message.institution:
-                return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
-            if not reply.file:
-                return Response({"errors": {"file": "No file attached"}}, status=status.HTTP_404_NOT_FOUND)
-            file_path = reply.file.path
-            if not os.path.exists(file_path):
-                raise Http404
-            preview = request.query_params.get('preview', 'false').lower() in ['1', 'true', 'yes']
-            content_type, _ = mimetypes.guess_type(file_path)
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type or 'application/octet-stream')
-            if preview:
-                response['Content-Disposition'] = 'inline; filename="%s"' % os.path.basename(file_path)
-            else:
-                response['Content-Disposition'] = 'attachment; filename="%s"' % os.path.basename(file_path)
-            return response
-
-        return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
+    def get(self, request, message_id=None, reply_id=None):
+        policy = MessageAccessPolicy.for_request(request)
+        if reply_id is not None:
+            reply = (
+                Reply.objects.select_related('message')
+                .only('id', 'file', 'sender_id', 'message__id', 'message__sender_id',
+                      'message__institution_id', 'message__department_id')
+                .filter(id=reply_id).first()
+            )
+            if reply is None:
+                return Response({"errors": {"reply": "Reply not found"}}, status=status.HTTP_404_NOT_FOUND)
+            allowed, field_file = policy.can_view_reply_file(reply), reply.file
+        else:
+            message = (
+                Message.objects.only('id', 'file', 'sender_id', 'institution_id', 'department_id')
+                .filter(id=message_id).first()
+            )
+            if message is None:
+                return Response({"errors": {"message": "Message not found"}}, status=status.HTTP_404_NOT_FOUND)
+            allowed, field_file = policy.can_view_message_file(message), message.file
+
+        if not allowed:
+            return Response({"errors": {"permission": "Forbidden"}}, status=status.HTTP_403_FORBIDDEN)
+        if not field_file:
+            return Response({"errors": {"file": "No file attached"}}, status=status.HTTP_404_NOT_FOUND)
+        return serve_attachment(request, field_file)
 
 
 class UpdateMessageStatusView(APIView):
     permission_classes = [IsAdminUser]
     def patch(self, request, message_id):
-        logger.debug(f"User {request.user} attempting to update message {message_id}")
+        logger.debug("User %s attempting to update message %s", request.user, message_id)
         try:
             message = Message.objects.get(id=message_id)
         except Message.DoesNotExist:
-            logger.error(f"Message {message_id} not found")
+            logger.error("Message %s not found", message_id)
             return Response({"errors": {"message": "Message not found"}}, status=status.HTTP_404_NOT_FOUND)
 
         status_value = request.data.get("status")
         if status_value in ["pending", "answered", "solved", "help_received"]:
             message.status = status_value
-            message.save()
-            logger.info(f"Message {message_id} status updated to {status_value} by {request.user}")
+            message.save(update_fields=["status"])
+            logger.info("Message %s status updated to %s by %s", message_id, status_value, request.user)
             return Response(MessageSerializer(message).data, status=status.HTTP_200_OK)
 
-        logger.warning(f"Invalid status {status_value} for message {message_id}")
+        logger.warning("Invalid status %s for message %s", status_value, message_id)
         return Response({"errors": {"status": "Invalid status"}}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class DeleteMessageView(APIView):
     permission_classes = [IsAdminUser]
     def delete(self, request, message_id):
-        logger.debug(f"User {request.user} attempting to delete message {message_id}")
+        logger.debug("User %s attempting to delete message %s", request.user, message_id)
         try:
             message = Message.objects.get(id=message_id)
             message.delete()
-            logger.info(f"Message {message_id} deleted by {request.user}")
+            logger.info("Message %s deleted by %s", message_id, request.user)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Message.DoesNotExist:
-            logger.error(f"Message {message_id} not found")
+            logger.error("Message %s not found", message_id)
             return Response({"errors": {"message": "Message not found"}}, status=status.HTTP_404_NOT_FOUND)
 
 
-class InstitutionListView(APIView):
+class InstitutionListView(ConditionalGetMixin, APIView):
     permission_classes = [AllowAny]
+    conditional_resources = ('institutions',)
     def get(self, request):
-        institutions = Institution.objects.all()
-        logger.debug(f"Returning {institutions.count()} institutions")
-        return Response([{'id': inst.id, 'name': inst.name} for inst in institutions], status=status.HTTP_200_OK)
+        institutions = [{'id': inst.id, 'name': inst.name} for inst in Institution.objects.all()]
+        logger.debug("Returning %d institutions", len(institutions))
+        return Response(institutions, status=status.HTTP_200_OK)
 
 
 class DepartmentListView(APIView):
@@ -313,8 +263,9 @@ class DepartmentListView(APIView):
         departments = Department.objects.all()
         if institution_id:
             departments = departments.filter(institution_id=institution_id)
-        logger.debug(f"Returning {departments.count()} departments")
-        return Response([{'id': dept.id, 'name': dept.name, 'institution_id': dept.institution.id} for dept in departments], status=status.HTTP_200_OK)
+        departments = [{'id': dept.id, 'name': dept.name, 'institution_id': dept.institution.id} for dept in departments]
+        logger.debug("Returning %d departments", len(departments))
+        return Response(departments, status=status.HTTP_200_OK)
 
 
 class MessageCountView(APIView):
@@ -330,12 +281,12 @@ class MessageCountView(APIView):
 
         user = User.objects.filter(device_id=device_id).first()
         if not user:
-            logger.info(f"No user found for device_id: {device_id}")
+            logger.info("No user found for device_id: %s", device_id)
             return Response(
                 {"error": "User not found for the given device_id"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         message_count = Message.objects.filter(sender=user).count()
-        logger.debug(f"Returning message count {message_count} for device_id: {device_id}")
+        logger.debug("Returning message count %s for device_id: %s", message_count, device_id)
         return Response({"count": message_count}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from .models import User
 from institutions.models import Institution, Department
+from catalog import refdata
+from catalog.serializers import CachedPrimaryKeyRelatedField
 
 class UserSerializer(serializers.ModelSerializer):
     token = serializers.SerializerMethodField()
@@ -23,22 +25,27 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'token', 'institution', 'department']
 
     def get_token(self, obj):
-        token, created = Token.objects.get_or_create(user=obj)
-        return token.key
+        # List views select_related('...auth_token') so this is free for
+        # users that already have a token.
+        try:
+            return obj.auth_token.key
+        except Token.DoesNotExist:
+            token, created = Token.objects.get_or_create(user=obj)
+            return token.key
 
     def get_institution(self, obj):
-        return {"id": obj.institution.id, "name": obj.institution.name} if obj.institution else None
+        return refdata.detail('institutions', obj.institution_id)
 
     def get_department(self, obj):
-        return {"id": obj.department.id, "name": obj.department.name} if obj.department else None
+        return refdata.detail('departments', obj.department_id)
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False, allow_blank=True)
-    institution = serializers.PrimaryKeyRelatedField(
-        queryset=Institution.objects.all(), required=False, allow_null=True
+    institution = CachedPrimaryKeyRelatedField(
+        'institutions', queryset=Institution.objects.all(), required=False, allow_null=True
     )
-    department = serializers.PrimaryKeyRelatedField(
-        queryset=Department.objects.all(), required=False, allow_null=True
+    department = CachedPrimaryKeyRelatedField(
+        'departments', queryset=Department.objects.all(), required=False, allow_null=True
     )
 
     class Meta:
@@ -17,18 +17,18 @@ class RegisterView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        logger.debug(f"RegisterView called with data: {request.data}")
+        logger.debug("RegisterView called with fields: %s", list(request.data))
         try:
             serializer = RegisterSerializer(data=request.data, context={'request': request})
             if serializer.is_valid():
                 user = serializer.save()
                 token, _ = Token.objects.get_or_create(user=user)
-                logger.info(f"User {user.username} registered with device_id: {user.device_id}")
+                logger.info("User %s registered with device_id: %s", user.username, user.device_id)
                 return Response({
                     "user": UserSerializer(user).data,
                     "token": token.key
                 }, status=status.HTTP_201_CREATED)
-            logger.error(f"Registration failed: {serializer.errors}")
+            logger.error("Registration failed: %s", serializer.errors)
             return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         except (db_utils.OperationalError, SynchronousOnlyOperation) as e:
             logger.exception("Database error during registration")
@@ -41,7 +41,7 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        logger.debug(f"LoginView called with data: {request.data}")
+        logger.debug("LoginView called with fields: %s", list(request.data))
         username = request.data.get('username')
         password = request.data.get('password')
         device_id = request.data.get('device_id')
@@ -57,7 +57,7 @@ class LoginView(APIView):
             elif device_id:
                 user = User.objects.filter(device_id=device_id).first()
                 if not user:
-                    logger.info(f"No user found for device_id: {device_id}, creating anonymous user")
+                    logger.info("No user found for device_id: %s, creating anonymous user", device_id)
                     user = User.objects.create(
                         username=f"anon_{device_id[:8]}",
                         device_id=device_id,
@@ -66,7 +66,7 @@ class LoginView(APIView):
 
             if user:
                 token, _ = Token.objects.get_or_create(user=user)
-                logger.info(f"User {user.username} logged in")
+                logger.info("User %s logged in", user.username)
                 return Response({
                     "user": UserSerializer(user).data,
                     "token": token.key
@@ -85,7 +85,7 @@ class CurrentUserView(APIView):
 
     def get(self, request):
         try:
-            logger.debug(f"Fetching current user: {request.user}")
+            logger.debug("Fetching current user: %s", request.user)
             serializer = UserSerializer(request.user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except (db_utils.OperationalError, SynchronousOnlyOperation) as e:
@@ -107,7 +107,7 @@ class AdminCreateUserView(APIView):
             serializer = RegisterSerializer(data=request.data, context={'request': request})
             if serializer.is_valid():
                 user = serializer.save()
-                logger.info(f"Admin {request.user.username} created {user.user_type} {user.username}")
+                logger.info("Admin %s created %s %s", request.user.username, user.user_type, user.username)
                 return Response(UserSerializer(user).data, status=status.HTTP_201_CREATED)
             return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         except (db_utils.OperationalError, SynchronousOnlyOperation) as e: